@@ -1,77 +1,34 @@
-import math
 from funcs.general_functions import *
-from funcs.DelaunayTriangulation import *
+from core.reorder import reorderMesh
+from core.generators import fibonacciPoints
+from core.delaunay import delaunay, stereographicProjection
+from core.uvs import sphericalUVs
 
 LABEL = "Fibonacci Sphere"
-OPERATOR = "mesh.create_fibonacci_sphere"
 
 
-# create operator
-class MESH_OT_CreateFibonacciSphere(bpy.types.Operator):
-    """Create new Fibonacci Sphere using stereographic projection and Delauney triangulation"""
-    bl_idname = OPERATOR
-    bl_label = LABEL
-
-    def execute(self, context):
-        (obj, mesh) = createNewEmptyObject(LABEL)
-        props = mesh.SphereTopology
-        props.sphere_resolution = 500
-        props.sphere_transform2 = 1
-
-        bm = bmesh.new()
-
-        # create Fibonacci Sphere
-        createFibonacciSphere(bm, props.sphere_radius, props.sphere_resolution)
-        # save original mesh
-        mesh["verts"] = [v.co for v in bm.verts]
-        delaunayTriangulate(mesh, bm)
-        bm.to_mesh(mesh)
-
-        bm.free()
-
-        # Set remaining settings
-        props.sphere_type = LABEL
-        setSphereUpdated(props)
-        props.sphere_do_update = True
-
-        self.report({'INFO'}, "created "+LABEL)
-
-        return {'FINISHED'}
-
-
-def register():
-    bpy.utils.register_class(MESH_OT_CreateFibonacciSphere)
-
-
-def unregister():
-    bpy.utils.unregister_class(MESH_OT_CreateFibonacciSphere)
-
-
-############################################
-
-def createFibonacciSphere(bm, radius, res):
+# must keep this prototype
+def createSphere(operator, context):
     """
-    create Fibonacci Sphere (vertices only)
+    create a new object with a Fibonacci Sphere (called by the creation operator, see funcs.topologyRegistry)
 
-    :param bm:
-    :param radius:
-    :param res:
+    :param operator:
+    :param context:
     """
-    if res <= 1:
-        res = 2
+    (obj, mesh) = createNewEmptyObject(LABEL)
+    props = mesh.SphereTopology
+    props.sphere_resolution = 500
+    props.sphere_transform2 = 1
+    props.sphere_type = LABEL
 
-    phi = math.pi * (3. - math.sqrt(5.))  # golden angle (radians)
+    # create Fibonacci Sphere, save original vertices and triangulate
+    commitSphere(mesh, *computeSphere(getSphereParams(props)))
+    props.sphere_do_update = True
 
-    for i in range(res):
-        theta = phi * i
-        z = - 1 + (i / (res - 1)) * 2
-        dist_z = math.sqrt(1 - z ** 2)
-        x = math.cos(theta) * dist_z
-        y = math.sin(theta) * dist_z
-        coords = np.array([x, y, z])
+    operator.report({'INFO'}, "created " + LABEL)
 
-        bm.verts.new(coords * radius)
-        bm.verts.ensure_lookup_table()
+
+############################################
 
 
 # must keep this prototype
@@ -81,19 +38,8 @@ def updateSphereResolution(mesh):
 
     :param mesh:
     """
-    bm = bmesh.new()
-
-    mytool = mesh.SphereTopology
-    radius = mytool.sphere_radius
-    res = mytool.sphere_resolution
-
-    createFibonacciSphere(bm, radius, res)
-    mesh["verts"] = [v.co for v in bm.verts]
-    delaunayTriangulate(mesh, bm)
-
-    bm.to_mesh(mesh)
-    bm.free()
-    setSphereUpdated(mytool)
+    with profiling.stage(LABEL + ".updateSphereResolution"):
+        commitSphere(mesh, *computeSphere(getSphereParams(mesh.SphereTopology)))
 
 
 # must keep this prototype
@@ -103,15 +49,36 @@ def morphSphere(mesh):
 
     :param mesh:
     """
-    bm = bmesh.new()
-    bm.from_mesh(mesh)
+    with profiling.stage(LABEL + ".morphSphere"):
+        mytool = mesh.SphereTopology
+        co = computeMorph(getSphereParams(mytool), None, getOriginalVertices(mesh))
+        commitMorph(mesh, co)
 
-    mytool = mesh.SphereTopology
-    radius = mytool.sphere_radius
-    transform = mytool.sphere_transform
 
-    stereographicProjection(bm.verts, mesh["verts"], radius, transform)
+def computeSphere(params):
+    """
+    array version of updateSphereResolution, safe to run outside the main thread
+
+    :param dict params: see getSphereParams
+    :return (np.ndarray, np.ndarray, np.ndarray, np.ndarray): vertices, faces, original vertices (saved by commitSphere)
+        and UVs of each loop
+    """
+    origin = fibonacciPoints(params["resolution"], params["radius"])
+    verts, faces = delaunay(origin, params["transform2"], params["transform"], params["radius"])
+    if params.get("reorder"):
+        verts, faces, order, _ = reorderMesh(verts, faces, points=origin)
+        origin = origin[order]
+    # the UVs are computed on the sphere, so they don't change when it's flattened
+    return verts, faces, origin, sphericalUVs(origin, faces)
+
 
-    bm.to_mesh(mesh)
-    bm.free()
-    setSphereUpdated(mytool)
+def computeMorph(params, co, origin):
+    """
+    array version of morphSphere, safe to run outside the main thread
+
+    :param dict params: see getSphereParams
+    :param co: current (N, 3) coordinates (unused, the projection starts from the original vertices)
+    :param np.ndarray origin: (N, 3) original vertices, see getOriginalVertices
+    :return np.ndarray: new (N, 3) coordinates
+    """
+    return stereographicProjection(origin, params["radius"], params["transform"])
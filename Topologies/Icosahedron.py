@@ -1,94 +1,36 @@
-import bmesh
 from funcs.general_functions import *
+from core.reorder import reorderMesh
+from core.generators import icosphere
+from core.uvs import sphericalUVs
 
 LABEL = "Icosahedron"
-OPERATOR = "mesh.create_icosahedron"
 
 
-# create operator
-class MESH_OT_CreateIcosahedron(bpy.types.Operator):
-    bl_idname = OPERATOR
-    bl_label = LABEL
-
-    def execute(self, context):
-        (obj, mesh) = createNewEmptyObject(LABEL)
-
-        # create Bmesh
-        bm = getNewBaseIcosahedron(2)
-        bm.to_mesh(mesh)
-        obj.select_set(True)
-
-        # set properties
-        props = mesh.SphereTopology
-        props.sphere_radius = 2
-        props.sphere_type = LABEL
-        props.sphere_resolution = 1
-        setSphereUpdated(props)
-        props.sphere_do_update = True
-
-        return {'FINISHED'}
-
+# must keep this prototype
+def createSphere(operator, context):
+    """
+    create a new object with a Icosahedron (called by the creation operator, see funcs.topologyRegistry)
 
-def register():
-    bpy.utils.register_class(MESH_OT_CreateIcosahedron)
+    :param operator:
+    :param context:
+    """
+    (obj, mesh) = createNewEmptyObject(LABEL)
 
+    # set properties
+    props = mesh.SphereTopology
+    props.sphere_radius = 2
+    props.sphere_type = LABEL
+    props.sphere_resolution = 1
 
-def unregister():
-    bpy.utils.unregister_class(MESH_OT_CreateIcosahedron)
+    # create mesh
+    commitSphere(mesh, *computeSphere(getSphereParams(props)))
+    obj.select_set(True)
+    props.sphere_do_update = True
 
 
 ############################################
 
 
-def subdivide(bm, iterations, radius) -> None:
-    """
-    Subdivide <iterations> times the input icosahedron bmesh <bm>
-
-    :rtype: None
-    :param bmesh bm:
-    :param int iterations:
-    :param float radius:
-    """
-
-    for i in range(iterations):
-
-        faceListCopy = list(bm.faces).copy()
-        edgeListCopy = list(bm.edges).copy()
-
-        medianPoints = {}
-        bm.edges.ensure_lookup_table()
-        for edge in bm.edges:
-            # get median point position, normalize and create median vertex
-            co = [edge.verts[0].co[i] + edge.verts[1].co[i] for i in range(3)]
-            v = bm.verts.new(co)
-            bm.verts.ensure_lookup_table()
-            normalizeVert(v, radius)
-            medianPoints[getEdgeTuple(edge)] = v
-
-        points = [0] * 3
-        for x, face in enumerate(faceListCopy):
-            bm.faces.ensure_lookup_table()
-
-            # get the 3 median points of the 3 edges
-            for j, edge in enumerate(face.edges):
-                points[j] = medianPoints[getEdgeTuple(edge)]
-            # create 4 smaller faces for each face, delete old face
-            bm.faces.new([face.verts[0], points[0], points[2]])
-            bm.faces.ensure_lookup_table()
-            bm.faces.new([face.verts[1], points[1], points[0]])
-            bm.faces.ensure_lookup_table()
-            bm.faces.new([face.verts[2], points[2], points[1]])
-            bm.faces.ensure_lookup_table()
-            bm.faces.new([points[0], points[1], points[2]])
-            bm.faces.ensure_lookup_table()
-            bm.faces.remove(face)
-
-        for edge in edgeListCopy:
-            bm.edges.remove(edge)
-            bm.edges.ensure_lookup_table()
-    bm.normal_update()
-
-
 # must keep this prototype
 def updateSphereResolution(mesh):
     """
@@ -96,30 +38,8 @@ def updateSphereResolution(mesh):
 
     :param mesh:
     """
-    bm = bmesh.new()
-    bm.from_mesh(mesh)
-
-    mytool = mesh.SphereTopology
-    res = mytool.sphere_resolution
-    old_res = mytool.sphere_old_resolution
-    radius = mytool.sphere_radius
-    bm.verts.ensure_lookup_table()
-
-    if res < old_res:
-        # get bmesh of default IcoSphere
-        bm = getNewBaseIcosahedron(radius)
-        iterations = res - 1
-    elif res > old_res:
-        iterations = res - old_res
-    else:
-        return
-
-    # noinspection PyTypeChecker
-    subdivide(bm, iterations, radius)
-
-    bm.to_mesh(mesh)
-    bm.free()
-    setSphereUpdated(mytool)
+    with profiling.stage(LABEL + ".updateSphereResolution"):
+        commitSphere(mesh, *computeSphere(getSphereParams(mesh.SphereTopology)))
 
 
 # must keep this prototype
@@ -129,73 +49,32 @@ def morphSphere(mesh):
 
     :param mesh:
     """
-    bm = bmesh.new()
-    bm.from_mesh(mesh)
+    with profiling.stage(LABEL + ".morphSphere"):
+        mytool = mesh.SphereTopology
+        co = computeMorph(getSphereParams(mytool), readMorphVertices(mesh), None)
+        commitMorph(mesh, co)
 
-    mytool = mesh.SphereTopology
-    radius = mytool.sphere_radius
 
-    # update all vertices
-    for v in bm.verts:
-        normalizeVert(v, radius)
+def computeSphere(params):
+    """
+    array version of updateSphereResolution, safe to run outside the main thread
 
-    bm.to_mesh(mesh)
-    bm.free()
-    setSphereUpdated(mytool)
+    :param dict params: see getSphereParams
+    :return (np.ndarray, np.ndarray, None, np.ndarray): vertices, faces, original vertices (unused) and UVs of each loop
+    """
+    verts, faces = icosphere(params["resolution"] - 1, params["radius"])
+    if params.get("reorder"):
+        verts, faces = reorderMesh(verts, faces)[:2]
+    return verts, faces, None, sphericalUVs(verts, faces)
 
 
-def getNewBaseIcosahedron(radius):
+def computeMorph(params, co, origin):
     """
-    create basic 12-vertex Icosahedron
+    array version of morphSphere, safe to run outside the main thread
 
-    :param radius:
-    :return BMesh bm: the resulting icosahedron mesh
+    :param dict params: see getSphereParams
+    :param np.ndarray co: current (N, 3) coordinates, or the directions of a displaced sphere (see readMorphVertices)
+    :param origin: unused
+    :return np.ndarray: new (N, 3) coordinates
     """
-    # get clean Bmesh container
-    bm = bmesh.new()
-
-    # place vertex one by one
-    t = (1 + 5 ** 0.5) / 2  # golden ratio
-
-    bm.verts.new(normalize([-1, t, 0], radius))
-    bm.verts.new(normalize([1, t, 0], radius))
-    bm.verts.new(normalize([-1, -t, 0], radius))
-    bm.verts.new(normalize([1, -t, 0], radius))
-    bm.verts.new(normalize([0, -1, t], radius))
-    bm.verts.new(normalize([0, 1, t], radius))
-    bm.verts.new(normalize([0, -1, -t], radius))
-    bm.verts.new(normalize([0, 1, -t], radius))
-    bm.verts.new(normalize([t, 0, -1], radius))
-    bm.verts.new(normalize([t, 0, 1], radius))
-    bm.verts.new(normalize([-t, 0, -1], radius))
-    bm.verts.new(normalize([-t, 0, 1], radius))
-    bm.verts.ensure_lookup_table()
-
-    insertFace(bm, [0, 11, 5])
-    insertFace(bm, [0, 5, 1])
-    insertFace(bm, [0, 1, 7])
-    insertFace(bm, [0, 7, 10])
-    insertFace(bm, [0, 10, 11])
-    insertFace(bm, [1, 5, 9])
-    insertFace(bm, [5, 11, 4])
-    insertFace(bm, [11, 10, 2])
-    insertFace(bm, [10, 7, 6])
-    insertFace(bm, [7, 1, 8])
-    insertFace(bm, [3, 9, 4])
-    insertFace(bm, [3, 4, 2])
-    insertFace(bm, [3, 2, 6])
-    insertFace(bm, [3, 6, 8])
-    insertFace(bm, [3, 8, 9])
-    insertFace(bm, [4, 9, 5])
-    insertFace(bm, [2, 4, 11])
-    insertFace(bm, [6, 2, 10])
-    insertFace(bm, [8, 6, 7])
-    insertFace(bm, [9, 8, 1])
-    bm.faces.ensure_lookup_table()
-    return bm
-
-
-def getEdgeTuple(edge):
-    a = edge.verts[0]
-    b = edge.verts[1]
-    return (a, b) if a.index < b.index else (b, a)
+    return normalizeArray(co, params["radius"])
@@ -1,142 +1,34 @@
-import bmesh
-from math import sin, cos, pi
-import numpy as np
 from funcs.general_functions import *
+from core.generators import radial, radialVertices
+from core.uvs import radialUVs, loopUVs
 
 LABEL = "Radial Sphere"
-OPERATOR = "mesh.create_radial_sphere"
 
 
-# create operator
-class MESH_OT_CreateRadialSphere(bpy.types.Operator):
-    bl_idname = OPERATOR
-    bl_label = LABEL
-
-    def execute(self, context):
-        (obj, mesh) = createNewEmptyObject(LABEL)
-
-        # create BMesh
-        props = mesh.SphereTopology
-        radius = props.sphere_radius = 2
-        parallels = props.sphere_resolution = 8
-        meridians = props.sphere_resolution2 = 16
-        transform = props.sphere_transform = 1
-        bm = createRadialSphere(parallels, meridians, radius, transform)
-        obj.select_set(True)
-        if bm is None:
-            self.report({'WARNING'}, "BMesh creation failed")
-            return {'CANCELLED'}
-
-        # bake bmesh into mesh
-        bm.to_mesh(mesh)
-        bm.free()
-
-        # Set remaining settings
-        props.sphere_type = LABEL
-        setSphereUpdated(props)
-        props.sphere_do_update = True
-
-        return {'FINISHED'}
-
-
-def register():
-    bpy.utils.register_class(MESH_OT_CreateRadialSphere)
-
-
-def unregister():
-    bpy.utils.unregister_class(MESH_OT_CreateRadialSphere)
-
-
-############################################
-
-
-def createRadialSphere(parallels, meridians, radius, transformRatio) -> bmesh:
+# must keep this prototype
+def createSphere(operator, context):
     """
-    create Radial Sphere that can be unfolded
+    create a new object with a Radial Sphere (called by the creation operator, see funcs.topologyRegistry)
 
-    :param int parallels:
-    :param int meridians:
-    :param float radius:
-    :param float transformRatio: float between 0 (plane) and 1 (sphere)
-    :return bmesh:
+    :param operator:
+    :param context:
     """
+    (obj, mesh) = createNewEmptyObject(LABEL)
 
-    bm = bmesh.new()
+    props = mesh.SphereTopology
+    props.sphere_radius = 2
+    props.sphere_resolution = 8
+    props.sphere_resolution2 = 16
+    props.sphere_transform = 1
+    props.sphere_type = LABEL
 
-    # create vertices
-    placeAllVertices(bm, parallels, meridians, radius, transformRatio)
+    # create mesh
+    commitSphere(mesh, *computeSphere(getSphereParams(props)))
+    obj.select_set(True)
+    props.sphere_do_update = True
 
-    # create faces
-    placeAllFaces(bm, parallels, meridians)
-
-    return bm
-
-
-def placeAllVertices(bm, parallels, meridians, radius, transformRatio) -> None:
-    """
-    Place the vertices to form a sphere, a plane, ora something in the middle, depending on <transformRatio>.
-    Also, it creates vertices only if missing, else it only moves them in the correct position
-
-    :rtype: None
-    :param bmesh bm:
-    :param int parallels:
-    :param int meridians:
-    :param float radius:
-    :param float transformRatio:
-    """
 
-    parallels = parallels if parallels >= 3 else 3
-    meridians = meridians if meridians >= 3 else 3
-
-    smooth_coefficient = getSmoothCoefficient(transformRatio)
-    index = 0
-    for p in range(parallels):
-        plane_z = (1 - (2 * p) / (parallels - 1))
-        teta = plane_z * pi / 2
-        height = sin(teta)
-        for m in range(meridians):
-            plane_y = (1 - (2 * m) / (meridians - 1))
-            plane_coords = np.array([
-                -radius,
-                plane_y * radius,
-                plane_z * radius
-            ])
-            phi = m / (meridians - 1) * 2 * pi
-            sphere_coords = np.array([
-                radius * cos(phi) * cos(teta * smooth_coefficient),
-                radius * sin(phi) * cos(teta * smooth_coefficient),
-                radius * height
-            ])
-
-            # create vert with coords that are the combination of the 2 forms
-            defineVertex(bm, index, plane_coords * (1 - transformRatio) + sphere_coords * transformRatio)
-            index += 1
-    bm.verts.ensure_lookup_table()
-
-
-def placeAllFaces(bm, parallels, meridians) -> None:
-    """
-    place all missing faces in the Radial Sphere
-    ATTENTION: bm.faces MUST be empty
-
-    :rtype: None
-    :param bmesh bm:
-    :param int parallels:
-    :param int meridians:
-    """
-    verts = bm.verts
-    faces = bm.faces
-
-    for p in range(parallels - 1):
-        base_vert = p * meridians
-        for m in range(meridians - 1):
-            faces.new([
-                verts[base_vert + m],
-                verts[base_vert + meridians + m],
-                verts[base_vert + meridians + m + 1],
-                verts[base_vert + m + 1]
-            ])
-    faces.ensure_lookup_table()
+############################################
 
 
 # must keep this prototype
@@ -146,32 +38,8 @@ def updateSphereResolution(mesh):
 
     :param mesh:
     """
-    bm = bmesh.new()
-    bm.from_mesh(mesh)
-
-    mytool = mesh.SphereTopology
-    radius = mytool.sphere_radius
-    transform = mytool.sphere_transform
-    parallels = mytool.sphere_resolution
-    meridians = mytool.sphere_resolution2
-    verts = bm.verts
-    faces = bm.faces
-    verts.ensure_lookup_table()
-
-    # remove all faces and edges(due to the Radial Sphere topology, faces must be rebuilt entirely when changing resolution)
-    removeExcessBMElem(faces, 0)
-    removeExcessBMElem(bm.edges, 0)
-
-    # place/update all vertices, then remove the ones in excess, if present
-    placeAllVertices(bm, parallels, meridians, radius, transform)
-    removeExcessBMElem(verts, getNumberOfVertices(parallels, meridians))
-
-    # place all new faces
-    placeAllFaces(bm, parallels, meridians)
-
-    bm.to_mesh(mesh)
-    bm.free()
-    setSphereUpdated(mytool)
+    with profiling.stage(LABEL + ".updateSphereResolution"):
+        commitSphere(mesh, *computeSphere(getSphereParams(mesh.SphereTopology)))
 
 
 # must keep this prototype
@@ -181,23 +49,38 @@ def morphSphere(mesh):
 
     :param mesh:
     """
-    bm = bmesh.new()
-    bm.from_mesh(mesh)
+    with profiling.stage(LABEL + ".morphSphere"):
+        mytool = mesh.SphereTopology
+        co = computeMorph(getSphereParams(mytool), None, None)
+        if len(co) != len(mesh.vertices):
+            # the vertex structure is not the expected one, rebuild it
+            updateSphereResolution(mesh)
+            return
+        commitMorph(mesh, co)
 
-    mytool = mesh.SphereTopology
-    parallels = mytool.sphere_resolution
-    meridians = mytool.sphere_resolution2
-    radius = mytool.sphere_radius
-    transform = mytool.sphere_transform
-    verts = bm.verts
 
-    # update all vertices
-    placeAllVertices(bm, parallels, meridians, radius, transform)
-    removeExcessBMElem(verts, getNumberOfVertices(parallels, meridians))
+def computeSphere(params):
+    """
+    array version of updateSphereResolution, safe to run outside the main thread
 
-    bm.to_mesh(mesh)
-    bm.free()
-    setSphereUpdated(mytool)
+    :param dict params: see getSphereParams
+    :return (np.ndarray, np.ndarray, None, np.ndarray): vertices, quad faces, original vertices (unused) and UVs of each
+        loop
+    """
+    verts, faces = radial(params["resolution"], params["resolution2"], params["transform"], params["radius"])
+    return verts, faces, None, loopUVs(radialUVs(params["resolution"], params["resolution2"]), faces)
+
+
+def computeMorph(params, co, origin):
+    """
+    array version of morphSphere, safe to run outside the main thread
+
+    :param dict params: see getSphereParams
+    :param co: unused, the vertices only depend on the parameters
+    :param origin: unused
+    :return np.ndarray: new (N, 3) coordinates
+    """
+    return radialVertices(params["resolution"], params["resolution2"], params["transform"], params["radius"])
 
 
 def getNumberOfFaces(parallels, meridians):
@@ -206,7 +89,3 @@ def getNumberOfFaces(parallels, meridians):
 
 def getNumberOfVertices(parallels, meridians):
     return parallels * (meridians + 1)
-
-
-def getSmoothCoefficient(transformRatio):
-    return transformRatio ** 2
@@ -1,77 +1,35 @@
-from math import cos, sin
-from random import random
 from funcs.general_functions import *
-from funcs.DelaunayTriangulation import *
+from core.reorder import reorderMesh
+from core.generators import randomPoints
+from core.delaunay import delaunay, stereographicProjection
+from core.uvs import sphericalUVs
 
 LABEL = "Random Sphere"
-OPERATOR = "mesh.create_random_sphere"
 
 
-# create operator
-class MESH_OT_CreateRandomSphere(bpy.types.Operator):
-    """Create new Sphere using stereographic projection and Delauney triangulation from a randomly generated Sphere"""
-    bl_idname = OPERATOR
-    bl_label = LABEL
-
-    def execute(self, context):
-        (obj, mesh) = createNewEmptyObject(LABEL)
-        props = mesh.SphereTopology
-        props.sphere_resolution = 500
-        props.sphere_transform2 = 1
-
-        bm = bmesh.new()
-
-        # create Fibonacci Sphere
-        createRandomSphere(bm, props.sphere_radius, props.sphere_resolution)
-        # save original mesh
-        mesh["verts"] = [v.co for v in bm.verts]
-        delaunayTriangulate(mesh, bm)
-        bm.to_mesh(mesh)
-
-        bm.free()
-
-        # Set remaining settings
-        props.sphere_type = LABEL
-        setSphereUpdated(props)
-        props.sphere_do_update = True
-
-        self.report({'INFO'}, "created " + LABEL)
-
-        return {'FINISHED'}
-
+# must keep this prototype
+def createSphere(operator, context):
+    """
+    create a new object with a Random Sphere (called by the creation operator, see funcs.topologyRegistry)
 
-def register():
-    bpy.utils.register_class(MESH_OT_CreateRandomSphere)
+    :param operator:
+    :param context:
+    """
+    (obj, mesh) = createNewEmptyObject(LABEL)
+    props = mesh.SphereTopology
+    props.sphere_resolution = 500
+    props.sphere_transform2 = 1
+    props.sphere_type = LABEL
 
+    # create Random Sphere, save original vertices and triangulate
+    commitSphere(mesh, *computeSphere(getSphereParams(props)))
+    props.sphere_do_update = True
 
-def unregister():
-    bpy.utils.unregister_class(MESH_OT_CreateRandomSphere)
+    operator.report({'INFO'}, "created " + LABEL)
 
 
 ############################################
 
-def createRandomSphere(bm, radius, res):
-    """
-    create Random Sphere (vertices only)
-
-    :param bm:
-    :param radius:
-    :param res:
-    """
-
-    for i in range(res):
-        # generate random rotation angle and latitude
-        phi = random() * 2 * pi
-        latitude = radius * (2*random()-1)
-        dist = (radius ** 2 - latitude ** 2) ** 0.5
-
-        bm.verts.new([
-            cos(phi) * dist,
-            sin(phi) * dist,
-            latitude
-        ])
-        bm.verts.ensure_lookup_table()
-
 
 # must keep this prototype
 def updateSphereResolution(mesh):
@@ -80,19 +38,8 @@ def updateSphereResolution(mesh):
 
     :param mesh:
     """
-    bm = bmesh.new()
-
-    mytool = mesh.SphereTopology
-    radius = mytool.sphere_radius
-    res = mytool.sphere_resolution
-
-    createRandomSphere(bm, radius, res)
-    mesh["verts"] = [v.co for v in bm.verts]
-    delaunayTriangulate(mesh, bm)
-
-    bm.to_mesh(mesh)
-    bm.free()
-    setSphereUpdated(mytool)
+    with profiling.stage(LABEL + ".updateSphereResolution"):
+        commitSphere(mesh, *computeSphere(getSphereParams(mesh.SphereTopology)))
 
 
 # must keep this prototype
@@ -102,17 +49,36 @@ def morphSphere(mesh):
 
     :param mesh:
     """
-    bm = bmesh.new()
-    bm.from_mesh(mesh)
+    with profiling.stage(LABEL + ".morphSphere"):
+        mytool = mesh.SphereTopology
+        co = computeMorph(getSphereParams(mytool), None, getOriginalVertices(mesh))
+        commitMorph(mesh, co)
+
 
-    mytool = mesh.SphereTopology
-    radius = mytool.sphere_radius
-    transform = mytool.sphere_transform
+def computeSphere(params):
+    """
+    array version of updateSphereResolution, safe to run outside the main thread
 
-    stereographicProjection(bm.verts, mesh["verts"], radius, transform)
+    :param dict params: see getSphereParams, plus an optional "seed" of the random generator
+    :return (np.ndarray, np.ndarray, np.ndarray, np.ndarray): vertices, faces, original vertices (saved by commitSphere)
+        and UVs of each loop
+    """
+    origin = randomPoints(params["resolution"], params["radius"], params.get("seed"))
+    verts, faces = delaunay(origin, params["transform2"], params["transform"], params["radius"])
+    if params.get("reorder"):
+        verts, faces, order, _ = reorderMesh(verts, faces, points=origin)
+        origin = origin[order]
+    # the UVs are computed on the sphere, so they don't change when it's flattened
+    return verts, faces, origin, sphericalUVs(origin, faces)
 
-    bm.to_mesh(mesh)
-    bm.free()
-    setSphereUpdated(mytool)
 
+def computeMorph(params, co, origin):
+    """
+    array version of morphSphere, safe to run outside the main thread
 
+    :param dict params: see getSphereParams
+    :param co: current (N, 3) coordinates (unused, the projection starts from the original vertices)
+    :param np.ndarray origin: (N, 3) original vertices, see getOriginalVertices
+    :return np.ndarray: new (N, 3) coordinates
+    """
+    return stereographicProjection(origin, params["radius"], params["transform"])
@@ -1,105 +1,34 @@
-import bmesh
-import numpy as np
 from funcs.general_functions import *
+from core.generators import spherifiedCube, spherifiedCubeVertices, CUBE_ORIGIN as origin, CUBE_RIGHT as right, \
+    CUBE_UP as up
+from core.uvs import cubeMapUVs, loopUVs
 
 LABEL = "Spherified Cube"
-OPERATOR = "mesh.create_spherified_cube"
-
-origin = [
-    np.array([-1, -1, -1]),
-    np.array([1, -1, -1]),
-    np.array([1, -1, 1]),
-    np.array([-1, -1, 1]),
-    np.array([-1, 1, -1]),
-    np.array([-1, -1, 1]),
-]
-right = [
-    np.array([1, 0, 0]),
-    np.array([0, 0, 1]),
-    np.array([-1, 0, 0]),
-    np.array([0, 0, -1]),
-    np.array([1, 0, 0]),
-    np.array([1, 0, 0]),
-]
-up = [
-    np.array([0, 1, 0]),
-    np.array([0, 1, 0]),
-    np.array([0, 1, 0]),
-    np.array([0, 1, 0]),
-    np.array([0, 0, 1]),
-    np.array([0, 0, -1]),
-]
-
-
-# create operator
-class MESH_OT_CreateSpherifiedCube(bpy.types.Operator):
-    bl_idname = OPERATOR
-    bl_label = LABEL
-
-    def execute(self, context):
-        (obj, mesh) = createNewEmptyObject(LABEL)
-
-        # create BMesh
-        props = mesh.SphereTopology
-        radius = props.sphere_radius = 2
-        res = props.sphere_old_resolution = props.sphere_resolution = 4
-        transform = props.sphere_transform = 1
-
-        bm = bmesh.new()
-        placeAllVertices(bm, res, radius, transform)
-        obj.select_set(True)
-
-        # bake bmesh into mesh
-        bm.to_mesh(mesh)
-        bm.free()
-
-        # Set remaining settings
-        props.sphere_type = LABEL
-        setSphereUpdated(props)
-        props.sphere_do_update = True
-
-        return {'FINISHED'}
-
-
-def register():
-    bpy.utils.register_class(MESH_OT_CreateSpherifiedCube)
-
-
-def unregister():
-    bpy.utils.unregister_class(MESH_OT_CreateSpherifiedCube)
 
 
-############################################
-
-
-def placeAllVertices(bm, resolution, radius, transformRatio) -> None:
+# must keep this prototype
+def createSphere(operator, context):
     """
-    if given BMesh is not empty, assume it's a correct BMesh and update resolution, else create mesh from scratch
-    ATTENTION: no checks are made on correctness of the BMesh
-
-    :rtype: None
-    :param bmesh bm:
-    :param int resolution:
-    :param float radius:
-    :param float transformRatio:
+    create a new object with a Spherified Cube (called by the creation operator, see funcs.topologyRegistry)
+
+    :param operator:
+    :param context:
     """
+    (obj, mesh) = createNewEmptyObject(LABEL)
 
-    k = resolution + 1
-    for face in range(6):
-        for j in range(k):
-            for i in range(k):
-                bm.verts.new(getTransformedCoordinates(face, i, j, resolution, radius, transformRatio))
-                bm.verts.ensure_lookup_table()
+    props = mesh.SphereTopology
+    props.sphere_radius = 2
+    props.sphere_old_resolution = props.sphere_resolution = 4
+    props.sphere_transform = 1
+    props.sphere_type = LABEL
 
-    for face in range(6):
-        for j in range(resolution):
-            for i in range(resolution):
-                a = (face * k + j) * k + i
-                b = (face * k + j) * k + i + 1
-                c = (face * k + j + 1) * k + i
-                d = (face * k + j + 1) * k + i + 1
-                bm.faces.new([bm.verts[a], bm.verts[c], bm.verts[d], bm.verts[b]])
-                bm.faces.ensure_lookup_table()
+    # create mesh
+    commitSphere(mesh, *computeSphere(getSphereParams(props)))
+    obj.select_set(True)
+    props.sphere_do_update = True
+
+
+############################################
 
 
 # must keep this prototype
@@ -109,18 +38,8 @@ def updateSphereResolution(mesh):
 
     :param mesh:
     """
-    bm = bmesh.new()
-
-    mytool = mesh.SphereTopology
-    radius = mytool.sphere_radius
-    transform = mytool.sphere_transform
-    res = mytool.sphere_resolution
-
-    placeAllVertices(bm, res, radius, transform)
-
-    bm.to_mesh(mesh)
-    bm.free()
-    setSphereUpdated(mytool)
+    with profiling.stage(LABEL + ".updateSphereResolution"):
+        commitSphere(mesh, *computeSphere(getSphereParams(mesh.SphereTopology)))
 
 
 # must keep this prototype
@@ -130,33 +49,35 @@ def morphSphere(mesh):
 
     :param mesh:
     """
-    bm = bmesh.new()
-    bm.from_mesh(mesh)
-
-    mytool = mesh.SphereTopology
-    resolution = mytool.sphere_resolution
-    radius = mytool.sphere_radius
-    transform = mytool.sphere_transform
-
-    bm.verts.ensure_lookup_table()
-    v = 0
-    k = resolution + 1
-    for face in range(6):
-        for j in range(k):
-            for i in range(k):
-                bm.verts[v].co = getTransformedCoordinates(face, i, j, resolution, radius, transform)
-                v += 1
-
-    bm.to_mesh(mesh)
-    bm.free()
-    setSphereUpdated(mytool)
-
-
-def getTransformedCoordinates(face, i, j, resolution, radius, transform):
-    step = 1 / resolution
-    step3 = np.ones(3) * step
-    j3 = np.ones(3) * j
-    i3 = np.ones(3) * i
-    cube_coords = origin[face] * radius + step3 * (i3 * right[face] + j3 * up[face]) * radius * 2
-    sphere_coords = normalize(cube_coords, radius)
-    return sphere_coords * transform + cube_coords * (1 - transform)
+    with profiling.stage(LABEL + ".morphSphere"):
+        mytool = mesh.SphereTopology
+        co = computeMorph(getSphereParams(mytool), None, None)
+        if len(co) != len(mesh.vertices):
+            # the vertex structure is not the expected one, rebuild it
+            updateSphereResolution(mesh)
+            return
+        commitMorph(mesh, co)
+
+
+def computeSphere(params):
+    """
+    array version of updateSphereResolution, safe to run outside the main thread
+
+    :param dict params: see getSphereParams
+    :return (np.ndarray, np.ndarray, None, np.ndarray): vertices, quad faces, original vertices (unused) and UVs of each
+        loop
+    """
+    verts, faces = spherifiedCube(params["resolution"], params["transform"], params["radius"])
+    return verts, faces, None, loopUVs(cubeMapUVs(params["resolution"]), faces)
+
+
+def computeMorph(params, co, origin):
+    """
+    array version of morphSphere, safe to run outside the main thread
+
+    :param dict params: see getSphereParams
+    :param co: unused, the vertices only depend on the parameters
+    :param origin: unused
+    :return np.ndarray: new (N, 3) coordinates
+    """
+    return spherifiedCubeVertices(params["resolution"], params["transform"], params["radius"])
@@ -0,0 +1,18 @@
+"""
+declarations of the built-in topologies, the modules themselves are only imported when first used (see
+funcs.topologyRegistry)
+"""
+
+from funcs.topologyRegistry import registerTopology
+
+registerTopology("Radial Sphere", "mesh.create_radial_sphere", "Topologies.RadialSphere",
+                 properties=("sphere_resolution2",))
+registerTopology("Spherified Cube", "mesh.create_spherified_cube", "Topologies.SpherifiedCube")
+registerTopology("Icosahedron", "mesh.create_icosahedron", "Topologies.Icosahedron")
+registerTopology("Truncated Icosahedron", "mesh.create_truncated_icosahedron", "Topologies.TruncatedIcosahedron")
+registerTopology("Random Sphere", "mesh.create_random_sphere", "Topologies.RandomSphere",
+                 "Create new Sphere using stereographic projection and Delauney triangulation from a randomly generated "
+                 "Sphere", ("sphere_transform2",))
+registerTopology("Fibonacci Sphere", "mesh.create_fibonacci_sphere", "Topologies.FibonacciSphere",
+                 "Create new Fibonacci Sphere using stereographic projection and Delauney triangulation",
+                 ("sphere_transform2",))
@@ -0,0 +1,82 @@
+"""
+in-memory stand-in of a Blender Mesh, implementing the subset of the API used by core.meshTransfer
+"""
+
+import numpy as np
+
+
+class FakeCollection:
+    """
+    element collection (like Mesh.vertices) storing each attribute in a NumPy array
+
+    :param dict attributes: attribute name -> (shape of one element, dtype)
+    """
+
+    def __init__(self, attributes):
+        self.attributes = attributes
+        self.data = {name: np.zeros((0,) + shape, dtype=dtype) for name, (shape, dtype) in attributes.items()}
+        self.length = 0
+
+    def __len__(self):
+        return self.length
+
+    def add(self, count):
+        for name, (shape, dtype) in self.attributes.items():
+            self.data[name] = np.concatenate([self.data[name], np.zeros((count,) + shape, dtype=dtype)])
+        self.length += count
+
+    def clear(self):
+        self.__init__(self.attributes)
+
+    def foreach_set(self, name, seq):
+        array = self.data[name]
+        if np.size(seq) != array.size:
+            raise RuntimeError("foreach_set(%r): expected %d values, got %d" % (name, array.size, np.size(seq)))
+        array.reshape(-1)[:] = np.asarray(seq).reshape(-1)
+
+    def foreach_get(self, name, seq):
+        array = self.data[name]
+        if np.size(seq) != array.size:
+            raise RuntimeError("foreach_get(%r): expected %d values, got %d" % (name, array.size, np.size(seq)))
+        seq[:] = array.reshape(-1)
+
+
+class FakeMesh:
+    def __init__(self, name="FakeMesh"):
+        self.name = name
+        self.vertices = FakeCollection({"co": ((3,), np.float32)})
+        self.loops = FakeCollection({"vertex_index": ((), np.int32)})
+        self.polygons = FakeCollection({"loop_start": ((), np.int32), "loop_total": ((), np.int32)})
+        self.edges = FakeCollection({"vertices": ((2,), np.int32)})
+        self.custom = {}
+
+    def __contains__(self, key):
+        return key in self.custom
+
+    def __getitem__(self, key):
+        return self.custom[key]
+
+    def __setitem__(self, key, value):
+        self.custom[key] = value
+
+    def clear_geometry(self):
+        for collection in (self.vertices, self.loops, self.polygons, self.edges):
+            collection.clear()
+
+    def update(self, calc_edges=False):
+        if not calc_edges:
+            return
+        # same work as Blender: one edge for each pair of consecutive loops of a polygon
+        loops = self.loops.data["vertex_index"]
+        starts = self.polygons.data["loop_start"]
+        totals = self.polygons.data["loop_total"]
+        following = np.arange(len(loops)) + 1
+        following[starts + totals - 1] = starts
+        a = np.minimum(loops, loops[following]).astype(np.int64)
+        b = np.maximum(loops, loops[following]).astype(np.int64)
+        n = len(self.vertices)
+        keys = np.unique(a * n + b)
+        edges = np.stack([keys // n, keys % n], axis=1)
+        self.edges.clear()
+        self.edges.add(len(edges))
+        self.edges.foreach_set("vertices", edges)
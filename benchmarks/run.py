@@ -0,0 +1,453 @@
+"""
+benchmark suite of the generators, morphs and conversions of the core package
+
+usage:
+    python -m benchmarks.run [--quick] [--out results.json] [--baseline baseline.json] [--threshold 1.25]
+
+every case is run over a range of sizes, recording the best wall time over a few repeats, the peak memory allocated
+during one run (tracemalloc) and the number of output elements (faces, or vertices for morphs) per second.
+With --baseline, the exit code is 1 if a case got slower than <threshold> times its baseline time.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+import numpy as np
+import scipy
+from benchmarks.fakeMesh import FakeMesh
+from core.adaptive import AdaptiveIcosphere, angularCriterion
+from core.arrayMesh import ArrayMesh
+from core.arrays import faceCount, flattenFaces, normalizeArray, setPrecision
+from core.coloring import faceAdjacency, greedyColoring
+from core.conversions import truncate, voronoiDual
+from core.conway import conway
+from core.displacement import fbm, displace, sphereDirections
+from core.delaunay import delaunay, stereographicProjection
+from core.generators import icosphere, icosphereLods, subdivide, fibonacci, fibonacciPoints, randomSphere, spherifiedCube, \
+    spherifiedCubeVertices, spherifiedCubeFaces, radial, radialVertices
+from core.meshTransfer import writeMeshArrays
+from core.quality import meshQuality
+from core.validation import validateMesh
+from core.reorder import reorderMesh
+from core.geodesics import SurfaceGraph
+from core.laplacian import LaplacianBuilder
+from core.spatialIndex import CubeMapIndex, CellLocator
+from core.transfer import AttributeTransfer
+from core.uvs import sphericalUVs, cubeMapUVs, loopUVs
+
+# ignore cases faster than this (seconds) when comparing with the baseline, they are dominated by noise
+NOISE_FLOOR = 0.002
+
+CASES = []
+
+
+def case(name, sizes, quick_sizes):
+    """
+    register a benchmark case. The decorated function receives the size and returns a function without arguments
+    that runs the benchmarked code (everything done before is setup and is not measured)
+    """
+
+    def decorator(setup):
+        CASES.append((name, sizes, quick_sizes, setup))
+        return setup
+
+    return decorator
+
+
+'''
+                GENERATORS
+'''
+
+
+@case("icosphere", [2, 3, 4, 5, 6, 7], [2, 3, 4, 5])
+def benchIcosphere(level):
+    return lambda: icosphere(level)
+
+
+@case("icosphereLods", [4, 5, 6, 7], [4, 5])
+def benchIcosphereLods(level):
+    return lambda: icosphereLods(range(2, level + 1))[1][-1]
+
+
+@case("fibonacci", [1000, 10000, 100000], [1000, 10000])
+def benchFibonacci(n):
+    return lambda: fibonacci(n)
+
+
+@case("randomSphere", [1000, 10000, 100000], [1000, 10000])
+def benchRandomSphere(n):
+    return lambda: randomSphere(n, seed=0)
+
+
+@case("spherifiedCube", [8, 32, 128, 256], [8, 32])
+def benchSpherifiedCube(res):
+    return lambda: spherifiedCube(res)
+
+
+@case("radial", [32, 128, 512, 1024], [32, 128])
+def benchRadial(meridians):
+    return lambda: radial(meridians // 2, meridians)
+
+
+'''
+                MORPHS
+'''
+
+
+@case("morph.normalize", [4, 5, 6, 7], [4, 5])
+def benchNormalize(level):
+    verts, faces = icosphere(level)
+    return lambda: normalizeArray(verts, 2.)
+
+
+@case("morph.stereographicProjection", [1000, 10000, 100000, 1000000], [1000, 10000])
+def benchStereographicProjection(n):
+    points = fibonacciPoints(n)
+    return lambda: stereographicProjection(points, 1., 0.5)
+
+
+@case("morph.spherifiedCubeVertices", [8, 32, 128, 256], [8, 32])
+def benchSpherifiedCubeVertices(res):
+    return lambda: spherifiedCubeVertices(res, 0.5)
+
+
+@case("morph.radialVertices", [32, 128, 512, 1024], [32, 128])
+def benchRadialVertices(meridians):
+    return lambda: radialVertices(meridians // 2, meridians, 0.5)
+
+
+@case("morph.displace", [4, 5, 6, 7], [4, 5])
+def benchDisplace(level):
+    verts, faces = icosphere(level)
+    directions = sphereDirections(verts)
+    heights = fbm(directions)
+    return lambda: displace(verts, directions, heights, 0.2)
+
+
+@case("displacement.fbm", [4, 5, 6, 7], [4, 5])
+def benchFbm(level):
+    verts, faces = icosphere(level)
+    directions = sphereDirections(verts)
+    return lambda: fbm(directions)
+
+
+'''
+                CONVERSIONS
+'''
+
+
+@case("subdivide", [2, 3, 4, 5, 6], [2, 3, 4])
+def benchSubdivide(level):
+    verts, faces = icosphere(level)
+    return lambda: subdivide(verts, faces, 1)
+
+
+@case("delaunay", [1000, 10000, 100000], [1000, 10000])
+def benchDelaunay(n):
+    points = fibonacciPoints(n)
+    return lambda: delaunay(points)
+
+
+@case("truncate", [2, 3, 4, 5, 6], [2, 3, 4])
+def benchTruncate(level):
+    verts, faces = icosphere(level)
+    return lambda: truncate(verts, faces)
+
+
+@case("voronoiDual", [2, 3, 4, 5, 6], [2, 3, 4])
+def benchVoronoiDual(level):
+    verts, faces = icosphere(level)
+    return lambda: voronoiDual(verts, faces)
+
+
+@case("conway.tk", [2, 3, 4, 5, 6], [2, 3, 4])
+def benchConwayTk(level):
+    verts, faces = icosphere(level)
+    # import SciPy before timing
+    conway("", verts, faces)
+    return lambda: conway("tk", verts, faces, radius=1.)
+
+
+@case("writeMeshArrays", [4, 5, 6, 7], [4, 5])
+def benchWriteMeshArrays(level):
+    verts, faces = icosphere(level)
+    mesh = FakeMesh()
+
+    def run():
+        writeMeshArrays(mesh, verts, faces)
+        return len(mesh.polygons)
+
+    return run
+
+
+@case("reorderMesh", [10000, 100000, 1000000], [10000, 100000])
+def benchReorderMesh(n):
+    verts, faces = voronoiDual(*randomSphere(n, seed=0))
+    return lambda: reorderMesh(verts, faces)[:2]
+
+
+@case("arrayMesh", [4, 6, 8], [4, 6])
+def benchArrayMesh(level):
+    verts, faces = icosphere(level)
+    return lambda: ArrayMesh.fromArrays(verts, faces).twin
+
+
+@case("faceAdjacency", [10000, 100000, 1000000], [10000, 100000])
+def benchFaceAdjacency(n):
+    loops, totals = flattenFaces(voronoiDual(*fibonacci(n))[1])
+    return lambda: faceAdjacency(loops, totals)[1]
+
+
+@case("greedyColoring", [10000, 100000, 1000000], [10000, 100000])
+def benchGreedyColoring(n):
+    starts, neighbors = faceAdjacency(*flattenFaces(voronoiDual(*fibonacci(n))[1]))
+    return lambda: greedyColoring(starts, neighbors, seed=0)
+
+
+'''
+                UVS
+'''
+
+
+@case("sphericalUVs", [4, 6, 8], [4, 6])
+def benchSphericalUVs(level):
+    verts, faces = icosphere(level)
+    return lambda: sphericalUVs(verts, faces)
+
+
+@case("cubeMapUVs", [32, 128, 512], [32, 128])
+def benchCubeMapUVs(res):
+    faces = spherifiedCubeFaces(res)
+    return lambda: loopUVs(cubeMapUVs(res), faces)
+
+
+@case("adaptiveIcosphere", [8, 10, 12], [8, 10])
+def benchAdaptiveIcosphere(level):
+    sphere = AdaptiveIcosphere(1., level)
+    criterion = angularCriterion([0, 0, 1], 0.05)
+    # later refinements reuse the midpoints created by the first one
+    sphere.refine(criterion)
+    return lambda: sphere.refine(criterion)
+
+
+'''
+                QUALITY
+'''
+
+
+@case("meshQuality", [10000, 100000, 500000], [10000, 100000])
+def benchMeshQuality(n):
+    verts, faces = fibonacci(n)
+    return lambda: meshQuality(verts, faces)["faces"]
+
+
+@case("validateMesh", [5, 6, 7], [5, 6])
+def benchValidateMesh(level):
+    verts, faces = icosphere(level)
+    return lambda: validateMesh(verts, faces)["faces"]
+
+
+'''
+                GEODESICS
+'''
+
+
+@case("geodesicDistance", [4, 6, 7], [4, 6])
+def benchGeodesicDistance(level):
+    graph = SurfaceGraph(*icosphere(level))
+    # import SciPy before timing
+    graph.geodesicDistance([0])
+    return lambda: graph.geodesicDistance(np.arange(0, graph.n_verts, 1000))
+
+
+@case("kRings", [1000, 10000, 100000], [1000, 10000])
+def benchKRings(seeds):
+    graph = SurfaceGraph(*icosphere(6))
+    return lambda: graph.kRings(np.arange(seeds) % graph.n_verts, 3)[1]
+
+
+'''
+                LAPLACIAN
+'''
+
+
+@case("laplacianPattern", [4, 6, 7], [4, 6])
+def benchLaplacianPattern(level):
+    verts, faces = voronoiDual(*icosphere(level))
+    return lambda: LaplacianBuilder(len(verts), faces).indices
+
+
+@case("cotangentLaplacian", [4, 6, 7], [4, 6])
+def benchCotangentLaplacian(level):
+    verts, faces = voronoiDual(*icosphere(level))
+    builder = LaplacianBuilder(len(verts), faces)
+    return lambda: (builder.cotangentLaplacian(verts), builder.massMatrix(verts))[0].nnz
+
+
+'''
+                SPATIAL INDEX
+'''
+
+
+@case("spatialIndex.build", [10000, 100000, 1000000], [10000, 100000])
+def benchSpatialIndexBuild(n):
+    points = fibonacciPoints(n)
+    return lambda: CubeMapIndex(points).order
+
+
+@case("spatialIndex.nearest", [10000, 100000, 1000000], [10000, 100000])
+def benchSpatialIndexNearest(queries):
+    index = CubeMapIndex(fibonacciPoints(100000))
+    samples = np.random.default_rng(0).normal(size=(queries, 3))
+    return lambda: index.nearest(samples)
+
+
+@case("spatialIndex.locate", [10000, 100000, 1000000], [10000, 100000])
+def benchSpatialIndexLocate(queries):
+    locator = CellLocator(*voronoiDual(*fibonacci(10000)))
+    samples = np.random.default_rng(0).normal(size=(queries, 3))
+    return lambda: locator.locate(samples)
+
+
+'''
+                ATTRIBUTE TRANSFER
+'''
+
+
+@case("transfer.weights", [32, 128, 256], [32, 128])
+def benchTransferWeights(res):
+    verts, faces = fibonacci(100000)
+    targets = spherifiedCubeVertices(res)
+    return lambda: AttributeTransfer(verts, faces, targets).weights.shape[0]
+
+
+@case("transfer.apply", [32, 128, 256], [32, 128])
+def benchTransferApply(res):
+    verts, faces = fibonacci(100000)
+    transfer = AttributeTransfer(verts, faces, spherifiedCubeVertices(res))
+    # a color, a vector and a scalar field
+    attributes = {"color": np.random.default_rng(0).random((len(verts), 4)), "vector": verts, "scalar": verts[:, 2]}
+    return lambda: len(transfer.transfer(attributes)["scalar"])
+
+
+'''
+                RUNNER
+'''
+
+
+def countElements(result):
+    """
+    :return int: number of faces of a (verts, faces) result, number of rows of an array result, the result itself if
+        it's an int, else 0
+    """
+    if isinstance(result, int):
+        return result
+    if isinstance(result, tuple) and len(result) == 2:
+        return faceCount(result[1])
+    if isinstance(result, np.ndarray):
+        return len(result)
+    return 0
+
+
+def measure(run, repeat):
+    """
+    :return (float, int, object): best time, peak memory of one run and result of the last run
+    """
+    times = []
+    result = None
+    for i in range(repeat):
+        begin = time.perf_counter()
+        result = run()
+        times.append(time.perf_counter() - begin)
+
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(times), peak, result
+
+
+def runCases(quick=False, repeat=3, selected=None, log=sys.stdout):
+    results = {}
+    for name, sizes, quick_sizes, setup in CASES:
+        if selected and not any(name.startswith(s) for s in selected):
+            continue
+        for size in (quick_sizes if quick else sizes):
+            run = setup(size)
+            seconds, peak, result = measure(run, repeat)
+            elements = countElements(result)
+            key = "%s[%s]" % (name, size)
+            results[key] = {
+                "case": name,
+                "size": size,
+                "seconds": seconds,
+                "peak_bytes": peak,
+                "elements": elements,
+                "elements_per_second": elements / seconds if seconds > 0 else 0.,
+            }
+            if log is not None:
+                log.write("%-40s %10.4f s %10.1f MB %14.0f elem/s\n" % (
+                    key, seconds, peak / 2 ** 20, results[key]["elements_per_second"]))
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    :return list: (key, seconds, baseline seconds) of the cases slower than <threshold> times their baseline
+    """
+    regressions = []
+    for key, res in results.items():
+        base = baseline.get(key)
+        if base is None or max(res["seconds"], base["seconds"]) < NOISE_FLOOR:
+            continue
+        if res["seconds"] > base["seconds"] * threshold:
+            regressions.append((key, res["seconds"], base["seconds"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--quick", action="store_true", help="only run the smaller sizes")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--case", action="append", help="only run the cases starting with this name")
+    parser.add_argument("--out", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="JSON file of a previous run to compare with")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="maximum allowed ratio between the current and the baseline time")
+    parser.add_argument("--precision", choices=("single", "double"), default="double",
+                        help="floating point precision of the generated vertices")
+    args = parser.parse_args(argv)
+
+    setPrecision(args.precision)
+    results = runCases(args.quick, args.repeat, args.case)
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "scipy": scipy.__version__,
+            "machine": platform.machine(),
+            "quick": args.quick,
+            "precision": args.precision,
+        },
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for key, seconds, base in regressions:
+            print("REGRESSION %s: %.4f s (baseline %.4f s, x%.2f)" % (key, seconds, base, seconds / base))
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""
+import time of the modules loaded when the add-on is registered, compared with the ones deferred to the first use of
+a topology
+
+usage:
+    python -m benchmarks.startup [--repeat 5]
+
+every import is timed in a fresh interpreter (best of <repeat> runs). Blender itself is not needed: the add-on modules
+import bpy, so only the bpy-free part of the import chain (core) is measured, plus SciPy that is now only imported by
+the first Delaunay triangulation.
+"""
+
+import argparse
+import subprocess
+import sys
+
+SCRIPT = """
+import sys, time
+begin = time.perf_counter()
+for name in sys.argv[1:]:
+    __import__(name)
+print(time.perf_counter() - begin)
+print(int("scipy" in sys.modules))
+"""
+
+CASES = [
+    # what registering the add-on imports outside of bpy
+    ("registration (core)", ["core"]),
+    # what the Delaunay based spheres import on first use
+    ("deferred (scipy.spatial)", ["scipy.spatial"]),
+    # what the add-on used to import at registration
+    ("eager (core + scipy.spatial)", ["core", "scipy.spatial"]),
+]
+
+
+def timeImport(modules, repeat):
+    """
+    :return (float, bool): best import time in a fresh interpreter and whether SciPy got imported
+    """
+    best = float("inf")
+    scipy_loaded = False
+    for i in range(repeat):
+        out = subprocess.run([sys.executable, "-c", SCRIPT] + modules, capture_output=True, text=True, check=True)
+        seconds, loaded = out.stdout.split()
+        best = min(best, float(seconds))
+        scipy_loaded = loaded == "1"
+    return best, scipy_loaded
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.startup", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    for name, modules in CASES:
+        seconds, scipy_loaded = timeImport(modules, args.repeat)
+        print("%-32s %8.1f ms   scipy loaded: %s" % (name, seconds * 1000, scipy_loaded))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
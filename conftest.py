@@ -0,0 +1 @@
+# makes the packages of the repository (core, funcs, ...) importable by the tests, which must not need Blender
@@ -0,0 +1,23 @@
+"""
+bpy-free core of the Sphere Topologies package
+
+All the geometry is generated with NumPy/SciPy and returned as (verts, faces) arrays (see core.arrays), so it can be
+used in plain Python processes. The Blender operators in Topologies/ and funcs/ are thin wrappers around this package.
+"""
+
+from core.arrays import normalizeArray, flattenFaces, unflattenFaces, faceCount, setPrecision, getPrecision, \
+    sphereNormals
+from core.delaunay import delaunay, stereographicProjection
+from core.generators import icosahedron, subdivide, icosphere, icosphereLods, stackLods, fibonacci, fibonacciPoints, \
+    randomSphere, randomPoints, spherifiedCube, radial
+from core.conversions import IncorrectTopology, truncate, voronoiDual
+from core.conway import conway
+from core.arrayMesh import ArrayMesh
+from core.adaptive import AdaptiveIcosphere, adaptiveIcosphere, angularCriterion, screenSpaceCriterion
+from core.reorder import reorderMesh, vertexOrder
+from core.displacement import fbm, sampleHeights, displace, displaceSphere
+from core.geodesics import SurfaceGraph
+from core.laplacian import LaplacianBuilder, getLaplacianBuilder, fanTriangulate
+from core.spatialIndex import CubeMapIndex, CellLocator
+from core.transfer import AttributeTransfer, getAttributeTransfer, transferAttributes
+from core.coloring import faceAdjacency, randomColoring, greedyColoring
@@ -0,0 +1,206 @@
+"""
+adaptive refinement of the Icosahedron: faces are subdivided only where a criterion holds (e.g. around a direction, or
+where they look too big from a camera), with conforming transitions between the levels
+
+The refinement is red-green: marked faces are split in 4 (red, like core.generators.subdivide), then every face next to
+a face refined more than one level deeper, or with more than one split neighbour, is split in 4 as well, and the faces
+with a single split neighbour are split in 2 (green) so that no vertex lies in the middle of an edge.
+Midpoints are stored in a table keyed by their edge, so they are shared by the faces on both sides and reused (with
+their index) by the following refinements, e.g. while the region of interest moves
+"""
+
+import math
+import numpy as np
+from core import profiling
+from core.arrays import normalizeArray
+from core.generators import icosahedron
+
+# edge keys are lower vertex * EDGE_KEY + higher vertex
+EDGE_KEY = 1 << 32
+
+
+def angularCriterion(direction, angle):
+    """
+    refine the faces touching the spherical cap of half-angle <angle> around <direction>
+
+    :param direction: (3,) vector
+    :param float angle: radians
+    :return function: criterion for AdaptiveIcosphere.refine
+    """
+    direction = np.asarray(direction, dtype=np.float64)
+    direction = direction / np.linalg.norm(direction)
+
+    def criterion(corners, level):
+        center = normalizeArray(corners.mean(axis=1), 1.)
+        # angular radius of the faces: angle between their center and their farthest corner
+        size = np.arccos(np.clip(np.einsum("ijk,ik->ij", normalizeArray(corners.reshape(-1, 3), 1.).reshape(
+            corners.shape), center).min(axis=1), -1, 1))
+        return np.arccos(np.clip(center @ direction, -1, 1)) <= angle + size
+
+    return criterion
+
+
+def screenSpaceCriterion(camera, max_pixels, focal_pixels):
+    """
+    refine the faces whose longest edge would be longer than <max_pixels> on screen
+
+    :param camera: (3,) position of the camera, in the space of the sphere
+    :param float max_pixels: maximum projected edge length
+    :param float focal_pixels: focal length of the camera, in pixels (image width / (2 * tan(horizontal fov / 2)))
+    :return function: criterion for AdaptiveIcosphere.refine
+    """
+    camera = np.asarray(camera, dtype=np.float64)
+
+    def criterion(corners, level):
+        edges = np.linalg.norm(corners - np.roll(corners, 1, axis=1), axis=2).max(axis=1)
+        distance = np.linalg.norm(corners.mean(axis=1) - camera, axis=1)
+        return edges * focal_pixels > max_pixels * np.maximum(distance, 1e-9)
+
+    return criterion
+
+
+class AdaptiveIcosphere:
+    """
+    Icosahedron refined where a criterion holds. All the vertices created by the refinements are kept, so refining again
+    (with the same or another criterion) reuses them
+
+    :param float radius:
+    :param int max_level: maximum number of subdivisions of the faces of the base icosahedron
+    """
+
+    def __init__(self, radius=1., max_level=8):
+        self.radius = radius
+        self.max_level = max_level
+        self.verts, self.base = icosahedron(radius)
+        # sorted edge keys and the vertex created in the middle of each edge
+        self.edge_keys = np.zeros(0, dtype=np.int64)
+        self.edge_midpoints = np.zeros(0, dtype=np.int32)
+        # faces and levels of the latest refinement
+        self.faces = self.base
+        self.levels = np.zeros(len(self.base), dtype=np.int32)
+
+    def refine(self, criterion):
+        """
+        refine the base icosahedron
+
+        :param function criterion: (corners, level) -> mask, with corners the (T, 3, 3) vertices of the faces of level
+            <level> that could be split, see angularCriterion and screenSpaceCriterion
+        :return (np.ndarray, np.ndarray): vertices (only the used ones) and (F, 3) faces
+        """
+        with profiling.stage("adaptiveIcosphere", max_level=self.max_level) as s:
+            faces = self.base
+            levels = np.zeros(len(faces), dtype=np.int32)
+            for level in range(self.max_level):
+                candidates = np.flatnonzero(levels == level)
+                if len(candidates) == 0:
+                    break
+                marked = candidates[criterion(self.verts[faces[candidates]], level)]
+                faces, levels = self.split(faces, levels, marked)
+
+            # close the transitions: refine until every face has at most one split neighbour, at most one level deeper
+            while True:
+                hanging, deep = self.hangingMidpoints(faces)
+                marked = np.flatnonzero(((hanging >= 0).sum(axis=1) > 1) | deep)
+                if len(marked) == 0:
+                    break
+                faces, levels = self.split(faces, levels, marked)
+
+            # green split of the faces with a split neighbour
+            green = np.flatnonzero((hanging >= 0).any(axis=1))
+            side = np.argmax(hanging[green] >= 0, axis=1)
+            corner = faces[green][np.arange(len(green))[:, None], (side[:, None] + np.arange(3)) % 3]
+            midpoint = hanging[green, side]
+            halves = np.stack([
+                np.stack([corner[:, 0], midpoint, corner[:, 2]], axis=1),
+                np.stack([midpoint, corner[:, 1], corner[:, 2]], axis=1),
+            ], axis=1).reshape(-1, 3)
+            keep = np.ones(len(faces), dtype=bool)
+            keep[green] = False
+            self.faces = np.concatenate([faces[keep], halves]).astype(np.int32)
+            self.levels = np.concatenate([levels[keep], np.repeat(levels[green], 2)])
+            s.count(faces=len(self.faces), green=len(green), pool=len(self.verts))
+
+        used, faces = np.unique(self.faces, return_inverse=True)
+        return self.verts[used], faces.reshape(-1, 3).astype(np.int32)
+
+    def split(self, faces, levels, marked):
+        """
+        red split of the faces <marked>: 4 faces each, the children replace their parent at the end of the arrays
+        """
+        v = faces[marked]
+        m = self.midpoints(v, np.roll(v, -1, axis=1))
+        children = np.stack([
+            np.stack([v[:, 0], m[:, 0], m[:, 2]], axis=1),
+            np.stack([v[:, 1], m[:, 1], m[:, 0]], axis=1),
+            np.stack([v[:, 2], m[:, 2], m[:, 1]], axis=1),
+            m,
+        ], axis=1).reshape(-1, 3)
+        keep = np.ones(len(faces), dtype=bool)
+        keep[marked] = False
+        return (np.concatenate([faces[keep], children]),
+                np.concatenate([levels[keep], np.repeat(levels[marked] + 1, 4)]))
+
+    def midpoints(self, a, b):
+        """
+        midpoint vertex of each edge (a, b), created if it doesn't exist yet
+
+        :return np.ndarray: vertex ids, same shape as <a>
+        """
+        keys, inverse = np.unique(edgeKeys(a, b), return_inverse=True)
+        ids = self.lookup(keys)
+        new = ids < 0
+        if new.any():
+            lo, hi = np.divmod(keys[new], EDGE_KEY)
+            ids[new] = len(self.verts) + np.arange(new.sum())
+            self.verts = np.concatenate([self.verts, normalizeArray(self.verts[lo] + self.verts[hi], self.radius)])
+            keys = np.concatenate([self.edge_keys, keys[new]])
+            order = np.argsort(keys)
+            self.edge_keys = keys[order]
+            self.edge_midpoints = np.concatenate([self.edge_midpoints, ids[new].astype(np.int32)])[order]
+        return ids[inverse].reshape(np.shape(a)).astype(np.int32)
+
+    def lookup(self, keys):
+        """
+        :return np.ndarray: midpoint vertex of each edge key, -1 if the edge was never split
+        """
+        position = np.searchsorted(self.edge_keys, keys)
+        position = np.minimum(position, max(len(self.edge_keys) - 1, 0))
+        found = np.zeros(len(keys), dtype=bool) if len(self.edge_keys) == 0 else self.edge_keys[position] == keys
+        return np.where(found, self.edge_midpoints[position] if len(self.edge_keys) else -1, -1).astype(np.int64)
+
+    def hangingMidpoints(self, faces):
+        """
+        :return (np.ndarray, np.ndarray): (F, 3) vertex in the middle of each edge (edge j from corner j to corner j + 1)
+            used by a neighbour face, else -1, and True for the faces with a neighbour two or more levels deeper
+        """
+        used = np.zeros(len(self.verts), dtype=bool)
+        used[faces] = True
+        a = faces
+        b = np.roll(faces, -1, axis=1)
+        hanging = self.lookup(edgeKeys(a, b).ravel()).reshape(faces.shape)
+        hanging[hanging >= 0] = np.where(used[hanging[hanging >= 0]], hanging[hanging >= 0], -1)
+
+        # the halves of a split edge are split as well
+        split = hanging >= 0
+        deep = np.zeros(len(faces), dtype=bool)
+        for end in (a, b):
+            quarter = self.lookup(edgeKeys(end[split], hanging[split]))
+            deep_edge = np.zeros(faces.shape, dtype=bool)
+            deep_edge[split] = (quarter >= 0) & used[np.maximum(quarter, 0)]
+            deep |= deep_edge.any(axis=1)
+        return hanging, deep
+
+
+def edgeKeys(a, b):
+    a = np.asarray(a, dtype=np.int64)
+    b = np.asarray(b, dtype=np.int64)
+    return np.minimum(a, b) * EDGE_KEY + np.maximum(a, b)
+
+
+def adaptiveIcosphere(criterion, max_level, radius=1.):
+    """
+    Icosahedron subdivided up to <max_level> times where <criterion> holds, see AdaptiveIcosphere
+
+    :return (np.ndarray, np.ndarray):
+    """
+    return AdaptiveIcosphere(radius, max_level).refine(criterion)
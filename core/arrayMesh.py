@@ -0,0 +1,177 @@
+"""
+array-backed half-edge mesh
+
+Every face corner is a half-edge going from its vertex to the next vertex of the face, so the half-edges are numbered like
+the loops of core.arrays.flattenFaces (and of Blender meshes). Everything is stored in flat int32 arrays: the
+connectivity algorithms (truncation, Voronoi regions, subdivision, face adjacency) work on them with NumPy instead of
+walking Python objects
+"""
+
+import numpy as np
+from core import profiling
+from core.arrays import flattenFaces, unflattenFaces
+from core.meshTransfer import readMeshArrays, writeMeshArrays
+
+
+class ArrayMesh:
+    """
+    half-edge connectivity of a polygon mesh, given in the flat loop layout
+
+    :param np.ndarray verts: (N, 3) vertices, can be None when only the connectivity is needed
+    :param np.ndarray loops: vertex index of each loop
+    :param np.ndarray totals: number of loops of each face
+    """
+
+    __slots__ = ("verts", "n_verts", "face_starts", "vertex", "face", "next", "prev", "twin", "edge", "n_edges",
+                 "vertex_starts", "vertex_faces")
+
+    def __init__(self, verts, loops, totals):
+        self.verts = verts
+        self.vertex = np.asarray(loops, dtype=np.int32)
+        totals = np.asarray(totals, dtype=np.int32)
+        self.n_verts = len(verts) if verts is not None else int(self.vertex.max(initial=-1)) + 1
+        n = len(self.vertex)
+
+        with profiling.stage("arrayMesh.build", faces=len(totals), loops=n) as s:
+            # face -> vertex table: the vertices of face f are vertex[face_starts[f]:face_starts[f + 1]]
+            self.face_starts = np.zeros(len(totals) + 1, dtype=np.int32)
+            np.cumsum(totals, out=self.face_starts[1:])
+            # next and previous half-edge in the same face
+            h = np.arange(n, dtype=np.int32)
+            if len(totals) and (totals == totals[0]).all():
+                # all the faces have the same number of sides: the half-edges are a (F, k) grid
+                grid = h.reshape(-1, totals[0])
+                self.face = np.repeat(np.arange(len(totals), dtype=np.int32), totals[0])
+                self.next = np.roll(grid, -1, axis=1).ravel()
+                self.prev = np.roll(grid, 1, axis=1).ravel()
+            else:
+                self.face = np.repeat(np.arange(len(totals), dtype=np.int32), totals)
+                first = self.face_starts[:-1][self.face]
+                last = self.face_starts[1:][self.face] - 1
+                self.next = np.where(h == last, first, h + 1)
+                self.prev = np.where(h == first, last, h - 1)
+
+            # half-edges on the same edge are consecutive once sorted by their (unordered) vertices
+            a = self.vertex.astype(np.int64)
+            b = a[self.next]
+            keys = np.minimum(a, b) * self.n_verts + np.maximum(a, b)
+            order = np.argsort(keys)
+            keys = keys[order]
+            new_edge = np.ones(n, dtype=bool)
+            new_edge[1:] = keys[1:] != keys[:-1]
+            self.edge = np.empty(n, dtype=np.int32)
+            self.edge[order] = np.cumsum(new_edge) - 1
+            self.n_edges = int(new_edge.sum())
+
+            # twins: the first two half-edges of each edge (border edges have none, non-manifold ones keep one pair)
+            second = np.flatnonzero(~new_edge[1:] & new_edge[:-1]) + 1
+            self.twin = np.full(n, -1, dtype=np.int32)
+            self.twin[order[second - 1]] = order[second]
+            self.twin[order[second]] = order[second - 1]
+            s.count(edges=self.n_edges)
+
+        self.vertex_starts = None
+        self.vertex_faces = None
+
+    @classmethod
+    def fromArrays(cls, verts, faces):
+        """
+        :param np.ndarray verts: (N, 3) vertices
+        :param faces: (F, k) array or list of (F, k) arrays (see core.arrays)
+        """
+        return cls(verts, *flattenFaces(faces))
+
+    @classmethod
+    def fromMesh(cls, mesh):
+        """
+        :param Mesh mesh: Blender mesh, read with bulk transfers
+        """
+        return cls(*readMeshArrays(mesh))
+
+    def toArrays(self):
+        """
+        :return (np.ndarray, faces): vertices and faces (grouped by number of sides if they have different ones)
+        """
+        return self.verts, unflattenFaces(self.vertex, self.totals)
+
+    def toMesh(self, mesh):
+        """
+        replace the geometry of the Blender mesh <mesh> with bulk transfers
+        """
+        writeMeshArrays(mesh, *self.toArrays())
+
+    @property
+    def totals(self):
+        return np.diff(self.face_starts)
+
+    @property
+    def n_faces(self):
+        return len(self.face_starts) - 1
+
+    def endVertex(self):
+        """
+        :return np.ndarray: vertex each half-edge points to
+        """
+        return self.vertex[self.next]
+
+    def edgeVertices(self):
+        """
+        :return (np.ndarray, np.ndarray): lower and higher vertex index of each edge
+        """
+        representative = np.empty(self.n_edges, dtype=np.int32)
+        representative[self.edge] = np.arange(len(self.edge), dtype=np.int32)
+        a = self.vertex[representative]
+        b = self.vertex[self.next[representative]]
+        return np.minimum(a, b), np.maximum(a, b)
+
+    def vertexAdjacency(self):
+        """
+        vertices sharing an edge with each vertex, as a CSR table: the neighbours of vertex v are
+        neighbors[starts[v]:starts[v + 1]]
+
+        :return (np.ndarray, np.ndarray, np.ndarray): (N + 1) starts, neighbours and the edge joining each vertex to
+            each neighbour
+        """
+        a, b = self.edgeVertices()
+        edges = np.arange(self.n_edges, dtype=np.int32)
+        src = np.concatenate([a, b])
+        order = np.argsort(src, kind="stable")
+        starts = np.zeros(self.n_verts + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=self.n_verts), out=starts[1:])
+        return starts, np.concatenate([b, a])[order], np.concatenate([edges, edges])[order]
+
+    def vertexSuccessor(self):
+        """
+        next half-edge leaving the same vertex, turning around it in the opposite direction of the faces (clockwise seen
+        from outside for counterclockwise faces)
+
+        :return np.ndarray: half-edge after each half-edge around its vertex, -1 on the border
+        """
+        return self.twin[self.prev]
+
+    def vertexFaceTable(self):
+        """
+        vertex -> face table (built on first use): the faces around vertex v are vertex_faces[vertex_starts[v]:vertex_starts[v + 1]]
+
+        :return (np.ndarray, np.ndarray): (N + 1) starts and faces, in no particular order around each vertex
+        """
+        if self.vertex_starts is None:
+            self.vertex_starts = np.zeros(self.n_verts + 1, dtype=np.int32)
+            np.cumsum(np.bincount(self.vertex, minlength=self.n_verts), out=self.vertex_starts[1:])
+            self.vertex_faces = self.face[np.argsort(self.vertex, kind="stable")]
+        return self.vertex_starts, self.vertex_faces
+
+    def faceAdjacency(self):
+        """
+        faces sharing an edge with each face, as a CSR table: the neighbours of face f are neighbors[starts[f]:starts[f + 1]]
+
+        :return (np.ndarray, np.ndarray): (F + 1) starts and neighbours, in the order of the edges of each face
+        """
+        # half-edges are grouped by face, so the neighbours come out already sorted by face
+        shared = np.flatnonzero(self.twin >= 0)
+        src = self.face[shared]
+        dst = self.face[self.twin[shared]]
+        keep = src != dst
+        starts = np.zeros(self.n_faces + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src[keep], minlength=self.n_faces), out=starts[1:])
+        return starts, dst[keep].astype(np.int64)
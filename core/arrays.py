@@ -0,0 +1,122 @@
+"""
+helpers for the array representation of meshes used by the core package
+
+A mesh is a (verts, faces) tuple: verts is a (N, 3) float array, faces is either a (F, k) int array or, when the mesh
+has faces with different number of sides, a list of such arrays (one block for each number of sides).
+"""
+
+import numpy as np
+
+# dtype of the coordinates computed by the core package, see setPrecision
+float_type = np.float64
+
+
+def setPrecision(precision):
+    """
+    choose the dtype of the generated coordinates. In "single" precision the coordinates and the intermediate buffers
+    are float32 (half the memory, and no conversion when they are written into Blender meshes), while the accumulations
+    that need it (norms, circumcenters, Delaunay triangulation) are still computed in float64
+
+    :param str precision: "double" (default) or "single"
+    """
+    global float_type
+    float_type = {"double": np.float64, "single": np.float32}[precision]
+
+
+def getPrecision():
+    return "single" if float_type is np.float32 else "double"
+
+
+def asCoordinates(co):
+    """
+    :return np.ndarray: <co> as an array of the current coordinate dtype (not copied if it already is)
+    """
+    return np.asarray(co, dtype=float_type)
+
+
+def normalizeArray(co, radius):
+    """
+    place every row of the (N, 3) array <co> at distance <radius> from the origin
+
+    :param co:
+    :param float radius:
+    :return np.ndarray:
+    """
+    co = np.asarray(co)
+    if co.dtype not in (np.float32, np.float64):
+        co = asCoordinates(co)
+    # the norms are accumulated in float64 also in single precision
+    norms = np.sqrt(np.einsum("ij,ij->i", co, co, dtype=np.float64))
+    return co * (radius / norms).astype(co.dtype)[:, None]
+
+
+def sphereNormals(co):
+    """
+    analytic vertex normals of a sphere centered at the origin: the normalised positions, without looking at the faces
+
+    :param np.ndarray co: (N, 3) vertices
+    :return (np.ndarray, np.ndarray): (N, 3) unit normals and the (N,) distance of each vertex from the origin
+    """
+    co = np.asarray(co)
+    if co.dtype not in (np.float32, np.float64):
+        co = asCoordinates(co)
+    norms = np.sqrt(np.einsum("ij,ij->i", co, co, dtype=np.float64))
+    return co / norms.astype(co.dtype)[:, None], norms
+
+
+def faceBlocks(faces):
+    """
+    return <faces> as a list of (F, k) int arrays
+
+    :param faces: (F, k) array or list of (F, k) arrays
+    :return list:
+    """
+    blocks = [faces] if isinstance(faces, np.ndarray) else faces
+    return [np.asarray(b, dtype=np.int32) for b in blocks if len(b)]
+
+
+def flattenFaces(faces):
+    """
+    flatten faces into the loop layout used by Blender meshes
+
+    :param faces: (F, k) array or list of (F, k) arrays
+    :return (np.ndarray, np.ndarray): vertex index of each loop, number of loops of each face
+    """
+    blocks = faceBlocks(faces)
+    if not blocks:
+        return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32)
+    loops = np.concatenate([b.ravel() for b in blocks])
+    totals = np.concatenate([np.full(len(b), b.shape[1], dtype=np.int32) for b in blocks])
+    return loops, totals
+
+
+def unflattenFaces(loops, totals):
+    """
+    inverse of flattenFaces. Faces are grouped by number of sides, so their order is kept only if they all have the
+    same number of sides
+
+    :param np.ndarray loops: vertex index of each loop
+    :param np.ndarray totals: number of loops of each face
+    :return: (F, k) array or list of (F, k) arrays
+    """
+    loops = np.asarray(loops, dtype=np.int32)
+    totals = np.asarray(totals)
+    sizes = np.unique(totals)
+    if len(sizes) == 1:
+        return loops.reshape(-1, sizes[0])
+    starts = np.zeros(len(totals), dtype=np.int64)
+    np.cumsum(totals[:-1], out=starts[1:])
+    return [loops[starts[totals == k][:, None] + np.arange(k)] for k in sizes]
+
+
+def faceOrder(totals):
+    """
+    :param np.ndarray totals: number of loops of each face
+    :return np.ndarray: index in the flat loop layout of each face of unflattenFaces(loops, totals), where the faces are
+        grouped by number of sides
+    """
+    return np.argsort(np.asarray(totals), kind="stable")
+
+
+def faceCount(faces):
+    return sum(len(b) for b in faceBlocks(faces))
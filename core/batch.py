@@ -0,0 +1,215 @@
+"""
+headless batch generation of sphere variants
+
+usage:
+    python -m core.batch <topology> --param name=values [--param ...] --out <dir> [--format ply|obj|npz] [--workers N]
+        [--precision single|double] [--reorder hilbert|morton] [--seed N]
+
+every --param takes a comma separated list of values (e.g. radius=1,2.5) or an inclusive integer range (e.g. level=1:6),
+a mesh is generated for each combination of the values. The random topologies draw a different seed for each mesh
+(spawned from --seed, or from fresh entropy) unless a seed parameter is given. Example:
+    python -m core.batch icosahedron --param level=1:6 --param radius=1,2 --out spheres --workers 4
+"""
+
+import argparse
+import inspect
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from core.arrays import faceCount, setPrecision, getPrecision
+from core.conversions import truncate, voronoiDual
+from core.exporters import WRITERS
+from core.generators import icosphere, fibonacci, randomSphere, spherifiedCube, radial
+from core.reorder import CURVES, reorderMesh
+
+
+def icosahedronTopology(level=2, radius=1.):
+    return icosphere(level, radius)
+
+
+def fibonacciTopology(n=500, radius=1., transform=1., t2=1.):
+    return fibonacci(n, radius, transform, t2)
+
+
+def randomTopology(n=500, radius=1., transform=1., t2=1., seed=None):
+    return randomSphere(n, radius, transform, t2, seed)
+
+
+def spherifiedCubeTopology(res=4, t=1., radius=1.):
+    return spherifiedCube(res, t, radius)
+
+
+def radialTopology(p=8, m=16, t=1., radius=1.):
+    return radial(p, m, t, radius)
+
+
+def truncatedTopology(level=1, radius=1.):
+    return truncate(*icosphere(level, radius))
+
+
+def voronoiTopology(n=500, radius=1., base="fibonacci", level=2, seed=None):
+    """
+    Voronoi regions of a Fibonacci (<n> vertices), Random (<n> vertices) or Icosahedron (<level> subdivisions) sphere
+    """
+    if base == "icosahedron":
+        return voronoiDual(*icosphere(level, radius))
+    if base == "random":
+        return voronoiDual(*randomSphere(n, radius, seed=seed))
+    return voronoiDual(*fibonacci(n, radius))
+
+
+TOPOLOGIES = {
+    "icosahedron": icosahedronTopology,
+    "fibonacci": fibonacciTopology,
+    "random": randomTopology,
+    "spherified_cube": spherifiedCubeTopology,
+    "radial": radialTopology,
+    "truncated": truncatedTopology,
+    "voronoi": voronoiTopology,
+}
+
+
+def getParameters(topology):
+    """
+    :return list: names of the parameters of the topology
+    """
+    return list(inspect.signature(TOPOLOGIES[topology]).parameters)
+
+
+def parseValue(value):
+    for cast in (int, float):
+        try:
+            return cast(value)
+        except ValueError:
+            pass
+    return value
+
+
+def parseParam(text):
+    """
+    parse a "name=values" grid parameter
+
+    :param str text:
+    :return (str, list):
+    """
+    name, sep, values = text.partition("=")
+    if not sep or not name:
+        raise argparse.ArgumentTypeError("parameters must be given as name=values, got %r" % text)
+    if ":" in values:
+        start, stop = values.split(":")
+        return name, list(range(int(start), int(stop) + 1))
+    return name, [parseValue(v) for v in values.split(",")]
+
+
+def expandGrid(params):
+    """
+    :param list params: list of (name, values)
+    :return list: one dict for each combination of the values
+    """
+    names = [name for name, values in params]
+    return [dict(zip(names, combination)) for combination in itertools.product(*[values for name, values in params])]
+
+
+def getFileName(topology, params, fmt):
+    parts = [topology] + ["%s-%s" % (name, value) for name, value in params.items()]
+    return "_".join(parts) + "." + fmt
+
+
+def generate(job):
+    """
+    generate one mesh and write it to disk (runs in the worker processes)
+
+    :param (str, dict, str, str, str, np.random.SeedSequence) job: topology, parameters, output directory, format,
+        space-filling curve of the vertex order (None to keep the order of the generator) and seed of the random
+        topologies when the parameters don't give one
+    :return (str, int, int, int): path, file size, number of vertices and number of faces
+    """
+    topology, params, out, fmt, curve, seed = job
+    kwargs = dict(params)
+    # without a seed the generators use the global NumPy state, which is the same in all the forked workers
+    if "seed" in getParameters(topology) and kwargs.get("seed") is None:
+        kwargs["seed"] = seed
+    verts, faces = TOPOLOGIES[topology](**kwargs)
+    if curve is not None:
+        verts, faces = reorderMesh(verts, faces, curve)[:2]
+    path = os.path.join(out, getFileName(topology, params, fmt))
+    WRITERS[fmt](path, verts, faces)
+    return path, os.path.getsize(path), len(verts), faceCount(faces)
+
+
+def run(topology, grid, out, fmt="ply", workers=None, precision=None, reorder=None, seed=None):
+    """
+    generate all the meshes of the parameter grid
+
+    :param str topology: key of TOPOLOGIES
+    :param list grid: list of parameter dicts
+    :param str out: output directory
+    :param str fmt: key of WRITERS
+    :param int workers: number of worker processes (1 to generate in the current process)
+    :param str precision: "single" or "double" (see core.arrays.setPrecision), by default the current one
+    :param str reorder: sort the vertices and faces along this curve of core.reorder.CURVES, for locality
+    :param int seed: base seed of the random topologies, each mesh gets its own seed spawned from it (None for fresh
+        entropy, reported in the statistics)
+    :return dict: statistics of the run
+    """
+    precision = precision or getPrecision()
+    setPrecision(precision)
+    os.makedirs(out, exist_ok=True)
+    base = np.random.SeedSequence(seed)
+    jobs = [(topology, params, out, fmt, reorder, s) for params, s in zip(grid, base.spawn(len(grid)))]
+
+    begin = time.perf_counter()
+    if workers == 1:
+        results = [generate(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=setPrecision, initargs=(precision,)) as executor:
+            results = list(executor.map(generate, jobs))
+    elapsed = time.perf_counter() - begin
+
+    total_bytes = sum(r[1] for r in results)
+    return {
+        "meshes": len(results),
+        "vertices": sum(r[2] for r in results),
+        "faces": sum(r[3] for r in results),
+        "bytes": total_bytes,
+        "seconds": elapsed,
+        "meshes_per_second": len(results) / elapsed if elapsed > 0 else float("inf"),
+        "mb_per_second": total_bytes / 2 ** 20 / elapsed if elapsed > 0 else float("inf"),
+        "seed": base.entropy,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m core.batch", description="generate sphere variants headlessly")
+    parser.add_argument("topology", choices=sorted(TOPOLOGIES))
+    parser.add_argument("--param", action="append", type=parseParam, default=[],
+                        help="grid parameter, as name=v1,v2,... or name=start:stop (inclusive integer range)")
+    parser.add_argument("--out", required=True, help="output directory")
+    parser.add_argument("--format", choices=sorted(WRITERS), default="ply")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of worker processes")
+    parser.add_argument("--precision", choices=("single", "double"), default="double",
+                        help="floating point precision of the vertices")
+    parser.add_argument("--reorder", choices=sorted(CURVES), default=None,
+                        help="sort vertices and faces along a space-filling curve")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="base seed of the random topologies (one seed is spawned from it for each mesh)")
+    args = parser.parse_args(argv)
+
+    known = getParameters(args.topology)
+    for name, values in args.param:
+        if name not in known:
+            parser.error("unknown parameter %r for %s, expected one of: %s" % (name, args.topology, ", ".join(known)))
+
+    stats = run(args.topology, expandGrid(args.param), args.out, args.format, args.workers, args.precision,
+                args.reorder, args.seed)
+    print("%d meshes (%d vertices, %d faces) in %.2f s: %.1f meshes/s, %.1f MB/s (seed %d)" % (
+        stats["meshes"], stats["vertices"], stats["faces"], stats["seconds"],
+        stats["meshes_per_second"], stats["mb_per_second"], stats["seed"]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
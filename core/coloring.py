@@ -0,0 +1,84 @@
+"""
+face colouring: random material indices and greedy colouring of the face adjacency graph, so that no two faces
+sharing an edge get the same color
+
+The faces are given in the flat loop layout (see core.arrays.flattenFaces), like they are read from a Blender mesh
+"""
+
+import numpy as np
+from core import profiling
+from core.arrayMesh import ArrayMesh
+
+# colors are tracked in an int64 bitmask
+MAX_COLORS = 62
+
+
+def faceAdjacency(loops, totals):
+    """
+    faces sharing an edge with each face, as a CSR table: the neighbours of face f are neighbors[starts[f]:starts[f + 1]]
+
+    :param np.ndarray loops: vertex index of each loop
+    :param np.ndarray totals: number of loops of each face
+    :return (np.ndarray, np.ndarray): (F + 1) starts and neighbours
+    """
+    with profiling.stage("faceAdjacency", faces=len(totals), loops=len(loops)):
+        return ArrayMesh(None, loops, totals).faceAdjacency()
+
+
+def randomColoring(n_faces, n_colors, seed=None):
+    """
+    :return np.ndarray: (n_faces,) random colors in [0, n_colors)
+    """
+    return np.random.default_rng(seed).integers(0, n_colors, n_faces)
+
+
+def greedyColoring(starts, neighbors, seed=None):
+    """
+    greedy colouring of a graph: faces are colored in a random order with the smallest color not used by their
+    neighbours. All the faces whose neighbours that come before them in the order are already colored get their color
+    at once (Jones-Plassmann), so the number of vectorised rounds stays small
+
+    :param np.ndarray starts: see faceAdjacency
+    :param np.ndarray neighbors: see faceAdjacency
+    :param seed: seed of the random order
+    :return np.ndarray: (F,) colors, at most (maximum number of neighbours + 1) different ones
+    """
+    rng = np.random.default_rng(seed)
+    n = len(starts) - 1
+    priority = rng.permutation(n)
+    color = np.full(n, -1, dtype=np.int64)
+
+    # a face only depends on the neighbours that come before it: when it gets colored, those are all colored and the
+    # others are not, so they are the only ones whose colors must be avoided
+    src = np.repeat(np.arange(n), np.diff(starts))
+    dst = np.asarray(neighbors, dtype=np.int64)
+    before = priority[dst] < priority[src]
+    src = src[before]
+    dst = dst[before]
+
+    with profiling.stage("greedyColoring", faces=n) as s:
+        rounds = 0
+        uncolored = np.ones(n, dtype=bool)
+        while len(src) or uncolored.any():
+            rounds += 1
+            waiting = np.bincount(src[color[dst] < 0], minlength=n)
+            ready = uncolored & (waiting == 0)
+
+            # colors of the neighbours of the ready faces as bitmasks (src is sorted, so reduceat works by face)
+            edges = ready[src]
+            face = src[edges]
+            used = np.zeros(n, dtype=np.int64)
+            if len(face):
+                first = np.flatnonzero(np.concatenate([[True], face[1:] != face[:-1]]))
+                used[face[first]] = np.bitwise_or.reduceat(np.left_shift(1, np.minimum(color[dst[edges]], MAX_COLORS)),
+                                                           first)
+            free = ~used[ready]
+            # lowest free color = index of the lowest set bit of <free>
+            color[ready] = np.log2((free & -free).astype(np.float64)).astype(np.int64)
+            uncolored &= ~ready
+
+            keep = ~edges
+            src = src[keep]
+            dst = dst[keep]
+        s.count(rounds=rounds)
+    return color
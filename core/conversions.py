@@ -0,0 +1,146 @@
+"""
+conversions between topologies: truncation (Goldberg polyhedra) and Voronoi regions (dual mesh)
+
+Both work on meshes with consistently oriented faces (counterclockwise seen from outside)
+"""
+
+import numpy as np
+from core import profiling
+from core.arrays import asCoordinates
+from core.arrayMesh import ArrayMesh
+
+
+class IncorrectTopology(Exception):
+    pass
+
+
+def walkRings(owner, element, successor, n):
+    """
+    order the elements around each vertex following a successor permutation. If an element has no successor
+    (successor = -1, e.g. on the border of an open mesh) the ring of its vertex starts from the element without predecessor
+    and stops there
+
+    :param np.ndarray owner: vertex owning each element (one entry per element)
+    :param np.ndarray element: element ids, aligned with <owner>
+    :param np.ndarray successor: successor[element] is the next element around the same vertex, or -1
+    :param int n: number of vertices
+    :return (np.ndarray, np.ndarray): (n, max valence) rings (padded with -1) and the length of each ring
+    """
+    valences = np.bincount(owner, minlength=n)
+    first = np.full(n, -1, dtype=np.int64)
+    first[owner[::-1]] = element[::-1]
+
+    has_predecessor = np.zeros(len(successor), dtype=bool)
+    has_predecessor[successor[successor >= 0]] = True
+    open_start = ~has_predecessor[element]
+    first[owner[open_start]] = element[open_start]
+
+    rings = np.full((n, valences.max(initial=0)), -1, dtype=np.int64)
+    lengths = np.zeros(n, dtype=np.int64)
+    current = first.copy()
+    for k in range(rings.shape[1]):
+        active = (valences > k) & (current >= 0)
+        if not active.any():
+            break
+        rings[active, k] = current[active]
+        lengths[active] += 1
+        current[active] = successor[current[active]]
+    return rings, lengths
+
+
+def ringsToFaces(rings, lengths, min_sides=3):
+    """
+    group the rings by length into face blocks
+
+    :param np.ndarray rings:
+    :param np.ndarray lengths:
+    :param int min_sides: shorter rings are dropped
+    :return list: list of (F, k) arrays
+    """
+    return [rings[lengths == k, :k].astype(np.int32) for k in np.unique(lengths) if k >= min_sides]
+
+
+def truncate(verts, faces):
+    """
+    cut every vertex of a closed triangle mesh: each edge is split in 3, each vertex becomes a face with as many sides as
+    its valence and each triangle becomes a hexagon
+
+    :param np.ndarray verts: (N, 3) vertices
+    :param np.ndarray faces: (F, 3) triangles
+    :return (np.ndarray, list): new vertices, new faces (one for each old vertex grouped by valence, then the hexagons)
+    """
+    verts = asCoordinates(verts)
+    faces = np.asarray(faces, dtype=np.int64)
+    if faces.ndim != 2 or faces.shape[1] != 3:
+        raise IncorrectTopology("The mesh must only contain triangles")
+    with profiling.stage("truncate", verts=len(verts), faces=len(faces)):
+        mesh = ArrayMesh.fromArrays(verts, faces)
+        start = mesh.vertex
+        end = mesh.endVertex()
+        a, b = mesh.edgeVertices()
+
+        # two new vertices for each edge: 2e is the one near a, 2e + 1 the one near b
+        new_verts = np.empty((2 * mesh.n_edges, 3), dtype=verts.dtype)
+        new_verts[0::2] = (2 * verts[a] + verts[b]) / 3
+        new_verts[1::2] = (verts[a] + 2 * verts[b]) / 3
+        edge = mesh.edge.astype(np.int64)
+        near_start = 2 * edge + (start != a[edge])
+        near_end = 2 * edge + (end != a[edge])
+
+        # hexagons: the 2 new vertices of each edge, following the face orientation
+        hexagons = np.stack([near_start, near_end], axis=1).reshape(-1, 6).astype(np.int32)
+
+        # around each old vertex, the new vertex on the outgoing half-edge of a corner is followed by
+        # the one on the incoming half-edge of the same corner
+        successor = np.full(len(new_verts), -1, dtype=np.int64)
+        successor[near_start] = near_end[mesh.prev]
+        rings, lengths = walkRings(start, near_start, successor, len(verts))
+
+        return new_verts, ringsToFaces(rings, lengths) + [hexagons]
+
+
+def circumcenters(verts, faces):
+    """
+    circumcenters of all the triangles, computed in float64 (the formula is ill-conditioned for thin triangles)
+
+    :param np.ndarray verts: (N, 3) vertices
+    :param np.ndarray faces: (F, 3) triangles
+    :return np.ndarray: (F, 3) circumcenters, in the dtype of <verts>
+    """
+    a = verts[faces[:, 0]].astype(np.float64)
+    b = verts[faces[:, 1]].astype(np.float64)
+    c = verts[faces[:, 2]].astype(np.float64)
+    ac = c - a
+    ab = b - a
+    abXac = np.cross(ab, ac)
+
+    ab2 = np.einsum("ij,ij->i", ab, ab)[:, None]
+    ac2 = np.einsum("ij,ij->i", ac, ac)[:, None]
+    den = 2 * np.einsum("ij,ij->i", abXac, abXac)[:, None]
+    return (a + (np.cross(abXac, ab) * ac2 + np.cross(ac, abXac) * ab2) / den).astype(verts.dtype, copy=False)
+
+
+def voronoiDual(verts, faces):
+    """
+    Voronoi regions of a triangle mesh: one vertex at the circumcenter of each triangle, one face for each vertex
+    (with at least 3 adjacent triangles) connecting the circumcenters of the adjacent triangles.
+    ATTENTION: to be compatible with non-spheres as well, it doesn't renormalize the new vertices, so the final mesh
+    will be a bit smaller
+
+    :param np.ndarray verts: (N, 3) vertices
+    :param np.ndarray faces: (F, 3) triangles
+    :return (np.ndarray, list): (F, 3) vertices and the Voronoi regions grouped by number of sides
+    """
+    verts = asCoordinates(verts)
+    faces = np.asarray(faces, dtype=np.int64)
+    if faces.ndim != 2 or faces.shape[1] != 3:
+        raise IncorrectTopology("The mesh must only contain triangles")
+    with profiling.stage("voronoiDual", verts=len(verts), faces=len(faces)):
+        # around each vertex v, the corner (f, v) is followed by the corner of the face sharing the edge from v to
+        # the previous vertex of f, i.e. the twin of the previous half-edge
+        mesh = ArrayMesh.fromArrays(verts, faces)
+        corners = np.arange(len(mesh.vertex))
+        rings, lengths = walkRings(mesh.vertex, corners, mesh.vertexSuccessor().astype(np.int64), len(verts))
+        rings = np.where(rings >= 0, mesh.face[rings], -1)
+
+        return circumcenters(verts, faces), ringsToFaces(rings, lengths)
@@ -0,0 +1,204 @@
+"""
+Conway polyhedron operators on closed polygon meshes: dual (d), truncate (t), kis (k), ambo (a) and chamfer (c), and
+their compositions written in Conway notation (e.g. "tk" is truncate applied to kis)
+
+Every operator takes an ArrayMesh and returns the new mesh in the flat loop layout, so compositions never leave the index
+arrays: faces are ordered by walking the half-edges around the vertices (see core.conversions.walkRings) and keep the
+orientation of the input (counterclockwise seen from outside)
+"""
+
+import numpy as np
+from core import profiling
+from core.arrays import asCoordinates, normalizeArray, flattenFaces, unflattenFaces
+from core.arrayMesh import ArrayMesh
+from core.conversions import IncorrectTopology, walkRings
+
+# position of the new vertices of chamfer, from each corner towards the center of its face
+CHAMFER_RATIO = 1 / 3
+# vertices closer than this are merged before applying the operators
+WELD_TOLERANCE = 1e-6
+
+
+def weldVertices(verts, loops, totals, tolerance=WELD_TOLERANCE):
+    """
+    merge the coincident vertices (e.g. on the seams of the Spherified Cube and at the poles of the Radial Sphere),
+    dropping the corners and the faces that collapse
+
+    :param np.ndarray verts: (N, 3) vertices
+    :param np.ndarray loops: vertex index of each loop
+    :param np.ndarray totals: number of loops of each face
+    :param float tolerance:
+    :return (np.ndarray, np.ndarray, np.ndarray): vertices, loops and totals
+    """
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+    from scipy.spatial import cKDTree
+
+    pairs = cKDTree(verts).query_pairs(tolerance, output_type="ndarray")
+    if len(pairs) == 0:
+        return verts, loops, totals
+    with profiling.stage("conway.weld", verts=len(verts), pairs=len(pairs)):
+        n = len(verts)
+        _, labels = connected_components(coo_matrix((np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])), shape=(n, n)),
+                                         directed=False)
+        first = np.full(labels.max() + 1, n, dtype=np.int64)
+        np.minimum.at(first, labels, np.arange(n))
+        loops = labels[loops]
+
+        # drop the corners equal to the next one in the same face, then the faces left with less than 3 corners
+        face = np.repeat(np.arange(len(totals)), totals)
+        starts = np.zeros(len(totals) + 1, dtype=np.int64)
+        np.cumsum(totals, out=starts[1:])
+        following = np.arange(len(loops)) + 1
+        following[starts[1:] - 1] = starts[:-1]
+        keep = loops != loops[following]
+        totals = np.bincount(face[keep], minlength=len(totals))
+        keep &= (totals >= 3)[face]
+        return verts[first], loops[keep].astype(np.int32), totals[totals >= 3].astype(np.int32)
+
+
+def faceCenters(mesh):
+    """
+    :param ArrayMesh mesh:
+    :return np.ndarray: (F, 3) average of the vertices of each face
+    """
+    co = mesh.verts[mesh.vertex]
+    centers = np.stack([np.bincount(mesh.face, weights=co[:, i], minlength=mesh.n_faces) for i in range(3)], axis=1)
+    return (centers / mesh.totals[:, None]).astype(mesh.verts.dtype, copy=False)
+
+
+def vertexRings(mesh, values):
+    """
+    one face for each vertex, made of <values> of the half-edges leaving it in order around the vertex
+
+    :param ArrayMesh mesh: closed mesh
+    :param np.ndarray values: new vertex id of each half-edge
+    :return (np.ndarray, np.ndarray): loops and totals of the faces (vertices with less than 3 half-edges are skipped)
+    """
+    if (mesh.twin < 0).any():
+        raise IncorrectTopology("The mesh must be closed")
+    corners = np.arange(len(mesh.vertex), dtype=np.int64)
+    rings, lengths = walkRings(mesh.vertex.astype(np.int64), corners, mesh.vertexSuccessor().astype(np.int64),
+                               mesh.n_verts)
+    rings = rings[lengths >= 3]
+    return values[rings[rings >= 0]].astype(np.int32), lengths[lengths >= 3].astype(np.int32)
+
+
+def dual(mesh):
+    """
+    one vertex at the center of each face, one face for each vertex
+
+    :param ArrayMesh mesh:
+    :return (np.ndarray, np.ndarray, np.ndarray): vertices, loops and totals
+    """
+    loops, totals = vertexRings(mesh, mesh.face)
+    return faceCenters(mesh), loops, totals
+
+
+def truncate(mesh):
+    """
+    cut every vertex: each edge is split in 3, each vertex becomes a face with as many sides as its valence and each
+    k-sided face a 2k-sided one (see core.conversions.truncate for the triangle only version)
+
+    :param ArrayMesh mesh:
+    :return (np.ndarray, np.ndarray, np.ndarray): vertices, loops and totals
+    """
+    verts = mesh.verts
+    a, b = mesh.edgeVertices()
+    start = mesh.vertex
+    edge = mesh.edge.astype(np.int64)
+
+    # two new vertices for each edge: 2e is the one near a, 2e + 1 the one near b
+    new_verts = np.empty((2 * mesh.n_edges, 3), dtype=verts.dtype)
+    new_verts[0::2] = (2 * verts[a] + verts[b]) / 3
+    new_verts[1::2] = (verts[a] + 2 * verts[b]) / 3
+    near_start = 2 * edge + (start != a[edge])
+    near_end = 2 * edge + (mesh.endVertex() != a[edge])
+
+    loops, totals = vertexRings(mesh, near_start)
+    return (new_verts, np.concatenate([loops, np.stack([near_start, near_end], axis=1).ravel().astype(np.int32)]),
+            np.concatenate([totals, 2 * mesh.totals]))
+
+
+def kis(mesh):
+    """
+    raise a pyramid on every face: a new vertex at the center of each face, each k-sided face becomes k triangles
+
+    :param ArrayMesh mesh:
+    :return (np.ndarray, np.ndarray, np.ndarray): vertices, loops and totals
+    """
+    apex = mesh.n_verts + mesh.face
+    loops = np.stack([mesh.vertex, mesh.vertex[mesh.next], apex], axis=1).ravel().astype(np.int32)
+    return (np.concatenate([mesh.verts, faceCenters(mesh)]), loops,
+            np.full(len(mesh.vertex), 3, dtype=np.int32))
+
+
+def ambo(mesh):
+    """
+    one vertex in the middle of each edge, one face for each face and for each vertex (rectification)
+
+    :param ArrayMesh mesh:
+    :return (np.ndarray, np.ndarray, np.ndarray): vertices, loops and totals
+    """
+    a, b = mesh.edgeVertices()
+    loops, totals = vertexRings(mesh, mesh.edge)
+    return ((mesh.verts[a] + mesh.verts[b]) / 2, np.concatenate([loops, mesh.edge]),
+            np.concatenate([totals, mesh.totals]))
+
+
+def chamfer(mesh, ratio=CHAMFER_RATIO):
+    """
+    bevel every edge: each face shrinks towards its center and each edge becomes a hexagon. The old vertices are kept
+
+    :param ArrayMesh mesh:
+    :param float ratio: position of the corners of the shrunk faces, from the old corner (0) to the face center (1)
+    :return (np.ndarray, np.ndarray, np.ndarray): vertices, loops and totals
+    """
+    if (mesh.twin < 0).any():
+        raise IncorrectTopology("The mesh must be closed")
+    n = mesh.n_verts
+    co = mesh.verts[mesh.vertex]
+    corners = co + ratio * (faceCenters(mesh)[mesh.face] - co)
+
+    # the hexagon of the edge of h (a -> b) and of its twin g (b -> a) goes around both shrunk faces, against them
+    h = np.flatnonzero(np.arange(len(mesh.twin)) < mesh.twin)
+    g = mesh.twin[h]
+    hexagons = np.stack([n + mesh.next[h], n + h, mesh.vertex[h], n + mesh.next[g], n + g, mesh.vertex[g]], axis=1)
+    loops = np.concatenate([n + np.arange(len(mesh.vertex)), hexagons.ravel()]).astype(np.int32)
+    return (np.concatenate([mesh.verts, corners.astype(mesh.verts.dtype, copy=False)]), loops,
+            np.concatenate([mesh.totals, np.full(len(h), 6, dtype=np.int32)]))
+
+
+OPERATORS = {
+    "d": dual,
+    "t": truncate,
+    "k": kis,
+    "a": ambo,
+    "c": chamfer,
+}
+
+
+def conway(notation, verts, faces, radius=None, weld=True):
+    """
+    apply the operators of <notation> from right to left, e.g. "dk" is the dual of kis
+
+    :param str notation: letters of OPERATORS
+    :param np.ndarray verts: (N, 3) vertices
+    :param faces: (F, k) array or list of (F, k) arrays (see core.arrays), counterclockwise seen from outside
+    :param float radius: if given, the vertices are projected on the sphere of this radius after every operator
+    :param bool weld: merge the coincident vertices first (the operators need a closed mesh)
+    :return (np.ndarray, faces): vertices and faces (grouped by number of sides if they have different ones)
+    """
+    unknown = set(notation) - set(OPERATORS)
+    if unknown:
+        raise ValueError("unknown Conway operators: %s" % ", ".join(sorted(unknown)))
+    verts = asCoordinates(verts)
+    loops, totals = flattenFaces(faces)
+    if weld:
+        verts, loops, totals = weldVertices(verts, loops, totals)
+    for op in reversed(notation):
+        with profiling.stage("conway." + OPERATORS[op].__name__, verts=len(verts), faces=len(totals)):
+            verts, loops, totals = OPERATORS[op](ArrayMesh(verts, loops, totals))
+            if radius is not None:
+                verts = normalizeArray(verts, radius)
+    return verts, unflattenFaces(loops, totals)
@@ -0,0 +1,161 @@
+"""
+Delaunay triangulation of points on a sphere through stereographic projection
+
+SOURCE: https://www.redblobgames.com/x/1842-delaunay-voronoi-sphere/
+"""
+
+import numpy as np
+from math import floor
+from core import profiling
+from core.arrays import asCoordinates
+
+# points closer than this (relative to the radius) to the projection pole can't be projected, they close the hole
+POLE_TOLERANCE = 1e-12
+
+
+def project(radius, ordinates, z):
+    """
+    given two points (0,-radius), (ordinates, z) find the line that goes trough them and get the ordinate of it's intersection with the horizontal axis
+
+    :param radius:
+    :param ordinates:
+    :param z:
+    """
+    return radius * ordinates / (z + radius)
+
+
+def stereographicProjection(points, radius, transform):
+    """
+    0 = full stereographic projection from bottom point, 1 = original sphere
+
+    :param np.ndarray points: (N, 3) original coordinates (read only)
+    :param float radius:
+    :param float transform:
+    :return np.ndarray: (N, 3) projected coordinates
+    """
+    coords = asCoordinates(points).reshape(-1, 3)
+    error_margin = 0.001  # mandated by the delaunay transform
+    origin = np.array([0, 0, -radius])
+
+    x = coords[:, 0].copy()
+    y = coords[:, 1].copy()
+    z = coords[:, 2].copy()
+    # stereographic project doesn't work if the point is too close to the south pole (the projection goes to infinity),
+    # so manually put it at a very long distance (could cause problems for very dense sphere,
+    # in that case you would need to further increase teh distance)
+    close = np.all(coords - origin <= error_margin, axis=1)
+    n_close = np.count_nonzero(close)
+    if n_close:
+        x[close] = 1
+        y[close] = np.random.rand(n_close) * 2 - 1  # introduce randomness in case there are more than one problematic points
+        z[close] = -radius + error_margin
+
+    sp = np.empty_like(coords)
+    sp[:, 0] = project(radius, x, z)
+    sp[:, 1] = project(radius, y, z)
+    sp[:, 2] = -1
+    return sp * (1 - transform) + transform * coords
+
+
+def delaunay(points, t2=1., transform=1., radius=None, threshold=0.8):
+    """
+    flatten the points with stereographic projection, triangulate them and restore the original shape of the sphere.
+    Faces are oriented counterclockwise seen from outside the sphere
+
+    :param np.ndarray points: (N, 3) vertices on the sphere
+    :param float t2: fraction of the vertices used by the triangulation (sphere_transform2)
+    :param float transform: 0 = stereographic projection, 1 = sphere (sphere_transform)
+    :param float radius: radius of the sphere, by default the distance of the first point from the origin
+    :param threshold: <t2> value after which the bottom hole is filled (set to 0 to always fill it, 1 to never fill it)
+    :return (np.ndarray, np.ndarray): (N, 3) vertices and (F, 3) triangles
+    """
+    # SciPy takes a while to import, only load it when a triangulation is actually needed
+    from scipy.spatial import Delaunay
+
+    # the projection for the triangulation is computed from the original coordinates in float64: the planar coordinates
+    # grow without bound near the projection pole, where single precision can't tell the points apart
+    original = np.asarray(points, dtype=np.float64)
+    points = asCoordinates(points)
+    n = len(points)
+    if radius is None:
+        radius = float(np.linalg.norm(points[0]))
+
+    with profiling.stage("delaunay", verts=n) as s:
+        verts = stereographicProjection(points, radius, transform)
+        iterations = floor(t2 * n)
+        if iterations < 1:
+            return verts, np.zeros((0, 3), dtype=np.int32)
+
+        # remove excess vertices from the triangulation (= ignore them) to allow animation of Delaunay triangulation
+        kept = list(range(n))
+        ratio = 3. - 5. ** 0.5
+        for i in range(n - iterations):
+            kept.pop(floor(((i * ratio) % 1) * (n - i)))
+        kept = np.array(kept, dtype=np.int64)
+
+        # project the vertices on plane, except the ones on the pole (they go to infinity)
+        with profiling.stage("delaunay.projection", verts=n):
+            on_pole = original[kept, 2] + radius <= POLE_TOLERANCE * radius
+            pole = kept[on_pole]
+            kept = kept[~on_pole]
+            flat = project(radius, original[kept, :2], original[kept, 2:])
+
+        # run delauney triangulation, make all triangles counterclockwise on the plane (= outwards on the sphere)
+        with profiling.stage("delaunay.triangulation", verts=len(kept)):
+            tri = Delaunay(flat)
+            simplices = tri.simplices
+            p = tri.points[simplices]
+            u = p[:, 1] - p[:, 0]
+            w = p[:, 2] - p[:, 0]
+            # z of the cross product (np.cross of 2D vectors is deprecated)
+            cw = u[:, 0] * w[:, 1] - u[:, 1] * w[:, 0] < 0
+            simplices[cw] = simplices[cw][:, ::-1]
+            faces = kept[simplices]
+
+        # after the <threshold>, fill the gap at the bottom of the mesh with triangles
+        if t2 > threshold:
+            border = np.concatenate([kept[np.unique(tri.convex_hull)], pole])
+            faces = np.concatenate([faces, poleCap(original, border, len(pole), radius)])
+
+        s.count(faces=len(faces))
+        return verts, faces.astype(np.int32)
+
+
+def poleCap(points, border, n_pole, radius):
+    """
+    triangles closing the hole around the projection pole (0, 0, -radius) left by the planar triangulation: the faces of
+    the spherical Delaunay triangulation whose circumcircle contains the pole. They are the faces of the convex hull of
+    the border vertices whose plane has the pole on its outer side, so the cap shares only the border edges with the
+    planar triangulation
+
+    :param np.ndarray points: (N, 3) float64 vertices on the sphere
+    :param np.ndarray border: vertices of the convex hull of the planar triangulation, then the <n_pole> vertices on the
+        pole (not triangulated)
+    :param int n_pole:
+    :param float radius:
+    :return np.ndarray: (F, 3) triangles, counterclockwise seen from outside the sphere
+    """
+    from scipy.spatial import ConvexHull, QhullError
+
+    co = points[border]
+    if len(border) == 3:
+        # a single triangle, its outer side is the one of the pole
+        faces = np.arange(3)[None, :]
+        normals = np.array([[0, 0, -radius]]) - co.mean(axis=0)
+    else:
+        try:
+            hull = ConvexHull(co)
+        except QhullError:
+            # all the border vertices on a plane (e.g. a symmetric ring around the pole)
+            hull = ConvexHull(co, qhull_options="QJ")
+        # outward normal . pole + offset > 0: the pole is outside the plane of the face
+        beyond = hull.equations[:, 2] * -radius + hull.equations[:, 3] > 0
+        # the faces with a vertex on the pole have it on their plane
+        cap = beyond | (hull.simplices >= len(border) - n_pole).any(axis=1)
+        faces, normals = hull.simplices[cap], hull.equations[cap, :3]
+
+    # the outward normals of the hull point away from the sphere on the cap
+    p = co[faces]
+    flip = np.einsum("ij,ij->i", np.cross(p[:, 1] - p[:, 0], p[:, 2] - p[:, 0]), normals) < 0
+    faces[flip] = faces[flip][:, ::-1]
+    return border[faces]
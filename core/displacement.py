@@ -0,0 +1,237 @@
+"""
+procedural displacement of generated spheres (planet terrain)
+
+Heights are sampled once per vertex at its direction on the unit sphere, from fBm (fractal Perlin noise, evaluated in 3D
+so it has no seams nor pinched poles) or from a heightmap in equirectangular (same layout as core.uvs.sphericalUVs) or
+cube-map (the 3 x 2 atlas of core.uvs.cubeMapUVs) form. The vertices are moved along their direction by
+amplitude * height: the directions and the heights are kept per vertex, so a change of the radius or of the amplitude
+only needs displace() and never samples the heights again.
+
+All the samplers work on chunks of DISPLACEMENT_CHUNK vertices, which bounds the memory of the temporaries (eight
+corners per noise octave) instead of allocating them for the whole mesh.
+"""
+
+import math
+import numpy as np
+from core import profiling
+from core.arrays import normalizeArray
+from core.spatialIndex import cubeMapCoordinates
+
+# number of vertices sampled at once
+DISPLACEMENT_CHUNK = 65536
+# size of the permutation table of the noise (the lattice repeats after this many cells)
+PERMUTATION_SIZE = 256
+# gradients of Perlin's improved noise: the midpoints of the edges of a cube
+GRADIENTS = np.array([[1, 1, 0], [-1, 1, 0], [1, -1, 0], [-1, -1, 0],
+                      [1, 0, 1], [-1, 0, 1], [1, 0, -1], [-1, 0, -1],
+                      [0, 1, 1], [0, -1, 1], [0, 1, -1], [0, -1, -1]], dtype=np.float64)
+# shift of the lattice between two octaves, so that the lattice points of the octaves don't line up
+OCTAVE_OFFSET = np.array([19.1, 7.3, 11.7])
+
+
+def permutationTable(seed=0):
+    """
+    :param int seed:
+    :return (np.ndarray, np.ndarray): (2 * PERMUTATION_SIZE + 1,) shuffled lattice hashes, repeated so that
+        perm[perm[x] + y] never wraps, and the (3, 2 * PERMUTATION_SIZE + 1) gradient of each hash
+    """
+    perm = np.random.default_rng(seed).permutation(PERMUTATION_SIZE).astype(np.int32)
+    perm = np.concatenate([perm, perm, perm[:1]])
+    return perm, np.ascontiguousarray(GRADIENTS[perm % len(GRADIENTS)].T, dtype=np.float32)
+
+
+def fade(t):
+    return t * t * t * (t * (t * 6 - 15) + 10)
+
+
+def perlinNoise(points, table):
+    """
+    Perlin's improved gradient noise
+
+    :param np.ndarray points: (N, 3) points
+    :param (np.ndarray, np.ndarray) table: see permutationTable
+    :return np.ndarray: (N,) noise values, about in [-1, 1]
+    """
+    perm, gradients = table
+    x, y, z = points.T
+    cx, cy, cz = np.floor(x), np.floor(y), np.floor(z)
+    fx, fy, fz = x - cx, y - cy, z - cz
+    ix, iy, iz = (c.astype(np.int32) & (PERMUTATION_SIZE - 1) for c in (cx, cy, cz))
+
+    def corner(dx, dy, dz, hash_xy):
+        h = np.take(perm, hash_xy + iz + dz)
+        return (np.take(gradients[0], h) * (fx - dx) + np.take(gradients[1], h) * (fy - dy) +
+                np.take(gradients[2], h) * (fz - dz))
+
+    # blend the contributions of the 8 corners of the cell along z, then y, then x
+    u, v, w = fade(fx), fade(fy), fade(fz)
+    hx = np.take(perm, ix), np.take(perm, ix + 1)
+    edges = []
+    for dx in (0, 1):
+        for dy in (0, 1):
+            hash_xy = np.take(perm, hx[dx] + iy + dy)
+            low = corner(dx, dy, 0, hash_xy)
+            edges.append(low + w * (corner(dx, dy, 1, hash_xy) - low))
+    sides = [edges[0] + v * (edges[1] - edges[0]), edges[2] + v * (edges[3] - edges[2])]
+    return sides[0] + u * (sides[1] - sides[0])
+
+
+def fbm(directions, octaves=6, frequency=2., lacunarity=2., gain=0.5, seed=0):
+    """
+    fractal Brownian motion: sum of <octaves> noise octaves, each with <lacunarity> times the frequency and <gain>
+    times the amplitude of the previous one
+
+    :param np.ndarray directions: (N, 3) points on the unit sphere
+    :param int octaves:
+    :param float frequency: frequency of the first octave (noise cells per unit of length)
+    :param float lacunarity:
+    :param float gain:
+    :param int seed:
+    :return np.ndarray: (N,) float32 heights, about in [-1, 1]
+    """
+    directions = np.asarray(directions, dtype=np.float64).reshape(-1, 3)
+    table = permutationTable(seed)
+    norm = sum(gain ** o for o in range(octaves)) or 1.
+    heights = np.empty(len(directions), dtype=np.float32)
+    for begin in range(0, len(directions), DISPLACEMENT_CHUNK):
+        chunk = directions[begin:begin + DISPLACEMENT_CHUNK]
+        total = np.zeros(len(chunk))
+        for o in range(octaves):
+            # single precision is enough for the position in the noise cell, and twice as fast
+            points = (chunk * (frequency * lacunarity ** o) + o * OCTAVE_OFFSET).astype(np.float32)
+            total += gain ** o * perlinNoise(points, table)
+        heights[begin:begin + len(chunk)] = total / norm
+    return heights
+
+
+def bilinearSample(image, x, y, x_min, x_max, wrap=False):
+    """
+    :param np.ndarray image: (H, W) heightmap, row 0 at the bottom (the order of the pixels of Blender images)
+    :param np.ndarray x: (N,) continuous pixel coordinates (pixel centers at integer + 0.5)
+    :param np.ndarray y:
+    :param x_min: (N,) first column <x> can read (the tile of each sample), ignored if <wrap>
+    :param x_max: (N,) last column
+    :param bool wrap: wrap <x> around the image (the seam of the equirectangular maps)
+    :return np.ndarray: (N,) heights
+    """
+    h, w = image.shape
+    x = x - 0.5
+    y = np.clip(y - 0.5, 0, h - 1)
+    x0 = np.floor(x)
+    y0 = np.floor(y)
+    fx = x - x0
+    fy = y - y0
+    x0 = x0.astype(np.int64)
+    y0 = y0.astype(np.int64)
+    if wrap:
+        x0, x1 = x0 % w, (x0 + 1) % w
+    else:
+        x0, x1 = np.clip(x0, x_min, x_max), np.clip(x0 + 1, x_min, x_max)
+    y1 = np.minimum(y0 + 1, h - 1)
+    flat = image.ravel()
+    bottom = flat[y0 * w + x0] * (1 - fx) + flat[y0 * w + x1] * fx
+    top = flat[y1 * w + x0] * (1 - fx) + flat[y1 * w + x1] * fx
+    return bottom * (1 - fy) + top * fy
+
+
+def sampleEquirectangular(image, directions):
+    """
+    :param np.ndarray image: (H, W) longitude/latitude heightmap, row 0 at the south pole, U as core.uvs.sphericalUVs
+    :param np.ndarray directions: (N, 3) points on the unit sphere
+    :return np.ndarray: (N,) float32 heights
+    """
+    image = np.asarray(image, dtype=np.float32)
+    h, w = image.shape
+    heights = np.empty(len(directions), dtype=np.float32)
+    for begin in range(0, len(directions), DISPLACEMENT_CHUNK):
+        x, y, z = np.asarray(directions[begin:begin + DISPLACEMENT_CHUNK], dtype=np.float64).T
+        u = 0.5 + np.arctan2(y, x) / (2 * math.pi)
+        v = 0.5 + np.arcsin(np.clip(z, -1, 1)) / math.pi
+        heights[begin:begin + len(x)] = bilinearSample(image, u * w, v * h, 0, w - 1, wrap=True)
+    return heights
+
+
+def sampleCubeMap(image, directions):
+    """
+    :param np.ndarray image: (H, W) heightmap with the 6 faces of the Spherified Cube in a 3 x 2 atlas (the layout of
+        core.uvs.cubeMapUVs), row 0 at the bottom
+    :param np.ndarray directions: (N, 3) points on the unit sphere
+    :return np.ndarray: (N,) float32 heights
+    """
+    image = np.asarray(image, dtype=np.float32)
+    h, w = image.shape
+    tile_w = w / 3
+    tile_h = h / 2
+    heights = np.empty(len(directions), dtype=np.float32)
+    for begin in range(0, len(directions), DISPLACEMENT_CHUNK):
+        face, alpha, beta = cubeMapCoordinates(np.asarray(directions[begin:begin + DISPLACEMENT_CHUNK],
+                                                          dtype=np.float64))
+        # the grid of the cube faces is uniform on the cube, not in angle
+        i = (np.tan(alpha) + 1) / 2
+        j = (np.tan(beta) + 1) / 2
+        column = face % 3
+        row = face // 3
+        # samples don't blend across the borders of the tiles, the neighbours in the atlas are not the ones on the cube
+        x_min = np.ceil(column * tile_w - 0.5).astype(np.int64)
+        x_max = np.floor((column + 1) * tile_w - 0.5).astype(np.int64)
+        heights[begin:begin + len(face)] = bilinearSample(
+            image, (column + i) * tile_w, np.clip((row + 1 - j) * tile_h, row * tile_h + 0.5, (row + 1) * tile_h - 0.5),
+            x_min, x_max)
+    return heights
+
+
+HEIGHTMAPS = {
+    "equirectangular": sampleEquirectangular,
+    "cubemap": sampleCubeMap,
+}
+
+
+def sampleHeights(directions, params):
+    """
+    :param np.ndarray directions: (N, 3) points on the unit sphere
+    :param dict params: "source" ("fbm" or a key of HEIGHTMAPS) and the arguments of fbm ("octaves", "frequency",
+        "lacunarity", "gain", "seed") or "image", the (H, W) heightmap
+    :return np.ndarray: (N,) float32 heights
+    """
+    source = params.get("source", "fbm")
+    with profiling.stage("displacement.sample", verts=len(directions), source=source):
+        if source == "fbm":
+            return fbm(directions, **{k: params[k] for k in ("octaves", "frequency", "lacunarity", "gain", "seed")
+                                      if k in params})
+        return HEIGHTMAPS[source](params["image"], directions)
+
+
+def sphereDirections(verts, origin=None):
+    """
+    :param np.ndarray verts: (N, 3) vertices of a sphere centered at the origin
+    :param np.ndarray origin: original vertices on the sphere, for the topologies built with a stereographic projection
+        (their vertices may be flattened)
+    :return np.ndarray: (N, 3) float32 unit directions, the normals of the sphere
+    """
+    return normalizeArray(np.asarray(verts if origin is None else origin, dtype=np.float32), 1.)
+
+
+def displace(co, directions, heights, amplitude):
+    """
+    :param np.ndarray co: (N, 3) vertices
+    :param np.ndarray directions: (N, 3) displacement directions, see sphereDirections
+    :param np.ndarray heights: (N,) heights, see sampleHeights
+    :param float amplitude: displacement of a height of 1
+    :return np.ndarray: (N, 3) displaced vertices
+    """
+    return co + directions * (amplitude * np.asarray(heights, dtype=co.dtype))[:, None]
+
+
+def displaceSphere(verts, params, radius=1., amplitude=0.1):
+    """
+    sample the heights at the directions of <verts> and move them along their directions
+
+    :param np.ndarray verts: (N, 3) vertices of a sphere centered at the origin
+    :param dict params: see sampleHeights
+    :param float radius: radius of the undisplaced sphere
+    :param float amplitude:
+    :return (np.ndarray, np.ndarray): displaced vertices and heights
+    """
+    directions = sphereDirections(verts)
+    heights = sampleHeights(directions, params)
+    return displace(directions.astype(np.asarray(verts).dtype) * radius, directions, heights, amplitude), heights
@@ -0,0 +1,73 @@
+"""
+writers of (verts, faces) meshes to binary PLY, OBJ and NPZ files
+
+The arrays are written block by block straight from NumPy buffers, without converting the mesh to Python lists
+"""
+
+import numpy as np
+from core.arrays import faceBlocks, flattenFaces
+
+
+def writePly(path, verts, faces):
+    """
+    write a binary little endian PLY file
+
+    :param str path:
+    :param np.ndarray verts: (N, 3) vertices
+    :param faces: (F, k) array or list of (F, k) arrays
+    """
+    blocks = faceBlocks(faces)
+    header = (
+        "ply\n"
+        "format binary_little_endian 1.0\n"
+        "element vertex %d\n"
+        "property float x\n"
+        "property float y\n"
+        "property float z\n"
+        "element face %d\n"
+        "property list uchar int vertex_indices\n"
+        "end_header\n"
+    ) % (len(verts), sum(len(b) for b in blocks))
+
+    with open(path, "wb") as f:
+        f.write(header.encode("ascii"))
+        np.ascontiguousarray(verts, dtype="<f4").tofile(f)
+        for block in blocks:
+            k = block.shape[1]
+            record = np.empty(len(block), dtype=[("n", "u1"), ("indices", "<i4", (k,))])
+            record["n"] = k
+            record["indices"] = block
+            record.tofile(f)
+
+
+def writeObj(path, verts, faces):
+    """
+    write a Wavefront OBJ file (text, 1-based indices)
+
+    :param str path:
+    :param np.ndarray verts: (N, 3) vertices
+    :param faces: (F, k) array or list of (F, k) arrays
+    """
+    with open(path, "w") as f:
+        np.savetxt(f, np.asarray(verts, dtype=np.float64).reshape(-1, 3), fmt="v %.6f %.6f %.6f")
+        for block in faceBlocks(faces):
+            np.savetxt(f, block.astype(np.int64) + 1, fmt="f" + " %d" * block.shape[1])
+
+
+def writeNpz(path, verts, faces):
+    """
+    write a NumPy archive with the vertices and the faces in the flat loop layout (see core.arrays.flattenFaces)
+
+    :param str path:
+    :param np.ndarray verts: (N, 3) vertices
+    :param faces: (F, k) array or list of (F, k) arrays
+    """
+    loops, totals = flattenFaces(faces)
+    np.savez(path, verts=np.asarray(verts), loops=loops, totals=totals)
+
+
+WRITERS = {
+    "ply": writePly,
+    "obj": writeObj,
+    "npz": writeNpz,
+}
@@ -0,0 +1,344 @@
+"""
+NumPy generators of all the sphere topologies
+
+Every generator returns a (verts, faces) tuple, see core.arrays
+"""
+
+import math
+import numpy as np
+from core import arrays, profiling
+from core.arrays import normalizeArray, asCoordinates
+from core.arrayMesh import ArrayMesh
+from core.delaunay import delaunay
+
+'''
+                ICOSAHEDRON
+'''
+
+T = (1 + 5 ** 0.5) / 2  # golden ratio
+
+ICOSAHEDRON_VERTICES = [
+    [-1, T, 0], [1, T, 0], [-1, -T, 0], [1, -T, 0],
+    [0, -1, T], [0, 1, T], [0, -1, -T], [0, 1, -T],
+    [T, 0, -1], [T, 0, 1], [-T, 0, -1], [-T, 0, 1],
+]
+
+ICOSAHEDRON_FACES = [
+    [0, 11, 5], [0, 5, 1], [0, 1, 7], [0, 7, 10], [0, 10, 11],
+    [1, 5, 9], [5, 11, 4], [11, 10, 2], [10, 7, 6], [7, 1, 8],
+    [3, 9, 4], [3, 4, 2], [3, 2, 6], [3, 6, 8], [3, 8, 9],
+    [4, 9, 5], [2, 4, 11], [6, 2, 10], [8, 6, 7], [9, 8, 1],
+]
+
+
+def icosahedron(radius=1.):
+    """
+    basic 12-vertex Icosahedron
+
+    :param float radius:
+    :return (np.ndarray, np.ndarray): (12, 3) vertices and (20, 3) faces
+    """
+    return normalizeArray(ICOSAHEDRON_VERTICES, radius), np.array(ICOSAHEDRON_FACES, dtype=np.int32)
+
+
+def subdivide(verts, faces, iterations, radius=1.):
+    """
+    Subdivide <iterations> times a triangle mesh, projecting the new (median) vertices on the sphere.
+    The vertices of the input mesh keep their index, the new vertices are appended after them
+
+    :param np.ndarray verts: (N, 3) vertices
+    :param np.ndarray faces: (F, 3) triangles
+    :param int iterations:
+    :param float radius:
+    :return (np.ndarray, np.ndarray): new vertices and faces
+    """
+    verts = asCoordinates(verts)
+    faces = np.asarray(faces, dtype=np.int32)
+    with profiling.stage("subdivide", iterations=iterations) as s:
+        for i in range(iterations):
+            n = len(verts)
+            # the half-edges are the face corners: the edge of corner j goes from vertex j to vertex j + 1
+            mesh = ArrayMesh.fromArrays(verts, faces)
+            a, b = mesh.edgeVertices()
+
+            # get median point position, normalize and create median vertex
+            medians = normalizeArray(verts[a] + verts[b], radius)
+            points = mesh.edge.reshape(-1, 3) + np.int32(n)
+
+            # create 4 smaller faces for each face
+            v = faces
+            faces = np.stack([
+                np.stack([v[:, 0], points[:, 0], points[:, 2]], axis=1),
+                np.stack([v[:, 1], points[:, 1], points[:, 0]], axis=1),
+                np.stack([v[:, 2], points[:, 2], points[:, 1]], axis=1),
+                points,
+            ], axis=1).reshape(-1, 3)
+            verts = np.concatenate([verts, medians])
+        s.count(verts=len(verts), faces=len(faces))
+    return verts, faces
+
+
+def icosphere(level, radius=1.):
+    """
+    Icosahedron subdivided <level> times
+
+    :param int level: number of subdivisions (0 is the base icosahedron)
+    :param float radius:
+    :return (np.ndarray, np.ndarray): vertices and (20 * 4 ** level, 3) faces
+    """
+    verts, faces = icosahedron(radius)
+    return subdivide(verts, faces, level, radius)
+
+
+def icosphereVertexCount(level):
+    """
+    :param int level:
+    :return int: number of vertices of the icosphere of level <level>
+    """
+    return 10 * 4 ** level + 2
+
+
+def icosphereLods(levels, radius=1.):
+    """
+    several levels of the icosphere sharing the same vertices: subdivision keeps the index of the existing vertices, so
+    the first icosphereVertexCount(k) vertices of the finest level are exactly the vertices of level k
+
+    :param levels: iterable of levels (e.g. range(2, 7))
+    :param float radius:
+    :return (np.ndarray, list): vertices of the finest level and the (F_k, 3) faces of each level, in increasing level order
+    """
+    verts, faces = icosahedron(radius)
+    level = 0
+    lods = []
+    for target in sorted(set(levels)):
+        verts, faces = subdivide(verts, faces, target - level, radius)
+        level = target
+        lods.append(faces)
+    return verts, lods
+
+
+def stackLods(lods):
+    """
+    concatenate the faces of all the levels, the faces of level i are faces[starts[i]:starts[i + 1]]
+
+    :param list lods: faces of each level (see icosphereLods)
+    :return (np.ndarray, np.ndarray): (sum F_k, 3) faces and (len(lods) + 1) start of each level
+    """
+    starts = np.zeros(len(lods) + 1, dtype=np.int64)
+    np.cumsum([len(f) for f in lods], out=starts[1:])
+    return np.concatenate(lods), starts
+
+
+'''
+                FIBONACCI AND RANDOM SPHERES
+'''
+
+
+def fibonacciPoints(n, radius=1.):
+    """
+    <n> points on a spiral with golden angle step
+
+    :param int n:
+    :param float radius:
+    :return np.ndarray: (n, 3) vertices
+    """
+    if n <= 1:
+        n = 2
+
+    with profiling.stage("fibonacciPoints", verts=n):
+        phi = math.pi * (3. - math.sqrt(5.))  # golden angle (radians)
+
+        # the angles are computed in float64 (theta gets large), the columns are written in the coordinate dtype
+        i = np.arange(n)
+        theta = phi * i
+        z = - 1 + (i / (n - 1)) * 2
+        dist_z = np.sqrt(1 - z ** 2)
+        points = np.empty((n, 3), dtype=arrays.float_type)
+        points[:, 0] = np.cos(theta) * dist_z * radius
+        points[:, 1] = np.sin(theta) * dist_z * radius
+        points[:, 2] = z * radius
+        return points
+
+
+def fibonacci(n, radius=1., transform=1., t2=1.):
+    """
+    Fibonacci Sphere triangulated with Delaunay triangulation
+
+    :param int n: number of vertices
+    :param float radius:
+    :param float transform: 0 = stereographic projection, 1 = sphere
+    :param float t2: fraction of the vertices used by the triangulation
+    :return (np.ndarray, np.ndarray):
+    """
+    return delaunay(fibonacciPoints(n, radius), t2, transform, radius)
+
+
+def randomPoints(n, radius=1., seed=None):
+    """
+    <n> random points on the sphere
+
+    :param int n:
+    :param float radius:
+    :param seed: seed of the random generator (None to use the global NumPy one)
+    :return np.ndarray: (n, 3) vertices
+    """
+    rng = np.random if seed is None else np.random.default_rng(seed)
+    with profiling.stage("randomPoints", verts=n):
+        # generate random rotation angle and latitude
+        phi = rng.random(n) * 2 * math.pi
+        latitude = radius * (2 * rng.random(n) - 1)
+        dist = np.sqrt(radius ** 2 - latitude ** 2)
+        points = np.empty((n, 3), dtype=arrays.float_type)
+        points[:, 0] = np.cos(phi) * dist
+        points[:, 1] = np.sin(phi) * dist
+        points[:, 2] = latitude
+        return points
+
+
+def randomSphere(n, radius=1., transform=1., t2=1., seed=None):
+    """
+    Random Sphere triangulated with Delaunay triangulation
+
+    :param int n: number of vertices
+    :param float radius:
+    :param float transform: 0 = stereographic projection, 1 = sphere
+    :param float t2: fraction of the vertices used by the triangulation
+    :param seed: seed of the random generator
+    :return (np.ndarray, np.ndarray):
+    """
+    return delaunay(randomPoints(n, radius, seed), t2, transform, radius)
+
+
+'''
+                SPHERIFIED CUBE
+'''
+
+# (origin, right, up) frame of each face of the cube
+CUBE_ORIGIN = np.array([
+    [-1, -1, -1],
+    [1, -1, -1],
+    [1, -1, 1],
+    [-1, -1, 1],
+    [-1, 1, -1],
+    [-1, -1, 1],
+], dtype=np.float64)
+CUBE_RIGHT = np.array([
+    [1, 0, 0],
+    [0, 0, 1],
+    [-1, 0, 0],
+    [0, 0, -1],
+    [1, 0, 0],
+    [1, 0, 0],
+], dtype=np.float64)
+CUBE_UP = np.array([
+    [0, 1, 0],
+    [0, 1, 0],
+    [0, 1, 0],
+    [0, 1, 0],
+    [0, 0, 1],
+    [0, 0, -1],
+], dtype=np.float64)
+
+
+def spherifiedCubeVertices(res, t=1., radius=1.):
+    """
+    vertices of the Spherified Cube, in (face, j, i) order
+
+    :param int res: number of quads along each side of a face
+    :param float t: 0 = cube, 1 = sphere
+    :param float radius:
+    :return np.ndarray: (6 * (res + 1) ** 2, 3) vertices
+    """
+    k = np.arange(res + 1, dtype=arrays.float_type)
+    j, i = np.meshgrid(k, k, indexing="ij")
+    o = asCoordinates(CUBE_ORIGIN)[:, None, None, :]
+    r = asCoordinates(CUBE_RIGHT)[:, None, None, :]
+    u = asCoordinates(CUBE_UP)[:, None, None, :]
+    cube_coords = o * radius + (i[..., None] * r + j[..., None] * u) * (radius * 2 / res)
+    cube_coords = cube_coords.reshape(-1, 3)
+    sphere_coords = normalizeArray(cube_coords, radius)
+    return sphere_coords * t + cube_coords * (1 - t)
+
+
+def spherifiedCubeFaces(res):
+    """
+    :param int res:
+    :return np.ndarray: (6 * res ** 2, 4) quads
+    """
+    k = res + 1
+    face, j, i = np.meshgrid(np.arange(6), np.arange(res), np.arange(res), indexing="ij")
+    a = ((face * k + j) * k + i).ravel()
+    return np.stack([a, a + k, a + k + 1, a + 1], axis=1).astype(np.int32)
+
+
+def spherifiedCube(res, t=1., radius=1.):
+    """
+    Cube with <res> x <res> quads per face, with vertices moved toward the sphere of radius <radius>
+
+    :param int res:
+    :param float t: 0 = cube, 1 = sphere
+    :param float radius:
+    :return (np.ndarray, np.ndarray):
+    """
+    with profiling.stage("spherifiedCube", verts=6 * (res + 1) ** 2, faces=6 * res ** 2):
+        return spherifiedCubeVertices(res, t, radius), spherifiedCubeFaces(res)
+
+
+'''
+                RADIAL SPHERE
+'''
+
+
+def radialVertices(p, m, t=1., radius=1.):
+    """
+    vertices of the Radial Sphere, in parallel-major order
+
+    :param int p: parallels (at least 3)
+    :param int m: meridians (at least 3)
+    :param float t: 0 = plane, 1 = sphere
+    :param float radius:
+    :return np.ndarray: (p * m, 3) vertices
+    """
+    p = p if p >= 3 else 3
+    m = m if m >= 3 else 3
+
+    smooth_coefficient = t ** 2
+    plane_z = (1 - (2 * np.arange(p)) / (p - 1))[:, None]
+    teta = plane_z * math.pi / 2
+    plane_y = (1 - (2 * np.arange(m)) / (m - 1))[None, :]
+    phi = np.arange(m)[None, :] / (m - 1) * 2 * math.pi
+
+    # blend plane and sphere coordinates one column at a time, directly into the output array
+    coords = np.empty((p, m, 3), dtype=arrays.float_type)
+    coords[..., 0] = -radius * (1 - t) + radius * np.cos(phi) * np.cos(teta * smooth_coefficient) * t
+    coords[..., 1] = plane_y * radius * (1 - t) + radius * np.sin(phi) * np.cos(teta * smooth_coefficient) * t
+    coords[..., 2] = plane_z * radius * (1 - t) + radius * np.sin(teta) * t
+    return coords.reshape(-1, 3)
+
+
+def radialFaces(p, m):
+    """
+    :param int p: parallels (at least 3)
+    :param int m: meridians (at least 3)
+    :return np.ndarray: ((p - 1) * (m - 1), 4) quads
+    """
+    p = p if p >= 3 else 3
+    m = m if m >= 3 else 3
+
+    pp, mm = np.meshgrid(np.arange(p - 1), np.arange(m - 1), indexing="ij")
+    a = (pp * m + mm).ravel()
+    return np.stack([a, a + m, a + m + 1, a + 1], axis=1).astype(np.int32)
+
+
+def radial(p, m, t=1., radius=1.):
+    """
+    Radial Sphere built from parallels and meridians, that can be unfolded to a plane
+
+    :param int p: parallels
+    :param int m: meridians
+    :param float t: 0 = plane, 1 = sphere
+    :param float radius:
+    :return (np.ndarray, np.ndarray):
+    """
+    with profiling.stage("radial"):
+        return radialVertices(p, m, t, radius), radialFaces(p, m)
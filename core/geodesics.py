@@ -0,0 +1,163 @@
+"""
+neighbourhood and distance queries on the vertices of a generated mesh: k-rings (vertices within k edges) and geodesic
+distances along the edges from a set of source vertices
+
+The vertex adjacency is built once from the faces, so after a morph (same faces, moved vertices) only the edge lengths
+have to be updated with setVertices
+"""
+
+import numpy as np
+from core import profiling
+from core.arrayMesh import ArrayMesh
+
+
+class SurfaceGraph:
+    """
+    edge graph of a mesh
+
+    :param np.ndarray verts: (N, 3) vertices
+    :param faces: (F, k) array or list of (F, k) arrays (see core.arrays)
+    :param str metric: length of the edges, "arc" (along the sphere centered at the origin) or "chord" (straight)
+    """
+
+    def __init__(self, verts, faces, metric="arc"):
+        self.mesh = ArrayMesh.fromArrays(verts, faces)
+        self.starts, self.neighbors, self.edges = self.mesh.vertexAdjacency()
+        self.metric = metric
+        self.lengths = None
+        self.graph = None
+        self.setVertices(verts)
+
+    @property
+    def n_verts(self):
+        return self.mesh.n_verts
+
+    def setVertices(self, verts):
+        """
+        update the edge lengths after the vertices moved (the faces must be the same)
+
+        :param np.ndarray verts: (N, 3) vertices
+        """
+        verts = np.asarray(verts, dtype=np.float64)
+        a, b = self.mesh.edgeVertices()
+        if self.metric == "arc":
+            norm_a = np.linalg.norm(verts[a], axis=1)
+            norm_b = np.linalg.norm(verts[b], axis=1)
+            chord = np.linalg.norm(verts[a] / norm_a[:, None] - verts[b] / norm_b[:, None], axis=1)
+            self.lengths = (norm_a + norm_b) * np.arcsin(np.minimum(chord / 2, 1))
+        else:
+            self.lengths = np.linalg.norm(verts[a] - verts[b], axis=1)
+        self.graph = None
+
+    def getGraph(self):
+        """
+        :return scipy.sparse.csr_matrix: (N, N) symmetric matrix of the edge lengths, shares the adjacency arrays
+        """
+        if self.graph is None:
+            from scipy.sparse import csr_matrix
+            self.graph = csr_matrix((self.lengths[self.edges], self.neighbors, self.starts),
+                                    shape=(self.n_verts, self.n_verts))
+        return self.graph
+
+    def ringDistance(self, sources, k=None):
+        """
+        number of edges between each vertex and the closest source (multi-source breadth first search)
+
+        :param np.ndarray sources: source vertex ids
+        :param int k: stop after <k> rings
+        :return np.ndarray: (N,) ring of each vertex, -1 for the vertices not reached
+        """
+        ring = np.full(self.n_verts, -1, dtype=np.int64)
+        frontier = sortedUnique(np.asarray(sources, dtype=np.int64))
+        ring[frontier] = 0
+        level = 0
+        with profiling.stage("geodesics.rings", sources=len(frontier)) as s:
+            while len(frontier) and (k is None or level < k):
+                level += 1
+                reached = self.neighbors[expandRanges(self.starts[frontier], self.starts[frontier + 1])]
+                frontier = sortedUnique(reached[ring[reached] < 0])
+                ring[frontier] = level
+            s.count(rings=level)
+        return ring
+
+    def kRings(self, seeds, k):
+        """
+        k-ring of each seed, all the seeds at once
+
+        :param np.ndarray seeds: (S,) vertex ids
+        :param int k: number of rings
+        :return (np.ndarray, np.ndarray, np.ndarray): (S + 1) starts, vertices and ring of each vertex: the k-ring of
+            seeds[i] is vertices[starts[i]:starts[i + 1]], sorted by ring
+        """
+        seeds = np.asarray(seeds, dtype=np.int64)
+        n = self.n_verts
+        # the (seed index, vertex) pairs reached so far are stored as seed index * n + vertex
+        frontier = sortedUnique(np.arange(len(seeds)) * n + seeds)
+        previous = frontier[:0]
+        visited = [frontier]
+        rings = [np.zeros(len(frontier), dtype=np.int64)]
+        with profiling.stage("geodesics.kRings", seeds=len(seeds), k=k) as s:
+            for level in range(1, k + 1):
+                owner, vertex = np.divmod(frontier, n)
+                counts = self.starts[vertex + 1] - self.starts[vertex]
+                reached = np.repeat(owner, counts) * n + self.neighbors[
+                    expandRanges(self.starts[vertex], self.starts[vertex + 1])]
+                # the neighbours of ring k are in the rings k - 1, k and k + 1
+                reached = sortedUnique(reached)
+                known = np.sort(np.concatenate([previous, frontier]))
+                position = np.minimum(np.searchsorted(known, reached), max(len(known) - 1, 0))
+                if len(known):
+                    reached = reached[known[position] != reached]
+                previous, frontier = frontier, reached
+                if len(frontier) == 0:
+                    break
+                visited.append(frontier)
+                rings.append(np.full(len(frontier), level, dtype=np.int64))
+
+            pairs = np.concatenate(visited)
+            ring = np.concatenate(rings)
+            order = np.argsort(pairs // n, kind="stable")
+            owner, vertex = np.divmod(pairs[order], n)
+            starts = np.zeros(len(seeds) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(owner, minlength=len(seeds)), out=starts[1:])
+            s.count(pairs=len(pairs))
+        return starts, vertex, ring[order]
+
+    def geodesicDistance(self, sources, limit=np.inf, return_sources=False):
+        """
+        shortest distance along the edges from each vertex to the closest source (multi-source Dijkstra)
+
+        :param np.ndarray sources: source vertex ids
+        :param float limit: distances above this are not computed (faster when only a neighbourhood is needed)
+        :param bool return_sources: also return the closest source of each vertex
+        :return np.ndarray: (N,) distances (inf for the vertices not reached), and the (N,) closest source (-1 for
+            the vertices not reached) if <return_sources>
+        """
+        from scipy.sparse.csgraph import dijkstra
+
+        sources = sortedUnique(np.asarray(sources, dtype=np.int64))
+        with profiling.stage("geodesics.dijkstra", sources=len(sources), verts=self.n_verts):
+            distance, _, closest = dijkstra(self.getGraph(), directed=False, indices=sources, limit=limit,
+                                            min_only=True, return_predecessors=True)
+        if return_sources:
+            return distance, np.where(closest < 0, -1, closest)
+        return distance
+
+
+def expandRanges(begin, end):
+    """
+    :return np.ndarray: concatenation of range(begin[i], end[i]) for all i
+    """
+    counts = end - begin
+    group_end = np.cumsum(counts)
+    return np.arange(group_end[-1] if len(group_end) else 0) - np.repeat(group_end - counts - begin, counts)
+
+
+def sortedUnique(values):
+    """
+    same as np.unique, always sorting (faster than the hash table np.unique may use for large integers)
+    """
+    values = np.sort(values)
+    keep = np.ones(len(values), dtype=bool)
+    keep[1:] = values[1:] != values[:-1]
+    return values[keep]
@@ -0,0 +1,165 @@
+"""
+sparse differential operators of a mesh: uniform (graph) Laplacian, cotangent Laplacian and lumped mass matrix, as
+scipy.sparse CSR matrices
+
+Polygonal faces (e.g. Voronoi regions, truncated icosahedra) are split in triangle fans for the cotangent Laplacian and
+the mass matrix. The sparsity pattern only depends on the faces, so it's computed once by LaplacianBuilder: after a morph
+(same faces, moved vertices) building the matrices again only takes a pass over the triangles.
+Both Laplacians are positive semi-definite: L[i, i] = sum of the weights of i, L[i, j] = -weight of the edge (i, j)
+"""
+
+from collections import OrderedDict
+import numpy as np
+from core import profiling
+from core.arrays import faceBlocks, flattenFaces
+from core.arrayMesh import ArrayMesh
+
+# number of LaplacianBuilder kept by getLaplacianBuilder
+MAX_CACHED_BUILDERS = 8
+# key -> LaplacianBuilder, the least recently used first
+builders = OrderedDict()
+
+
+def fanTriangulate(faces):
+    """
+    split every face in triangles sharing its first vertex
+
+    :param faces: (F, k) array or list of (F, k) arrays (see core.arrays)
+    :return np.ndarray: (T, 3) triangles, the triangles of each face are consecutive and in the order of the blocks
+    """
+    triangles = []
+    for block in faceBlocks(faces):
+        k = block.shape[1]
+        fan = np.empty((len(block), k - 2, 3), dtype=np.int32)
+        fan[..., 0] = block[:, :1]
+        fan[..., 1] = block[:, 1:-1]
+        fan[..., 2] = block[:, 2:]
+        triangles.append(fan.reshape(-1, 3))
+    if not triangles:
+        return np.zeros((0, 3), dtype=np.int32)
+    return np.concatenate(triangles)
+
+
+class LaplacianBuilder:
+    """
+    sparsity pattern of the operators of a mesh
+
+    :param int n_verts: number of vertices
+    :param faces: (F, k) array or list of (F, k) arrays (see core.arrays)
+    """
+
+    def __init__(self, n_verts, faces):
+        from scipy.sparse import csr_matrix
+
+        self.n_verts = n_verts
+        self.triangles = fanTriangulate(faces)
+        with profiling.stage("laplacian.pattern", triangles=len(self.triangles)):
+            # each corner i of a triangle (i, j, k) contributes to the entries (j, k), (k, j), (j, j) and (k, k)
+            j = np.roll(self.triangles, -1, axis=1).ravel().astype(np.int64)
+            k = np.roll(self.triangles, -2, axis=1).ravel().astype(np.int64)
+            rows = np.concatenate([j, k, j, k])
+            cols = np.concatenate([k, j, j, k])
+            keys, self.slots = np.unique(rows * n_verts + cols, return_inverse=True)
+            self.indices = (keys % n_verts).astype(np.int32)
+            self.indptr = np.zeros(n_verts + 1, dtype=np.int64)
+            np.cumsum(np.bincount(keys // n_verts, minlength=n_verts), out=self.indptr[1:])
+            self.sign = np.repeat([-1., -1., 1., 1.], len(j))
+
+            # the uniform Laplacian doesn't depend on the vertices: build it right away, on the edges of the faces only
+            a, b = ArrayMesh(None, *flattenFaces(faces)).edgeVertices()
+            adjacency = csr_matrix((np.ones(2 * len(a)), (np.concatenate([a, b]), np.concatenate([b, a]))),
+                                   shape=(n_verts, n_verts))
+            self.uniform = (diagonal(np.asarray(adjacency.sum(axis=1)).ravel()) - adjacency).tocsr()
+
+    def uniformLaplacian(self):
+        """
+        :return scipy.sparse.csr_matrix: graph Laplacian (weight 1 for every edge of the faces)
+        """
+        return self.uniform
+
+    def cotangentLaplacian(self, verts):
+        """
+        :param np.ndarray verts: (N, 3) vertices
+        :return scipy.sparse.csr_matrix: cotangent Laplacian, the weight of an edge is the half sum of the cotangents
+            of the angles opposite to it (degenerate triangles don't contribute)
+        """
+        from scipy.sparse import csr_matrix
+
+        with profiling.stage("laplacian.cotangent", triangles=len(self.triangles)):
+            weights = 0.5 * self.cotangents(verts).ravel()
+            data = np.bincount(self.slots, weights=np.tile(weights, 4) * self.sign, minlength=len(self.indices))
+            return csr_matrix((data, self.indices, self.indptr), shape=(self.n_verts, self.n_verts))
+
+    def massMatrix(self, verts, kind="voronoi"):
+        """
+        lumped (diagonal) mass matrix
+
+        :param np.ndarray verts: (N, 3) vertices
+        :param str kind: "voronoi" (mixed Voronoi areas, obtuse triangles split by halves and quarters) or "barycentric"
+            (a third of the area of each triangle to each corner)
+        :return scipy.sparse.csr_matrix:
+        """
+        with profiling.stage("laplacian.mass", triangles=len(self.triangles), kind=kind):
+            cot, squared, area = self.triangleGeometry(verts)
+            if kind == "barycentric":
+                corner_area = np.repeat(area / 3, 3)
+            else:
+                # corner i of the triangle (i, j, k): (|ij|^2 cot(k) + |ik|^2 cot(j)) / 8, and |ij| is opposite to k
+                weighted = squared * cot
+                corner_area = (weighted.sum(axis=1)[:, None] - weighted) / 8
+                obtuse = cot < 0
+                has_obtuse = obtuse.any(axis=1)
+                corner_area[has_obtuse] = np.where(obtuse[has_obtuse], 0.5, 0.25) * area[has_obtuse, None]
+                corner_area = corner_area.ravel()
+            return diagonal(np.bincount(self.triangles.ravel(), weights=corner_area, minlength=self.n_verts))
+
+    def cotangents(self, verts):
+        """
+        :return np.ndarray: (T, 3) cotangent of the angle at each corner of the triangles, 0 for degenerate triangles
+        """
+        return self.triangleGeometry(verts)[0]
+
+    def triangleGeometry(self, verts):
+        """
+        :param np.ndarray verts: (N, 3) vertices
+        :return (np.ndarray, np.ndarray, np.ndarray): (T, 3) cotangent of the angle at each corner (0 for degenerate
+            triangles), (T, 3) squared length of the edge opposite to each corner and (T,) area of each triangle
+        """
+        verts = np.asarray(verts, dtype=np.float64)
+        p0 = verts[self.triangles[:, 0]]
+        p1 = verts[self.triangles[:, 1]]
+        p2 = verts[self.triangles[:, 2]]
+        # edge opposite to each corner, all going the same way around the triangle
+        edges = (p2 - p1, p0 - p2, p1 - p0)
+        double_area = np.linalg.norm(np.cross(edges[2], -edges[1]), axis=1)
+        squared = np.stack([np.einsum("ij,ij->i", e, e) for e in edges], axis=1)
+        # the angle at corner i is between the edges i + 1 and i + 2 (reversed)
+        dot = -np.stack([np.einsum("ij,ij->i", edges[(i + 1) % 3], edges[(i + 2) % 3]) for i in range(3)], axis=1)
+        valid = double_area > 1e-12 * squared.max(axis=1, initial=0)
+        cot = np.where(valid[:, None], dot / np.where(valid, double_area, 1)[:, None], 0)
+        return cot, squared, double_area / 2
+
+
+def diagonal(values):
+    from scipy.sparse import diags
+    return diags(values, format="csr")
+
+
+def getLaplacianBuilder(key, n_verts, faces):
+    """
+    LaplacianBuilder of the meshes identified by <key> (e.g. topology and resolution: the faces of a topology only
+    depend on its resolution), built only the first time the key is seen
+
+    :param key: hashable identifier of the faces
+    :param int n_verts:
+    :param faces: see LaplacianBuilder
+    :return LaplacianBuilder:
+    """
+    builder = builders.get(key)
+    if builder is None or builder.n_verts != n_verts:
+        builder = LaplacianBuilder(n_verts, faces)
+        builders[key] = builder
+        if len(builders) > MAX_CACHED_BUILDERS:
+            builders.popitem(last=False)
+    builders.move_to_end(key)
+    return builder
@@ -0,0 +1,181 @@
+"""
+bulk transfers between (verts, faces) arrays and Blender meshes
+
+These functions only use the Mesh API (foreach_get/foreach_set and the add methods of the element collections), so they
+don't need to import bpy and work with any object exposing the same interface
+"""
+
+import numpy as np
+from core import profiling
+from core.arrays import flattenFaces
+
+
+def readVertices(mesh):
+    """
+    read all vertex coordinates of <mesh> with a single bulk transfer
+
+    :param Mesh mesh:
+    :return np.ndarray co: (N, 3) array
+    """
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    return co.reshape(-1, 3)
+
+
+def writeVertices(mesh, co):
+    """
+    write all vertex coordinates of <mesh> with a single bulk transfer. The number of vertices must not change
+
+    :param Mesh mesh:
+    :param np.ndarray co: (N, 3) array
+    """
+    with profiling.stage("writeVertices", verts=len(co)):
+        mesh.vertices.foreach_set("co", np.ascontiguousarray(co, dtype=np.float32).ravel())
+        mesh.update()
+
+
+def writeMeshArrays(mesh, verts, faces):
+    """
+    replace the whole geometry of <mesh> using bulk transfers only
+
+    :param Mesh mesh:
+    :param np.ndarray verts: (N, 3) coordinates
+    :param faces: see flattenFaces
+    """
+    with profiling.stage("writeMeshArrays", verts=len(verts)) as s:
+        loops, totals = flattenFaces(faces)
+        starts = np.zeros(len(totals), dtype=np.int32)
+        np.cumsum(totals[:-1], out=starts[1:])
+
+        mesh.clear_geometry()
+        mesh.vertices.add(len(verts))
+        mesh.vertices.foreach_set("co", np.ascontiguousarray(verts, dtype=np.float32).ravel())
+        mesh.loops.add(len(loops))
+        mesh.loops.foreach_set("vertex_index", loops)
+        mesh.polygons.add(len(totals))
+        mesh.polygons.foreach_set("loop_start", starts)
+        mesh.polygons.foreach_set("loop_total", totals)
+        mesh.update(calc_edges=True)
+        s.count(loops=len(loops), faces=len(totals))
+
+
+def writeNormals(mesh, normals):
+    """
+    shade all the faces of <mesh> smooth with the given vertex normals (stored as custom split normals), instead of the
+    ones Blender computes from the faces
+
+    :param Mesh mesh:
+    :param np.ndarray normals: (N, 3) unit vectors
+    """
+    with profiling.stage("writeNormals", verts=len(normals)):
+        # before Blender 4.1 custom normals are only used with auto smooth
+        if hasattr(mesh, "use_auto_smooth"):
+            mesh.use_auto_smooth = True
+        mesh.polygons.foreach_set("use_smooth", np.ones(len(mesh.polygons), dtype=bool))
+        mesh.normals_split_custom_set_from_vertices(np.ascontiguousarray(normals, dtype=np.float32))
+
+
+def clearNormals(mesh):
+    """
+    go back to the normals computed by Blender (null custom normals are replaced by the computed ones)
+
+    :param Mesh mesh:
+    """
+    if mesh.has_custom_normals:
+        mesh.normals_split_custom_set_from_vertices(np.zeros((len(mesh.vertices), 3), dtype=np.float32))
+
+
+def writeUVs(mesh, uvs, name="UVMap"):
+    """
+    write the UVs of all the loops of <mesh> with a single bulk transfer, creating the UV layer if needed
+
+    :param Mesh mesh:
+    :param np.ndarray uvs: (L, 2) UVs, one for each loop
+    :param str name: name of the UV layer
+    """
+    with profiling.stage("writeUVs", loops=len(uvs)):
+        layer = mesh.uv_layers.get(name)
+        if layer is None:
+            layer = mesh.uv_layers.new(name=name)
+        layer.data.foreach_set("uv", np.ascontiguousarray(uvs, dtype=np.float32).ravel())
+
+
+def readMeshArrays(mesh):
+    """
+    read the whole geometry of <mesh> with bulk transfers
+
+    :param Mesh mesh:
+    :return (np.ndarray, np.ndarray, np.ndarray): (N, 3) coordinates, vertex index of each loop, number of loops of each face
+    """
+    return (readVertices(mesh),) + readFaceArrays(mesh)
+
+
+def readFaceArrays(mesh):
+    """
+    read the faces of <mesh> in the flat loop layout with bulk transfers
+
+    :param Mesh mesh:
+    :return (np.ndarray, np.ndarray): vertex index of each loop, number of loops of each face
+    """
+    loops = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loops)
+    totals = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("loop_total", totals)
+    return loops, totals
+
+
+def writeMaterialIndices(mesh, indices):
+    """
+    set the material index of all the faces of <mesh> with a single bulk transfer
+
+    :param Mesh mesh:
+    :param np.ndarray indices: one material slot index for each face
+    """
+    mesh.polygons.foreach_set("material_index", np.ascontiguousarray(indices, dtype=np.int32))
+    mesh.update()
+
+
+# attribute data type -> (property read/written by foreach_get/foreach_set, dtype, components)
+ATTRIBUTE_TYPES = {
+    "INT": ("value", np.int32, 1),
+    "FLOAT": ("value", np.float32, 1),
+    "FLOAT_VECTOR": ("vector", np.float32, 3),
+    "FLOAT_COLOR": ("color", np.float32, 4),
+}
+
+
+def writeAttribute(mesh, name, values, domain="POINT", data_type="FLOAT"):
+    """
+    write a generic attribute with a single bulk transfer, creating (or re-creating, if its type or domain changed) it
+
+    :param Mesh mesh:
+    :param str name:
+    :param np.ndarray values: one value (or row) for each element of <domain>
+    :param str domain: "POINT", "EDGE", "FACE" or "CORNER"
+    :param str data_type: key of ATTRIBUTE_TYPES
+    :return: the attribute
+    """
+    key, dtype, components = ATTRIBUTE_TYPES[data_type]
+    attribute = mesh.attributes.get(name)
+    if attribute is not None and (attribute.data_type != data_type or attribute.domain != domain):
+        mesh.attributes.remove(attribute)
+        attribute = None
+    if attribute is None:
+        attribute = mesh.attributes.new(name, data_type, domain)
+    attribute.data.foreach_set(key, np.ascontiguousarray(values, dtype=dtype).ravel())
+    return attribute
+
+
+def readAttribute(mesh, name):
+    """
+    read a generic attribute with a single bulk transfer
+
+    :param Mesh mesh:
+    :param str name:
+    :return np.ndarray: (N,) values, or (N, components) for vectors and colors
+    """
+    attribute = mesh.attributes[name]
+    key, dtype, components = ATTRIBUTE_TYPES[attribute.data_type]
+    values = np.empty(len(attribute.data) * components, dtype=dtype)
+    attribute.data.foreach_get(key, values)
+    return values if components == 1 else values.reshape(-1, components)
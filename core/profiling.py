@@ -0,0 +1,201 @@
+"""
+lightweight instrumentation: per-stage durations, element counts and event counters (e.g. cache hits/misses)
+
+    with profiling.stage("delaunay") as s:
+        ...
+        s.count(faces=len(faces))
+
+When profiling is disabled stage() returns a shared no-op context manager, so instrumented code only pays for a
+function call. The stages can be exported as a Chrome trace (chrome://tracing, https://ui.perfetto.dev)
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+
+enabled = False
+
+# all the finished stages, as dicts (name, start, duration, depth, thread, counts)
+records = deque(maxlen=100000)
+# thread identifier -> stages of the latest top-level operation of the thread
+latest = {}
+# thread identifier -> name of the thread, for the threads in <latest>
+thread_names = {}
+# event name -> count
+counters = {}
+
+_local = threading.local()
+_lock = threading.Lock()
+
+
+class NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def count(self, **counts):
+        pass
+
+
+NULL_STAGE = NullStage()
+
+
+class Stage:
+    def __init__(self, name, counts):
+        self.name = name
+        self.counts = counts
+        self.start = 0.
+        self.depth = 0
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        self.depth = len(stack)
+        if self.depth == 0:
+            _local.operation = []
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        duration = time.perf_counter() - self.start
+        _local.stack.pop()
+        record = {
+            "name": self.name,
+            "start": self.start,
+            "duration": duration,
+            "depth": self.depth,
+            "thread": threading.get_ident(),
+            "counts": self.counts,
+        }
+        records.append(record)
+        operation = _local.operation
+        operation.append(record)
+        if self.depth == 0:
+            # children finish before their parent: show the parent first
+            operation.sort(key=lambda r: r["start"])
+            latest[threading.get_ident()] = operation
+            thread_names[threading.get_ident()] = threading.current_thread().name
+        return False
+
+    def count(self, **counts):
+        """
+        add element counts to the stage (e.g. verts=1000, faces=2000)
+        """
+        self.counts.update(counts)
+
+
+def stage(name, **counts):
+    """
+    context manager measuring the duration of a stage
+
+    :param str name:
+    :param counts: element counts known in advance
+    :return: Stage, or NULL_STAGE if profiling is disabled
+    """
+    if not enabled:
+        return NULL_STAGE
+    return Stage(name, counts)
+
+
+def countEvent(name, n=1):
+    """
+    increment the counter <name> (e.g. "laplacian.cache.hit")
+    """
+    if not enabled:
+        return
+    with _lock:
+        counters[name] = counters.get(name, 0) + n
+
+
+def enable(value=True):
+    global enabled
+    enabled = value
+
+
+def reset():
+    records.clear()
+    latest.clear()
+    thread_names.clear()
+    counters.clear()
+
+
+def getLatestBreakdown(thread=None):
+    """
+    :param int thread: identifier of the thread (threading.get_ident()), None for the main thread
+    :return list: (name, duration in seconds, depth, counts) of the stages of the latest top-level operation of the
+        thread
+    """
+    if thread is None:
+        thread = threading.main_thread().ident
+    return [(r["name"], r["duration"], r["depth"], dict(r["counts"])) for r in latest.get(thread, ())]
+
+
+def getBackgroundBreakdown():
+    """
+    breakdown of the operation that finished last outside the main thread (the background rebuilds and the parallel
+    evaluation of the spheres run in worker threads)
+
+    :return (str, list): name of its thread and its stages (see getLatestBreakdown), (None, []) if there is none
+    """
+    main = threading.main_thread().ident
+    latest_end = None
+    thread = None
+    for ident, operation in list(latest.items()):
+        if ident == main:
+            continue
+        top = next(r for r in operation if r["depth"] == 0)
+        if latest_end is None or top["start"] + top["duration"] > latest_end:
+            latest_end = top["start"] + top["duration"]
+            thread = ident
+    if thread is None:
+        return None, []
+    return thread_names.get(thread), getLatestBreakdown(thread)
+
+
+def getSummary():
+    """
+    :return dict: stage name -> {"calls", "total", "max"} (seconds), plus the event counters under "counters"
+    """
+    summary = {}
+    for r in list(records):
+        s = summary.setdefault(r["name"], {"calls": 0, "total": 0., "max": 0.})
+        s["calls"] += 1
+        s["total"] += r["duration"]
+        s["max"] = max(s["max"], r["duration"])
+    return {"stages": summary, "counters": dict(counters)}
+
+
+def getChromeTrace():
+    """
+    :return dict: the recorded stages in Chrome trace event format
+    """
+    pid = os.getpid()
+    events = [{
+        "name": r["name"],
+        "cat": "SphereTopologies",
+        "ph": "X",
+        "ts": r["start"] * 1e6,
+        "dur": r["duration"] * 1e6,
+        "pid": pid,
+        "tid": r["thread"],
+        "args": r["counts"],
+    } for r in list(records)]
+    events += [{
+        "name": name,
+        "ph": "C",
+        "ts": events[-1]["ts"] + events[-1]["dur"] if events else 0,
+        "pid": pid,
+        "args": {"count": value},
+    } for name, value in counters.items()]
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def exportChromeTrace(path):
+    with open(path, "w") as f:
+        json.dump(getChromeTrace(), f)
@@ -0,0 +1,208 @@
+"""
+mesh quality metrics, to compare topologies: corner angles, edge length ratios, uniformity of the spherical areas,
+valences and Delaunay-ness, computed for all the faces at once from the half-edges of an ArrayMesh
+
+usage:
+    python -m core.quality <topology> --param name=values [--param ...] [--json results.json]
+
+every combination of the --param values (see core.batch) is generated and its summary printed
+"""
+
+import argparse
+import json
+import math
+import sys
+import numpy as np
+from core import profiling
+from core.arrays import asCoordinates
+from core.arrayMesh import ArrayMesh
+
+# percentiles kept by the summaries
+PERCENTILES = (1, 50, 99)
+# angle sums above pi by less than this (relative) still count as Delaunay, co-circular quads are ambiguous
+DELAUNAY_TOLERANCE = 1e-9
+
+
+def summarize(values):
+    """
+    :param np.ndarray values:
+    :return dict: min, max, mean, standard deviation and PERCENTILES of <values>
+    """
+    if len(values) == 0:
+        return {}
+    summary = {"min": float(values.min()), "max": float(values.max()), "mean": float(values.mean()),
+               "std": float(values.std())}
+    for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+        summary["p%02d" % p] = float(v)
+    return summary
+
+
+def edgeVectors(mesh):
+    """
+    :param ArrayMesh mesh:
+    :return np.ndarray: (3, H) vector from the start to the end of each half-edge, one row per axis (the metrics are
+        computed axis by axis on contiguous rows, twice as fast as on (H, 3) arrays)
+    """
+    co = np.take(np.ascontiguousarray(mesh.verts.T, dtype=np.float64), mesh.vertex, axis=1)
+    return np.take(co, mesh.next, axis=1) - co
+
+
+def dot(u, w):
+    return u[0] * w[0] + u[1] * w[1] + u[2] * w[2]
+
+
+def cross(u, w):
+    return u[1] * w[2] - u[2] * w[1], u[2] * w[0] - u[0] * w[2], u[0] * w[1] - u[1] * w[0]
+
+
+def cornerAngles(mesh, edges=None):
+    """
+    :param ArrayMesh mesh:
+    :param np.ndarray edges: half-edge vectors, see edgeVectors
+    :return np.ndarray: angle (radians) at the corner of each half-edge, between the edges to the previous and the next
+        vertex of its face
+    """
+    if edges is None:
+        edges = edgeVectors(mesh)
+    u = np.take(edges, mesh.prev, axis=1)
+    # the angle between -u and edges
+    c = cross(u, edges)
+    return np.arctan2(np.sqrt(dot(c, c)), -dot(u, edges))
+
+
+def sphericalAreas(mesh):
+    """
+    solid angle of each face seen from the origin (its area once projected on the unit sphere), from the triangle fan
+    of each face (Van Oosterom and Strackee formula)
+
+    :param ArrayMesh mesh:
+    :return np.ndarray: (F,) signed areas, positive for counterclockwise faces seen from outside
+    """
+    verts = np.asarray(mesh.verts, dtype=np.float64)
+    directions = np.ascontiguousarray((verts / np.sqrt(np.einsum("ij,ij->i", verts, verts))[:, None]).T)
+    # triangle (first, h, next h) of the fan for the half-edges h that are neither the first nor the last of their face
+    first = mesh.face_starts[:-1][mesh.face]
+    fan = np.flatnonzero((np.arange(len(mesh.vertex)) > first) & (mesh.next != first))
+    a = np.take(directions, mesh.vertex[first[fan]], axis=1)
+    b = np.take(directions, mesh.vertex[fan], axis=1)
+    c = np.take(directions, mesh.vertex[mesh.next[fan]], axis=1)
+    triple = dot(a, cross(b, c))
+    den = 1 + dot(a, b) + dot(b, c) + dot(c, a)
+    return np.bincount(mesh.face[fan], weights=2 * np.arctan2(triple, den), minlength=mesh.n_faces)
+
+
+def faceMetrics(mesh, angles=None, areas=None, edges=None):
+    """
+    :param ArrayMesh mesh:
+    :param np.ndarray angles: corner angles, see cornerAngles
+    :param np.ndarray areas: spherical areas, see sphericalAreas
+    :param np.ndarray edges: half-edge vectors, see edgeVectors
+    :return dict: (F,) arrays: min_angle and max_angle (degrees), edge_ratio (longest / shortest edge) and
+        relative_area (spherical area / mean spherical area)
+    """
+    if edges is None:
+        edges = edgeVectors(mesh)
+    if angles is None:
+        angles = cornerAngles(mesh, edges)
+    if areas is None:
+        areas = sphericalAreas(mesh)
+    lengths = np.sqrt(dot(edges, edges))
+    starts = mesh.face_starts[:-1]
+    return {
+        "min_angle": np.degrees(np.minimum.reduceat(angles, starts)),
+        "max_angle": np.degrees(np.maximum.reduceat(angles, starts)),
+        "edge_ratio": np.maximum.reduceat(lengths, starts) / np.maximum(np.minimum.reduceat(lengths, starts), 1e-300),
+        "relative_area": areas / areas.mean(),
+    }
+
+
+def delaunayRatio(mesh, angles):
+    """
+    fraction of the edges between two triangles whose opposite angles add up to at most pi (locally Delaunay edges)
+
+    :param ArrayMesh mesh:
+    :param np.ndarray angles: corner angles, see cornerAngles
+    :return float: None if no edge is shared by two triangles
+    """
+    triangle = mesh.totals[mesh.face] == 3
+    h = np.flatnonzero(triangle & (mesh.twin > np.arange(len(mesh.twin))))
+    h = h[triangle[mesh.twin[h]]]
+    if len(h) == 0:
+        return None
+    # in a triangle, the corner opposite to a half-edge is the one of the previous half-edge
+    opposite = angles[mesh.prev[h]] + angles[mesh.prev[mesh.twin[h]]]
+    return float(np.mean(opposite <= math.pi * (1 + DELAUNAY_TOLERANCE)))
+
+
+def meshQuality(verts, faces, return_faces=False, totals=None):
+    """
+    summary statistics of the quality of a mesh
+
+    :param np.ndarray verts: (N, 3) vertices, around the origin
+    :param faces: (F, k) array or list of (F, k) arrays (see core.arrays), or the vertex index of each loop if <totals>
+        is given
+    :param bool return_faces: also return the per face metrics (see faceMetrics), in the order of
+        core.arrays.flattenFaces(faces), or in the order of <totals>
+    :param np.ndarray totals: number of loops of each face, to pass the faces in the flat loop layout of Blender meshes
+        (their order is kept, unflattenFaces would group them by number of sides)
+    :return dict: counts, summaries (see summarize) of the corner angles (degrees), of the face metrics and of the edge
+        lengths, valence histogram, fraction of Delaunay edges and the total spherical area / 4 pi (1 for a closed
+        sphere), and the face metrics if <return_faces>
+    """
+    if totals is None:
+        mesh = ArrayMesh.fromArrays(asCoordinates(verts), faces)
+    else:
+        mesh = ArrayMesh(asCoordinates(verts), faces, totals)
+    with profiling.stage("meshQuality", verts=mesh.n_verts, faces=mesh.n_faces):
+        edges = edgeVectors(mesh)
+        angles = cornerAngles(mesh, edges)
+        areas = sphericalAreas(mesh)
+        metrics = faceMetrics(mesh, angles, areas, edges)
+        a, b = mesh.edgeVertices()
+        lengths = np.linalg.norm(mesh.verts[a] - mesh.verts[b], axis=1)
+        valences = np.bincount(np.concatenate([a, b]), minlength=mesh.n_verts)
+        sides = np.bincount(mesh.totals)
+        summary = {
+            "verts": mesh.n_verts,
+            "faces": mesh.n_faces,
+            "edges": mesh.n_edges,
+            "sides": {int(k): int(sides[k]) for k in np.flatnonzero(sides)},
+            "angle": summarize(np.degrees(angles)),
+            "min_angle": summarize(metrics["min_angle"]),
+            "edge_ratio": summarize(metrics["edge_ratio"]),
+            "edge_length": summarize(lengths),
+            "relative_area": summarize(metrics["relative_area"]),
+            "coverage": float(areas.sum() / (4 * math.pi)),
+            "valence": {int(k): int(c) for k, c in enumerate(np.bincount(valences)) if c},
+            "delaunay": delaunayRatio(mesh, angles),
+        }
+    if return_faces:
+        return summary, metrics
+    return summary
+
+
+def main(argv=None):
+    from core.batch import TOPOLOGIES, parseParam, expandGrid
+
+    parser = argparse.ArgumentParser(prog="python -m core.quality", description="quality metrics of sphere variants")
+    parser.add_argument("topology", choices=sorted(TOPOLOGIES))
+    parser.add_argument("--param", action="append", type=parseParam, default=[],
+                        help="grid parameter, as name=v1,v2,... or name=start:stop (inclusive integer range)")
+    parser.add_argument("--json", help="write all the summaries to this file")
+    args = parser.parse_args(argv)
+
+    results = []
+    for params in expandGrid(args.param):
+        summary = meshQuality(*TOPOLOGIES[args.topology](**params))
+        results.append({"topology": args.topology, "params": params, "quality": summary})
+        print("%s %s: %d faces, min angle %.1f, edge ratio p99 %.2f, area std %.3f, delaunay %s" % (
+            args.topology, params, summary["faces"], summary["angle"]["min"], summary["edge_ratio"]["p99"],
+            summary["relative_area"]["std"], "-" if summary["delaunay"] is None else "%.4f" % summary["delaunay"]))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=1)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+locality reordering of meshes along a space-filling curve on the sphere
+
+Directions are mapped on the faces of the cube of the Spherified Cube (see core.spatialIndex.cubeMapCoordinates) and
+each face is walked with a Hilbert (or Morton) curve, so vertices close in the array are close on the sphere. Faces are
+then sorted by their lowest vertex in the new order: both the vertex buffer and the index buffer are read with better
+cache locality by Blender, modifiers and the GPU than the order of qhull (Delaunay) or of the Voronoi regions
+"""
+
+import numpy as np
+from core import profiling
+from core.arrays import faceBlocks
+from core.spatialIndex import cubeMapCoordinates
+
+# bits per axis of the curve on each cube face (keys are face << 2 * bits | index along the curve)
+CURVE_BITS = 16
+
+
+def mortonIndex(x, y, bits=CURVE_BITS):
+    """
+    :param np.ndarray x: integer coordinates in [0, 2 ** bits)
+    :param np.ndarray y:
+    :return np.ndarray: index along the Z-order curve (bits of x and y interleaved)
+    """
+    index = np.zeros(np.shape(x), dtype=np.int64)
+    for b in range(bits):
+        index |= ((x >> b) & 1) << (2 * b) | ((y >> b) & 1) << (2 * b + 1)
+    return index
+
+
+def hilbertIndex(x, y, bits=CURVE_BITS):
+    """
+    :param np.ndarray x: integer coordinates in [0, 2 ** bits)
+    :param np.ndarray y:
+    :return np.ndarray: index along the Hilbert curve
+    """
+    x = np.array(x, dtype=np.int64)
+    y = np.array(y, dtype=np.int64)
+    n = 1 << bits
+    index = np.zeros(x.shape, dtype=np.int64)
+    s = n >> 1
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        index += s * s * ((3 * rx) ^ ry)
+        # rotate the quadrant so that the curve enters it from its start
+        flip = ~ry & rx
+        x[flip] = n - 1 - x[flip]
+        y[flip] = n - 1 - y[flip]
+        swap = ~ry
+        x[swap], y[swap] = y[swap], x[swap]
+        s >>= 1
+    return index
+
+
+CURVES = {
+    "hilbert": hilbertIndex,
+    "morton": mortonIndex,
+}
+
+
+def curveKeys(points, curve="hilbert", bits=CURVE_BITS):
+    """
+    :param np.ndarray points: (N, 3) points (only their direction from the center of the sphere is used)
+    :param str curve: "hilbert" or "morton"
+    :param int bits: resolution of the curve on each cube face
+    :return np.ndarray: (N,) int64 keys, sorting them sorts the points along the curve
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    face, alpha, beta = cubeMapCoordinates(points)
+    n = 1 << bits
+    x = np.clip(((alpha / (np.pi / 2) + 0.5) * n).astype(np.int64), 0, n - 1)
+    y = np.clip(((beta / (np.pi / 2) + 0.5) * n).astype(np.int64), 0, n - 1)
+    return (face.astype(np.int64) << (2 * bits)) | CURVES[curve](x, y, bits)
+
+
+def vertexOrder(points, curve="hilbert", bits=CURVE_BITS):
+    """
+    :return np.ndarray: permutation sorting <points> along the curve (new vertex i is old vertex order[i])
+    """
+    return np.argsort(curveKeys(points, curve, bits), kind="stable")
+
+
+def reorderMesh(verts, faces, curve="hilbert", points=None):
+    """
+    sort the vertices along a space-filling curve and the faces by their lowest new vertex, keeping the faces grouped by
+    number of sides. The attributes of the mesh follow with attribute[vertex_order] (per vertex) and
+    attribute[face_order] (per face, in the order of core.arrays.flattenFaces)
+
+    :param np.ndarray verts: (N, 3) vertices
+    :param faces: (F, k) array or list of (F, k) arrays (see core.arrays)
+    :param str curve: "hilbert" or "morton"
+    :param np.ndarray points: (N, 3) positions sorted along the curve instead of <verts> (e.g. the points on the sphere
+        of a flattened mesh)
+    :return (np.ndarray, faces, np.ndarray, np.ndarray): vertices, faces, vertex order and face order
+    """
+    with profiling.stage("reorderMesh", verts=len(verts), curve=curve):
+        vertex_order = vertexOrder(verts if points is None else points, curve)
+        rank = np.empty(len(vertex_order), dtype=np.int32)
+        rank[vertex_order] = np.arange(len(vertex_order), dtype=np.int32)
+
+        blocks = []
+        face_order = []
+        first = 0
+        for block in faceBlocks(faces):
+            block = rank[block]
+            order = np.argsort(block.min(axis=1), kind="stable")
+            blocks.append(block[order])
+            face_order.append(first + order)
+            first += len(block)
+        face_order = np.concatenate(face_order) if face_order else np.zeros(0, dtype=np.int64)
+        faces = blocks[0] if isinstance(faces, np.ndarray) and blocks else blocks
+        return verts[vertex_order], faces, vertex_order, face_order
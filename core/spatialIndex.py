@@ -0,0 +1,238 @@
+"""
+cube-map spatial index of points on a sphere
+
+Directions are projected on the cube of the Spherified Cube (same origin/right/up face frames) and bucketed in an
+equal-angle res x res grid on each face, res is chosen from the number of points so that each bucket holds about
+POINTS_PER_BUCKET of them. The buckets are stored as a CSR table (vertex ids sorted by bucket plus the start of each
+bucket), built with a stable argsort of the bucket ids and the cumulative sum of their counts.
+Queries look at the (2k + 1) x (2k + 1) window of buckets around the bucket of each query, the window grows only for the
+queries that are not resolved yet. Neighbour buckets are found by mapping the centers of the neighbour cells back to
+directions, so windows crossing the edges of the cube faces land on the adjacent faces.
+"""
+
+import math
+import numpy as np
+from core import profiling
+from core.arrays import faceBlocks, normalizeArray
+from core.generators import CUBE_ORIGIN, CUBE_RIGHT, CUBE_UP
+
+CUBE_NORMAL = CUBE_ORIGIN + CUBE_RIGHT + CUBE_UP
+
+# target number of points per bucket when the resolution is not given
+POINTS_PER_BUCKET = 2
+# number of queries processed at once (bounds the memory used by the candidate lists)
+QUERY_CHUNK = 65536
+
+
+def cubeMapCoordinates(directions):
+    """
+    :param np.ndarray directions: (N, 3) non-zero vectors
+    :return (np.ndarray, np.ndarray, np.ndarray): cube face of each direction and its equal-angle coordinates in
+        [-pi/4, pi/4] along the right and up axes of the face
+    """
+    face = np.argmax(directions @ CUBE_NORMAL.T, axis=1)
+    depth = np.einsum("ij,ij->i", directions, CUBE_NORMAL[face])
+    alpha = np.arctan(np.einsum("ij,ij->i", directions, CUBE_RIGHT[face]) / depth)
+    beta = np.arctan(np.einsum("ij,ij->i", directions, CUBE_UP[face]) / depth)
+    return face, alpha, beta
+
+
+class CubeMapIndex:
+    """
+    bucket grid over the directions of <points>
+
+    :param np.ndarray points: (N, 3) points (only their direction from the center of the sphere is used)
+    :param int res: number of buckets along the side of each cube face, by default about POINTS_PER_BUCKET points per
+        bucket
+    """
+
+    def __init__(self, points, res=None):
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        if res is None:
+            res = int(round(math.sqrt(len(points) / (6 * POINTS_PER_BUCKET))))
+            res = max(res, 1)
+        self.res = res
+        self.cell = (math.pi / 2) / res
+        self.directions = normalizeArray(points, 1.)
+
+        with profiling.stage("spatialIndex.build", points=len(points), buckets=6 * res ** 2):
+            bucket = self.bucketOf(self.directions)
+            # NumPy sorts 16 bit integers with a radix sort, the larger ones with a merge sort
+            if 6 * res ** 2 <= np.iinfo(np.uint16).max + 1:
+                bucket = bucket.astype(np.uint16)
+            self.order = np.argsort(bucket, kind="stable").astype(np.int64)
+            self.starts = np.zeros(6 * res ** 2 + 1, dtype=np.int64)
+            np.cumsum(np.bincount(bucket, minlength=6 * res ** 2), out=self.starts[1:])
+
+    def cellOf(self, directions):
+        """
+        :return (np.ndarray, np.ndarray, np.ndarray): cube face and cell coordinates (i along right, j along up)
+        """
+        face, alpha, beta = cubeMapCoordinates(directions)
+        i = np.clip(((alpha + math.pi / 4) / self.cell).astype(np.int64), 0, self.res - 1)
+        j = np.clip(((beta + math.pi / 4) / self.cell).astype(np.int64), 0, self.res - 1)
+        return face, i, j
+
+    def bucketOf(self, directions):
+        face, i, j = self.cellOf(directions)
+        return (face * self.res + j) * self.res + i
+
+    def windowBuckets(self, directions, k):
+        """
+        :param np.ndarray directions: (Q, 3) unit vectors
+        :param int k: radius of the window, in cells
+        :return np.ndarray: (Q, (2k + 1) ** 2) buckets around the bucket of each direction (may contain duplicates)
+        """
+        face, i, j = self.cellOf(directions)
+        offsets = np.arange(-k, k + 1)
+        di, dj = [d.ravel() for d in np.meshgrid(offsets, offsets, indexing="ij")]
+        limit = math.pi / 2 - 1e-3
+        alpha = np.clip(-math.pi / 4 + (i[:, None] + di + 0.5) * self.cell, -limit, limit)
+        beta = np.clip(-math.pi / 4 + (j[:, None] + dj + 0.5) * self.cell, -limit, limit)
+        centers = (CUBE_NORMAL[face][:, None, :] + np.tan(alpha)[..., None] * CUBE_RIGHT[face][:, None, :] +
+                   np.tan(beta)[..., None] * CUBE_UP[face][:, None, :])
+        return self.bucketOf(centers.reshape(-1, 3)).reshape(len(directions), -1)
+
+    def candidates(self, directions, k):
+        """
+        all the points in the window of radius <k> around each direction
+
+        :return (np.ndarray, np.ndarray): query index and point id of each (query, candidate) pair, grouped by query
+        """
+        buckets = self.windowBuckets(directions, k).ravel()
+        counts = self.starts[buckets + 1] - self.starts[buckets]
+        total = int(counts.sum())
+        group_end = np.cumsum(counts)
+        position = np.arange(total) - np.repeat(group_end - counts, counts) + np.repeat(self.starts[buckets], counts)
+        query = np.repeat(np.arange(len(directions)), counts.reshape(len(directions), -1).sum(axis=1))
+        return query, self.order[position]
+
+    def safeDistance(self, k):
+        """
+        :return float: squared chord distance under which a window of radius <k> is guaranteed to contain all the points
+        """
+        # along the borders of a face a cell spans a bit more than half of its angle at the center of the face
+        angle = 0.5 * k * self.cell
+        return (2 * math.sin(angle / 2)) ** 2
+
+    def nearest(self, queries, return_distance=False):
+        """
+        nearest point (by angle) to each query direction
+
+        :param np.ndarray queries: (Q, 3) directions
+        :param bool return_distance: also return the distances (chord distance between the unit directions)
+        :return np.ndarray: (Q,) point ids, and (Q,) distances if <return_distance>
+        """
+        queries = normalizeArray(np.asarray(queries, dtype=np.float64).reshape(-1, 3), 1.)
+        ids = np.full(len(queries), -1, dtype=np.int64)
+        dist2 = np.full(len(queries), np.inf)
+
+        with profiling.stage("spatialIndex.nearest", queries=len(queries)):
+            for start in range(0, len(queries), QUERY_CHUNK):
+                chunk = np.arange(start, min(start + QUERY_CHUNK, len(queries)))
+                k = 1
+                while len(chunk) and k < self.res:
+                    self.closestCandidates(queries, chunk, k, ids, dist2)
+                    chunk = chunk[dist2[chunk] > self.safeDistance(k)]
+                    k *= 2
+                if len(chunk):
+                    # the window covers the whole sphere: compare with all the points
+                    profiling.countEvent("spatialIndex.bruteForce", len(chunk))
+                    self.closestPoints(queries, chunk, ids, dist2)
+
+        if return_distance:
+            return ids, np.sqrt(dist2)
+        return ids
+
+    def closestCandidates(self, queries, chunk, k, ids, dist2):
+        directions = queries[chunk]
+        query, point = self.candidates(directions, k)
+        if len(query) == 0:
+            return
+        # squared chord distance between unit vectors
+        d2 = 2 - 2 * np.einsum("ij,ij->i", self.directions[point], directions[query])
+        updateMinimum(chunk[query], point, d2, ids, dist2)
+
+    def closestPoints(self, queries, chunk, ids, dist2):
+        d2 = 2 - 2 * (queries[chunk] @ self.directions.T)
+        best = np.argmin(d2, axis=1)
+        updateMinimum(chunk, best, d2[np.arange(len(chunk)), best], ids, dist2)
+
+
+def updateMinimum(query, point, d2, ids, dist2):
+    """
+    keep in ids/dist2 the closest point of each query among the given (query, point, squared distance) triplets, which
+    must be grouped by query
+    """
+    starts = np.flatnonzero(np.concatenate([[True], query[1:] != query[:-1]]))
+    best = np.minimum.reduceat(d2, starts)
+    # first position of the minimum in each group
+    is_min = np.flatnonzero(d2 == np.repeat(best, np.diff(np.append(starts, len(query)))))
+    position = is_min[np.searchsorted(is_min, starts)]
+
+    query = query[starts]
+    closer = best < dist2[query]
+    ids[query[closer]] = point[position[closer]]
+    dist2[query[closer]] = best[closer]
+
+
+class CellLocator:
+    """
+    find the face of a sphere mesh (e.g. a Voronoi region, a Goldberg face or a Delaunay triangle) containing each
+    query direction. Faces must be convex and counterclockwise seen from outside
+
+    :param np.ndarray verts: (N, 3) vertices
+    :param faces: (F, k) array or list of (F, k) arrays (see core.arrays)
+    """
+
+    def __init__(self, verts, faces):
+        verts = np.asarray(verts, dtype=np.float64)
+        blocks = faceBlocks(faces)
+        sides = max(b.shape[1] for b in blocks)
+        # pad the smaller faces repeating their last vertex: the degenerate edges pass every side test
+        self.faces = np.concatenate([np.pad(b, ((0, 0), (0, sides - b.shape[1])), mode="edge") for b in blocks])
+        corners = verts[self.faces]
+        # normal of the plane through the center of the sphere and each edge
+        self.edge_normals = np.cross(corners, np.roll(corners, -1, axis=1))
+        self.index = CubeMapIndex(corners.mean(axis=1))
+
+        # a face is found by the window as long as its farthest corner is in the safe distance
+        directions = normalizeArray(corners.reshape(-1, 3), 1.).reshape(corners.shape)
+        spread = np.sum((directions - self.index.directions[:, None, :]) ** 2, axis=2).max(initial=0.)
+        self.max_k = 1
+        while self.index.safeDistance(self.max_k) < spread and self.max_k < self.index.res:
+            self.max_k *= 2
+
+    def locate(self, queries):
+        """
+        :param np.ndarray queries: (Q, 3) directions
+        :return np.ndarray: (Q,) index of the face containing each direction (in the order of the face blocks), -1 if
+            there isn't one (e.g. holes of open meshes)
+        """
+        queries = normalizeArray(np.asarray(queries, dtype=np.float64).reshape(-1, 3), 1.)
+        found = np.full(len(queries), -1, dtype=np.int64)
+
+        with profiling.stage("spatialIndex.locate", queries=len(queries)):
+            # the face with the closest centroid usually contains the query
+            face = self.index.nearest(queries)
+            inside = self.contains(face, queries)
+            found[inside] = face[inside]
+
+            # else look in growing windows around the query
+            remaining = np.flatnonzero(~inside)
+            k = 1
+            while len(remaining) and k <= self.max_k:
+                for start in range(0, len(remaining), QUERY_CHUNK):
+                    chunk = remaining[start:start + QUERY_CHUNK]
+                    query, face = self.index.candidates(queries[chunk], k)
+                    inside = self.contains(face, queries[chunk][query])
+                    found[chunk[query[inside]]] = face[inside]
+                remaining = remaining[found[remaining] < 0]
+                k *= 2
+        return found
+
+    def contains(self, faces, directions):
+        """
+        :return np.ndarray: True where the face contains the direction (on the inner side of all its edges)
+        """
+        return np.all(np.einsum("ijk,ik->ij", self.edge_normals[faces], directions) >= -1e-12, axis=1)
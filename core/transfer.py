@@ -0,0 +1,200 @@
+"""
+attribute transfer between sphere meshes of different topologies or resolutions (e.g. from a Fibonacci sphere to a
+Spherified Cube)
+
+Each target point is located in the fan triangulation of the source faces with a CellLocator, and its weights are the
+barycentric coordinates of its direction in the triangle containing it (the barycentric coordinates of the point where
+the ray from the center hits the triangle, three triple products). The weights are stored as a (targets, sources)
+scipy.sparse CSR matrix: building it is the expensive part, after that transferring any number of attribute channels is
+a single sparse product, so the AttributeTransfer of a pair of meshes is worth keeping (see getAttributeTransfer).
+"""
+
+from collections import OrderedDict
+import numpy as np
+from core import profiling
+from core.arrays import faceBlocks, faceOrder, normalizeArray, unflattenFaces
+from core.laplacian import fanTriangulate
+from core.spatialIndex import CellLocator, CubeMapIndex
+
+# number of AttributeTransfer kept by getAttributeTransfer
+MAX_CACHED_TRANSFERS = 8
+# key -> AttributeTransfer, the least recently used first
+transfers = OrderedDict()
+
+METHODS = ("barycentric", "nearest", "face")
+
+
+def faceCenters(verts, faces, totals=None):
+    """
+    :param np.ndarray verts: (N, 3) vertices
+    :param faces: (F, k) array or list of (F, k) arrays (see core.arrays), or the vertex index of each loop if <totals>
+        is given
+    :param np.ndarray totals: number of loops of each face (flat loop layout of Blender meshes)
+    :return np.ndarray: (F, 3) mean of the vertices of each face, in the order of the blocks, or in the order of <totals>
+    """
+    verts = np.asarray(verts, dtype=np.float64)
+    if totals is not None:
+        totals = np.asarray(totals)
+        if len(totals) == 0:
+            return np.zeros((0, 3))
+        starts = np.zeros(len(totals), dtype=np.int64)
+        np.cumsum(totals[:-1], out=starts[1:])
+        return np.add.reduceat(verts[np.asarray(faces)], starts) / totals[:, None]
+    blocks = faceBlocks(faces)
+    if not blocks:
+        return np.zeros((0, 3))
+    return np.concatenate([verts[block].mean(axis=1) for block in blocks])
+
+
+class AttributeTransfer:
+    """
+    sparse interpolation weights from the vertices (or faces) of a source sphere to target points
+
+    :param np.ndarray source_verts: (N, 3) vertices of the source mesh
+    :param source_faces: (F, k) array or list of (F, k) arrays (see core.arrays)
+    :param np.ndarray targets: (T, 3) target points (the vertices of the target mesh, or its face centers for "face")
+    :param str method: "barycentric" (linear interpolation of the vertex values in the triangle containing the target),
+        "nearest" (value of the closest source vertex) or "face" (value of the source face containing the target, for
+        face attributes)
+    :param np.ndarray source_points: (N, 3) positions on the sphere of the source vertices, if <source_verts> are not
+        on it (e.g. the original vertices of a flattened Fibonacci sphere)
+    :param np.ndarray source_totals: number of loops of each source face, if <source_faces> is in the flat loop layout
+        of Blender meshes: the face values are then in the order of the polygons
+    """
+
+    def __init__(self, source_verts, source_faces, targets, method="barycentric", source_points=None,
+                 source_totals=None):
+        from scipy.sparse import csr_matrix
+
+        if method not in METHODS:
+            raise ValueError("unknown transfer method %r, expected one of %s" % (method, ", ".join(METHODS)))
+        order = None
+        if source_totals is not None:
+            order = faceOrder(source_totals)
+            source_faces = unflattenFaces(source_faces, source_totals) if len(source_totals) else []
+        if method != "nearest" and not faceBlocks(source_faces):
+            raise ValueError("The source mesh has no faces")
+        source = np.asarray(source_verts if source_points is None else source_points, dtype=np.float64).reshape(-1, 3)
+        targets = normalizeArray(np.asarray(targets, dtype=np.float64).reshape(-1, 3), 1.)
+        self.method = method
+        n_sources = len(faceCenters(source, source_faces)) if method == "face" else len(source)
+
+        with profiling.stage("transfer.weights", sources=n_sources, targets=len(targets), method=method):
+            if method == "face":
+                rows, cols, weights = self.faceWeights(source, source_faces, targets)
+                if order is not None:
+                    # grouped face -> polygon
+                    cols = order[cols]
+            elif method == "nearest":
+                rows = np.arange(len(targets))
+                cols = CubeMapIndex(source).nearest(targets)
+                weights = np.ones(len(targets))
+            else:
+                rows, cols, weights = self.barycentricWeights(source, source_faces, targets)
+            self.weights = csr_matrix((weights, (rows, cols)), shape=(len(targets), n_sources))
+
+    @staticmethod
+    def barycentricWeights(source, faces, targets):
+        """
+        :return (np.ndarray, np.ndarray, np.ndarray): target, source vertex and weight of the non-zero weights
+        """
+        triangles = fanTriangulate(faces)
+        locator = CellLocator(source, triangles)
+        triangle = locator.locate(targets)
+        found = np.flatnonzero(triangle >= 0)
+
+        # edge_normals of (a, b, c) are a x b, b x c and c x a: q . (b x c) is the weight of a, up to the normalization
+        normals = locator.edge_normals[triangle[found]]
+        weights = np.einsum("ijk,ik->ij", normals, targets[found])[:, [1, 2, 0]]
+        weights = np.maximum(weights, 0)
+        weights /= np.maximum(weights.sum(axis=1, keepdims=True), 1e-300)
+
+        # targets in no triangle (holes of open meshes) take the value of the closest vertex
+        missing = np.flatnonzero(triangle < 0)
+        if len(missing):
+            profiling.countEvent("transfer.nearestFallback", len(missing))
+        rows = np.concatenate([np.repeat(found, 3), missing])
+        cols = np.concatenate([triangles[triangle[found]].ravel(), CubeMapIndex(source).nearest(targets[missing])
+                               if len(missing) else np.zeros(0, dtype=np.int64)])
+        return rows, cols, np.concatenate([weights.ravel(), np.ones(len(missing))])
+
+    @staticmethod
+    def faceWeights(source, faces, targets):
+        """
+        :return (np.ndarray, np.ndarray, np.ndarray): target, source face and weight of the non-zero weights
+        """
+        face = CellLocator(source, faces).locate(targets)
+        missing = face < 0
+        if missing.any():
+            profiling.countEvent("transfer.nearestFallback", int(missing.sum()))
+            face[missing] = CubeMapIndex(faceCenters(source, faces)).nearest(targets[missing])
+        return np.arange(len(targets)), face, np.ones(len(targets))
+
+    def apply(self, values):
+        """
+        :param np.ndarray values: (N,) or (N, C) values of the source elements
+        :return np.ndarray: (T,) or (T, C) values at the targets, with the dtype of <values> (integers are only
+            exact with "nearest" and "face")
+        """
+        values = np.asarray(values)
+        result = self.weights @ values
+        if np.issubdtype(values.dtype, np.integer):
+            result = np.rint(result)
+        return result.astype(values.dtype, copy=False)
+
+    def transfer(self, attributes):
+        """
+        transfer several attributes with a single sparse product
+
+        :param dict attributes: name -> (N,) or (N, C) values of the source elements
+        :return dict: name -> values at the targets
+        """
+        if not attributes:
+            return {}
+        columns = [np.asarray(values, dtype=np.float64).reshape(self.weights.shape[1], -1)
+                   for values in attributes.values()]
+        with profiling.stage("transfer.apply", targets=self.weights.shape[0], channels=sum(c.shape[1] for c in columns)):
+            result = self.weights @ np.hstack(columns)
+        transferred = {}
+        start = 0
+        for (name, values), column in zip(attributes.items(), columns):
+            values = np.asarray(values)
+            block = result[:, start:start + column.shape[1]]
+            start += column.shape[1]
+            if np.issubdtype(values.dtype, np.integer):
+                block = np.rint(block)
+            transferred[name] = block.reshape((-1,) + values.shape[1:]).astype(values.dtype, copy=False)
+        return transferred
+
+
+def getAttributeTransfer(key, source_verts, source_faces, targets, method="barycentric", source_points=None,
+                         source_totals=None):
+    """
+    AttributeTransfer of the pair of meshes identified by <key> (e.g. topologies and resolutions of the source and of the
+    target), built only the first time the key is seen
+
+    :param key: hashable identifier of the source mesh, the targets and the method
+    :return AttributeTransfer:
+    """
+    cached = transfers.get(key)
+    if cached is None or cached.weights.shape[0] != len(targets):
+        cached = AttributeTransfer(source_verts, source_faces, targets, method, source_points, source_totals)
+        transfers[key] = cached
+        if len(transfers) > MAX_CACHED_TRANSFERS:
+            transfers.popitem(last=False)
+    transfers.move_to_end(key)
+    return cached
+
+
+def transferAttributes(source_verts, source_faces, target_verts, attributes, method="barycentric"):
+    """
+    transfer the vertex attributes of a source sphere to the vertices of a target sphere
+
+    :param np.ndarray source_verts: (N, 3) vertices of the source mesh
+    :param source_faces: faces of the source mesh
+    :param np.ndarray target_verts: (T, 3) vertices of the target mesh
+    :param dict attributes: name -> (N,) or (N, C) values
+    :param str method: see AttributeTransfer
+    :return dict: name -> (T,) or (T, C) values
+    """
+    return AttributeTransfer(source_verts, source_faces, target_verts, method).transfer(attributes)
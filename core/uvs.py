@@ -0,0 +1,92 @@
+"""
+UV coordinates of the generated spheres, one (u, v) pair for each loop in the order of core.arrays.flattenFaces
+
+The Radial Sphere and the Spherified Cube have a vertex grid with the seams already split, so their UVs are computed per
+vertex from the grid indices. The other topologies get spherical (longitude, latitude) UVs computed per loop, so that
+the faces crossing the seam and the corners on the poles can get their own UVs
+"""
+
+import math
+import numpy as np
+from core.arrays import flattenFaces
+
+# vertices closer than this (relative to their distance from the center) to the Z axis are on the poles
+POLE_TOLERANCE = 1e-9
+
+
+def radialUVs(p, m):
+    """
+    equirectangular UVs of the Radial Sphere: the meridians go along U and the parallels along V
+
+    :param int p: parallels (at least 3)
+    :param int m: meridians (at least 3)
+    :return np.ndarray: (p * m, 2) UVs of each vertex, in the order of core.generators.radialVertices
+    """
+    p = p if p >= 3 else 3
+    m = m if m >= 3 else 3
+    uv = np.empty((p, m, 2), dtype=np.float32)
+    uv[..., 0] = (np.arange(m) / (m - 1))[None, :]
+    uv[..., 1] = (1 - np.arange(p) / (p - 1))[:, None]
+    return uv.reshape(-1, 2)
+
+
+def cubeMapUVs(res):
+    """
+    UVs of the Spherified Cube: each face of the cube gets a square of a 3 x 2 atlas
+
+    :param int res: number of quads along each side of a face
+    :return np.ndarray: (6 * (res + 1) ** 2, 2) UVs of each vertex, in the order of core.generators.spherifiedCubeVertices
+    """
+    face, j, i = np.meshgrid(np.arange(6), np.arange(res + 1), np.arange(res + 1), indexing="ij")
+    uv = np.empty(face.shape + (2,), dtype=np.float32)
+    uv[..., 0] = (face % 3 + i / res) / 3
+    # V goes against the up axis of the face, or the faces (counterclockwise from outside) would be mirrored
+    uv[..., 1] = (face // 3 + 1 - j / res) / 2
+    return uv.reshape(-1, 2)
+
+
+def sphericalUVs(verts, faces):
+    """
+    longitude/latitude UVs of any mesh around the origin. The faces crossing the seam (the -X half-plane) get U values
+    above 1 on the corners past the seam, and the corners on the poles take the mean U of the other corners of their face
+
+    :param np.ndarray verts: (N, 3) vertices
+    :param faces: (F, k) array or list of (F, k) arrays
+    :return np.ndarray: (L, 2) UVs of each loop
+    """
+    verts = np.asarray(verts, dtype=np.float64)
+    loops, totals = flattenFaces(faces)
+    if len(loops) == 0:
+        return np.zeros((0, 2), dtype=np.float32)
+    x, y, z = verts.T
+    r = np.sqrt(x * x + y * y + z * z)
+    u = (0.5 + np.arctan2(y, x) / (2 * math.pi))[loops]
+    v = (0.5 + np.arcsin(np.clip(z / r, -1, 1)) / math.pi)[loops]
+    pole = (x * x + y * y <= (POLE_TOLERANCE * r) ** 2)[loops]
+
+    starts = np.zeros(len(totals), dtype=np.int64)
+    np.cumsum(totals[:-1], out=starts[1:])
+    face = np.repeat(np.arange(len(totals)), totals)
+
+    # faces spanning more than half a turn cross the seam: move their corners on the left of the seam past U = 1
+    off_pole = np.where(pole, 0.5, u)
+    spread = np.maximum.reduceat(np.where(pole, -np.inf, u), starts) - np.minimum.reduceat(np.where(pole, np.inf, u),
+                                                                                          starts)
+    crossing = (spread > 0.5)[face]
+    u = np.where(crossing & (off_pole < 0.5), u + 1, u)
+
+    # the longitude of the poles is undefined
+    others = np.bincount(face, weights=~pole, minlength=len(totals))
+    mean = np.bincount(face, weights=np.where(pole, 0, u), minlength=len(totals)) / np.maximum(others, 1)
+    u = np.where(pole, mean[face], u)
+
+    return np.stack([u, v], axis=1).astype(np.float32)
+
+
+def loopUVs(vertex_uvs, faces):
+    """
+    :param np.ndarray vertex_uvs: (N, 2) UVs of each vertex
+    :param faces: (F, k) array or list of (F, k) arrays
+    :return np.ndarray: (L, 2) UVs of each loop
+    """
+    return np.asarray(vertex_uvs, dtype=np.float32)[flattenFaces(faces)[0]]
@@ -0,0 +1,221 @@
+"""
+topology validation of generated meshes: Euler characteristic, closedness, manifold edges, consistent and outward
+orientation, duplicate vertices and degenerate faces, all computed with array operations on an ArrayMesh
+
+usage:
+    python -m core.validation <topology> --param name=values [--param ...] [--weld]
+
+every combination of the --param values (see core.batch) is generated and validated, the exit code is 1 if a mesh has
+problems. In tests, checkMesh raises IncorrectTopology with the list of problems
+"""
+
+import argparse
+import itertools
+import sys
+import numpy as np
+from core import profiling
+from core.arrays import asCoordinates, flattenFaces
+from core.arrayMesh import ArrayMesh
+from core.conversions import IncorrectTopology
+from core.conway import weldVertices
+from core.geodesics import sortedUnique
+
+# vertices closer than this are duplicates
+DUPLICATE_TOLERANCE = 1e-6
+# size of the cells of the duplicate hash grid, in tolerances (only the vertices this close to a cell border need
+# a second pass)
+GRID_CELL = 64
+# bits of each cell coordinate in the hash keys
+KEY_BITS = 21
+# faces whose area is below this fraction of their squared perimeter are degenerate
+AREA_TOLERANCE = 1e-12
+
+
+def packCells(cells):
+    """
+    :param np.ndarray cells: (N, 3) non-negative cell coordinates below 2 ** KEY_BITS
+    :return np.ndarray: (N,) int64 hash keys
+    """
+    return (cells[:, 0] << (2 * KEY_BITS)) | (cells[:, 1] << KEY_BITS) | cells[:, 2]
+
+
+def cellPairs(co, keys, ids, tolerance):
+    """
+    pairs of points closer than <tolerance> among the points sharing a cell
+
+    :param np.ndarray co: (N, 3) all the points
+    :param np.ndarray keys: cell of each point of <ids>
+    :param np.ndarray ids: point ids
+    :return np.ndarray: (P, 2) pairs (lower id first)
+    """
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    ids = ids[order]
+    pairs = []
+    # compare each point with the d-th following one, as long as they are in the same cell
+    candidates = np.arange(len(keys) - 1)
+    d = 1
+    while len(candidates):
+        candidates = candidates[candidates + d < len(keys)]
+        candidates = candidates[keys[candidates + d] == keys[candidates]]
+        i = ids[candidates]
+        j = ids[candidates + d]
+        delta = co[i] - co[j]
+        close = np.einsum("ij,ij->i", delta, delta) <= tolerance ** 2
+        pairs.append(np.stack([np.minimum(i, j), np.maximum(i, j)], axis=1)[close])
+        d += 1
+    return np.concatenate(pairs) if pairs else np.zeros((0, 2), dtype=np.int64)
+
+
+def duplicateVertices(verts, tolerance=DUPLICATE_TOLERANCE):
+    """
+    pairs of vertices closer than <tolerance>, found with a hash grid: points are sorted by cell and compared with the
+    points of the same cell. The points near a cell border are compared again on the grids shifted by half a cell along
+    each combination of axes, so that no pair is missed
+
+    :param np.ndarray verts: (N, 3) vertices
+    :param float tolerance:
+    :return np.ndarray: (P, 2) pairs of vertex ids, lower id first, sorted
+    """
+    co = np.asarray(verts, dtype=np.float64)
+    n = len(co)
+    if n < 2:
+        return np.zeros((0, 2), dtype=np.int64)
+    low = co.min(axis=0)
+    extent = float((co.max(axis=0) - low).max())
+    cell = max(GRID_CELL * tolerance, extent / (1 << (KEY_BITS - 1)))
+    grid = (co - low) / cell
+    cells = np.floor(grid).astype(np.int64)
+    pairs = [cellPairs(co, packCells(cells), np.arange(n), tolerance)]
+
+    offset = (grid - cells) * cell
+    border = np.flatnonzero(((offset < tolerance) | (cell - offset < tolerance)).any(axis=1))
+    for shift in list(itertools.product((0., 0.5), repeat=3))[1:]:
+        shifted = np.floor(grid[border] + shift).astype(np.int64)
+        pairs.append(cellPairs(co, packCells(shifted), border, tolerance))
+
+    keys = sortedUnique(np.concatenate([p[:, 0] * n + p[:, 1] for p in pairs]))
+    return np.stack(np.divmod(keys, n), axis=1)
+
+
+def degenerateFaces(mesh):
+    """
+    :param ArrayMesh mesh:
+    :return (np.ndarray, np.ndarray): (F,) True for the faces using a vertex more than once or with (almost) zero area,
+        and the (3, F) area vector of each face (twice its area, along its normal)
+    """
+    verts = np.ascontiguousarray(np.asarray(mesh.verts, dtype=np.float64).T)
+    # repeated vertices: equal (face, vertex) keys
+    keys = np.sort(mesh.face.astype(np.int64) * mesh.n_verts + mesh.vertex)
+    repeated = np.zeros(mesh.n_faces, dtype=bool)
+    repeated[keys[1:][keys[1:] == keys[:-1]] // mesh.n_verts] = True
+
+    # area vector of the triangle fan, from the first vertex of each face
+    first = np.repeat(np.take(verts, mesh.vertex[mesh.face_starts[:-1]], axis=1), mesh.totals, axis=1)
+    b = np.take(verts, mesh.vertex, axis=1) - first
+    c = np.take(verts, mesh.vertex[mesh.next], axis=1) - first
+    area = np.stack([np.bincount(mesh.face, weights=w, minlength=mesh.n_faces) for w in (
+        b[1] * c[2] - b[2] * c[1], b[2] * c[0] - b[0] * c[2], b[0] * c[1] - b[1] * c[0])])
+    edge = np.take(b, mesh.next, axis=1) - b
+    perimeter = np.bincount(mesh.face, weights=np.sqrt((edge ** 2).sum(axis=0)), minlength=mesh.n_faces)
+    return repeated | ((area ** 2).sum(axis=0) <= (AREA_TOLERANCE * perimeter ** 2) ** 2), area
+
+
+def validateMesh(verts, faces, tolerance=DUPLICATE_TOLERANCE, euler=2, weld=False):
+    """
+    check the topology of a mesh
+
+    :param np.ndarray verts: (N, 3) vertices
+    :param faces: (F, k) array or list of (F, k) arrays (see core.arrays)
+    :param float tolerance: vertices closer than this are duplicates
+    :param int euler: expected Euler characteristic (2 for a sphere), None to skip the check
+    :param bool weld: merge the duplicate vertices before checking the topology, for the topologies with seams
+        (Spherified Cube, Radial Sphere)
+    :return dict: counts of each kind of problem, Euler characteristic, signed volume and "problems", the list of the
+        problems found (empty if the mesh is valid)
+    """
+    verts = asCoordinates(verts)
+    loops, totals = flattenFaces(faces)
+    report = {}
+    with profiling.stage("validateMesh", verts=len(verts), faces=len(totals)) as s:
+        pairs = duplicateVertices(verts, tolerance)
+        report["duplicate_vertices"] = int(len(sortedUnique(pairs[:, 1])))
+        if weld and len(pairs):
+            verts, loops, totals = weldVertices(verts, loops, totals, tolerance)
+        mesh = ArrayMesh(verts, loops, totals)
+
+        used = np.bincount(mesh.vertex, minlength=mesh.n_verts) > 0
+        per_edge = np.bincount(mesh.edge, minlength=mesh.n_edges)
+        paired = np.flatnonzero(mesh.twin >= 0)
+        # twin half-edges must go in opposite directions
+        flipped = mesh.vertex[mesh.twin[paired]] != mesh.vertex[mesh.next[paired]]
+        degenerate, area = degenerateFaces(mesh)
+        # divergence theorem on the triangle fans: the volume is positive when the faces point outwards
+        first = np.take(np.asarray(mesh.verts, dtype=np.float64), mesh.vertex[mesh.face_starts[:-1]], axis=0)
+        outward = np.einsum("ij,ji->i", first, area)
+        volume = float(outward.sum() / 6)
+
+        report.update({
+            "verts": int(used.sum()),
+            "edges": mesh.n_edges,
+            "faces": mesh.n_faces,
+            "euler": int(used.sum()) - mesh.n_edges + mesh.n_faces,
+            "unused_vertices": int((~used).sum()),
+            "border_edges": int((per_edge == 1).sum()),
+            "nonmanifold_edges": int((per_edge > 2).sum()),
+            "flipped_edges": int(flipped.sum()) // 2,
+            "degenerate_faces": int(degenerate.sum()),
+            "inward_faces": int((outward < 0).sum()),
+            "volume": volume,
+        })
+        s.count(faces=mesh.n_faces)
+
+    problems = []
+    for key, label in (("duplicate_vertices", "duplicate vertices"), ("unused_vertices", "unused vertices"),
+                       ("border_edges", "border edges (open mesh)"), ("nonmanifold_edges", "non-manifold edges"),
+                       ("flipped_edges", "edges between faces with opposite orientations"),
+                       ("degenerate_faces", "degenerate faces")):
+        if report[key] and not (key == "duplicate_vertices" and weld):
+            problems.append("%d %s" % (report[key], label))
+    if euler is not None and report["euler"] != euler:
+        problems.append("Euler characteristic %d instead of %d" % (report["euler"], euler))
+    if report["border_edges"] == 0 and report["flipped_edges"] == 0 and volume < 0:
+        problems.append("faces pointing inwards")
+    report["problems"] = problems
+    return report
+
+
+def checkMesh(verts, faces, **kwargs):
+    """
+    validateMesh for tests: raise IncorrectTopology listing the problems of the mesh, if any
+
+    :return dict: the report of validateMesh
+    """
+    report = validateMesh(verts, faces, **kwargs)
+    if report["problems"]:
+        raise IncorrectTopology(", ".join(report["problems"]))
+    return report
+
+
+def main(argv=None):
+    from core.batch import TOPOLOGIES, parseParam, expandGrid
+
+    parser = argparse.ArgumentParser(prog="python -m core.validation", description="validate sphere variants")
+    parser.add_argument("topology", choices=sorted(TOPOLOGIES))
+    parser.add_argument("--param", action="append", type=parseParam, default=[],
+                        help="grid parameter, as name=v1,v2,... or name=start:stop (inclusive integer range)")
+    parser.add_argument("--weld", action="store_true", help="merge duplicate vertices first (seams are not problems)")
+    parser.add_argument("--tolerance", type=float, default=DUPLICATE_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    invalid = 0
+    for params in expandGrid(args.param):
+        report = validateMesh(*TOPOLOGIES[args.topology](**params), tolerance=args.tolerance, weld=args.weld)
+        invalid += bool(report["problems"])
+        print("%s %s: %d faces, %s" % (args.topology, params, report["faces"],
+                                       "; ".join(report["problems"]) or "valid"))
+    return 1 if invalid else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
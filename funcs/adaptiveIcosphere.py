@@ -0,0 +1,63 @@
+import bpy
+import math
+import numpy as np
+from bpy.props import IntProperty, FloatProperty, FloatVectorProperty, EnumProperty
+from core.adaptive import adaptiveIcosphere, angularCriterion, screenSpaceCriterion
+from funcs.general_functions import createNewEmptyObject, writeMeshArrays
+
+'''Create an Icosahedron subdivided only around a direction or where its faces look big from the scene camera, with
+conforming transitions between the levels (see core.adaptive)'''
+
+
+class MESH_OT_createAdaptiveIcosahedron(bpy.types.Operator):
+    """Create an Icosahedron refined only in a region of interest"""
+    bl_idname = "mesh.create_adaptive_icosahedron"
+    bl_label = "Adaptive Icosahedron"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    # noinspection PyTypeChecker
+    mode: EnumProperty(
+        name="Refine",
+        items=[
+            ("DIRECTION", "Around direction", "refine the faces within an angle from a direction"),
+            ("CAMERA", "From camera", "refine the faces that look bigger than the pixel error from the scene camera"),
+        ],
+        default="DIRECTION"
+    )
+    max_level: IntProperty(name="Max level", default=7, min=0, max=12)
+    radius: FloatProperty(name="Radius", default=2)
+    direction: FloatVectorProperty(name="Direction", default=(0, 0, 1), subtype='DIRECTION')
+    angle: FloatProperty(name="Angle", default=math.radians(10), min=0, max=math.pi, subtype='ANGLE')
+    pixel_error: FloatProperty(name="Pixel error", description="maximum length of the edges on screen, in pixels",
+                               default=8, min=0.5)
+
+    def execute(self, context):
+        location = np.array(context.scene.cursor.location)
+        if self.mode == "CAMERA":
+            camera = context.scene.camera
+            if camera is None:
+                self.report({'ERROR'}, "The scene has no camera")
+                return {'CANCELLED'}
+            render = context.scene.render
+            width = render.resolution_x * render.resolution_percentage / 100
+            focal_pixels = width / (2 * math.tan(camera.data.angle_x / 2))
+            criterion = screenSpaceCriterion(np.array(camera.matrix_world.translation) - location, self.pixel_error,
+                                             focal_pixels)
+        else:
+            criterion = angularCriterion(self.direction, self.angle)
+
+        verts, faces = adaptiveIcosphere(criterion, self.max_level, self.radius)
+        (obj, mesh) = createNewEmptyObject("Adaptive Icosahedron")
+        writeMeshArrays(mesh, verts, faces)
+        obj.select_set(True)
+
+        self.report({'INFO'}, "%d faces" % len(faces))
+        return {'FINISHED'}
+
+
+def register():
+    bpy.utils.register_class(MESH_OT_createAdaptiveIcosahedron)
+
+
+def unregister():
+    bpy.utils.unregister_class(MESH_OT_createAdaptiveIcosahedron)
@@ -0,0 +1,130 @@
+import bpy
+from bpy.props import EnumProperty, StringProperty
+from core.meshTransfer import ATTRIBUTE_TYPES
+from core.transfer import AttributeTransfer, faceCenters
+from funcs.general_functions import readMeshArrays, readAttribute, writeAttribute, hasOriginalVertices, \
+    getOriginalVertices, ORIGIN_ATTRIBUTE, HEIGHT_ATTRIBUTE, DIRECTION_ATTRIBUTE
+
+'''Transfer of the point and face attributes of a selected sphere to the active one (a faster Data Transfer modifier for
+spheres of any topology): the weights are kept, so transferring again between the same meshes is a sparse product'''
+
+# attributes that describe the geometry of each mesh, never transferred
+SKIPPED_ATTRIBUTES = {"position", ORIGIN_ATTRIBUTE, HEIGHT_ATTRIBUTE, DIRECTION_ATTRIBUTE}
+# domains of the transferred attributes
+DOMAINS = ("POINT", "FACE")
+
+# (source mesh name, target mesh name, method) -> (hash of the geometry, AttributeTransfer)
+transfer_cache = {}
+
+
+def spherePoints(mesh, verts):
+    """
+    :return np.ndarray: (N, 3) positions of the vertices of <mesh> on the sphere: the original vertices of the spheres
+        built with a stereographic projection (even when flattened), the directions of the displaced spheres, else
+        <verts>
+    """
+    if hasOriginalVertices(mesh):
+        return getOriginalVertices(mesh)
+    if DIRECTION_ATTRIBUTE in mesh.attributes and len(mesh.attributes[DIRECTION_ATTRIBUTE].data) == len(verts):
+        return readAttribute(mesh, DIRECTION_ATTRIBUTE)
+    return verts
+
+
+def getTransfer(source, target, method):
+    """
+    AttributeTransfer from <source> to <target>, built again only if the geometry of one of the meshes changed
+
+    :param Mesh source:
+    :param Mesh target:
+    :param str method: see core.transfer.AttributeTransfer
+    :return AttributeTransfer:
+    """
+    source_verts, source_loops, source_totals = readMeshArrays(source)
+    target_verts, target_loops, target_totals = readMeshArrays(target)
+    source_points = spherePoints(source, source_verts)
+    target_points = spherePoints(target, target_verts)
+
+    key = hash((source_points.tobytes(), source_loops.tobytes(), source_totals.tobytes(), target_points.tobytes(),
+                target_loops.tobytes(), target_totals.tobytes()))
+    cached = transfer_cache.get((source.name, target.name, method))
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    # both meshes stay in the flat loop layout, so the face values are in the order of the polygons
+    if method == "face":
+        target_points = faceCenters(target_points, target_loops, target_totals)
+    transfer = AttributeTransfer(source_points, source_loops, target_points, method, source_totals=source_totals)
+    transfer_cache[(source.name, target.name, method)] = (key, transfer)
+    return transfer
+
+
+class MESH_OT_attributeTransfer(bpy.types.Operator):
+    """Copy the point and face attributes of the selected sphere to the active sphere"""
+    bl_idname = "mesh.sphere_transfer_attributes"
+    bl_label = "Transfer attributes"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    # noinspection PyTypeChecker
+    method: EnumProperty(
+        name="Points",
+        items=[
+            ("barycentric", "Interpolated", "interpolate the values of the corners of the source face containing the "
+                                            "vertex"),
+            ("nearest", "Nearest", "value of the closest source vertex"),
+        ],
+        default="barycentric"
+    )
+    attributes: StringProperty(name="Attributes", description="comma separated names, empty for all the point and face "
+                                                              "attributes of the source", default="")
+
+    @classmethod
+    def poll(self, context):
+        return context.object is not None and context.object.type == 'MESH' and context.object.mode == 'OBJECT' and \
+            len(self.getSources(context)) == 1
+
+    @staticmethod
+    def getSources(context):
+        return [obj for obj in context.selected_objects if obj.type == 'MESH' and obj != context.object]
+
+    def execute(self, context):
+        source = self.getSources(context)[0].data
+        target = context.object.data
+        names = [name.strip() for name in self.attributes.split(",") if name.strip()]
+
+        selected = {domain: {} for domain in DOMAINS}
+        for attribute in source.attributes:
+            if names and attribute.name not in names or not names and (attribute.name in SKIPPED_ATTRIBUTES or
+                                                                       attribute.name.startswith(".")):
+                continue
+            if attribute.domain not in DOMAINS or attribute.data_type not in ATTRIBUTE_TYPES:
+                self.report({'WARNING'}, "skipped %s: %s %s attributes are not supported" % (
+                    attribute.name, attribute.domain.lower(), attribute.data_type.lower()))
+                continue
+            selected[attribute.domain][attribute.name] = (attribute.data_type, readAttribute(source, attribute.name))
+        if not any(selected.values()):
+            self.report({'ERROR'}, "No attribute to transfer")
+            return {'CANCELLED'}
+
+        for domain, attributes in selected.items():
+            if not attributes:
+                continue
+            try:
+                transfer = getTransfer(source, target, self.method if domain == "POINT" else "face")
+            except ValueError as e:
+                self.report({'ERROR'}, str(e))
+                return {'CANCELLED'}
+            values = transfer.transfer({name: values for name, (data_type, values) in attributes.items()})
+            for name, (data_type, _) in attributes.items():
+                writeAttribute(target, name, values[name], domain, data_type)
+        target.update()
+
+        self.report({'INFO'}, "transferred %d attributes" % sum(len(a) for a in selected.values()))
+        return {'FINISHED'}
+
+
+def register():
+    bpy.utils.register_class(MESH_OT_attributeTransfer)
+
+
+def unregister():
+    bpy.utils.unregister_class(MESH_OT_attributeTransfer)
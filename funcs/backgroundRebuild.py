@@ -0,0 +1,154 @@
+"""
+debounced background rebuilds of the spheres
+
+Dragging the resolution slider fires an update for every intermediate value. The requests are coalesced per mesh and
+computed in a background worker: only the latest request of each mesh is computed, and results of requests that became
+stale while they were running are dropped. Finished results are committed on the main thread by a timer callback,
+meanwhile the previous mesh is left in place as placeholder.
+
+This module doesn't depend on bpy: the timer registration and the commit function are injected, so that the
+scheduler can be driven by a fake timer outside Blender.
+"""
+
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from core import profiling
+
+
+class RebuildScheduler:
+    """
+    coalesce rebuild requests and run them in a background worker
+
+    :param compute: function(params) -> result, called in the worker thread
+    :param commit: function(key, params, result), called on the main thread with the result of the latest request
+    :param register_timer: function(callback, first_interval), like bpy.app.timers.register. The callback returns
+        the delay before the next call, or None when there is nothing left to do
+    :param float delay: debounce time (seconds): a request is started only when no newer one came in the meantime
+    :param float interval: polling interval (seconds) of the timer while work is pending
+    :param clock: function() -> seconds
+    :param executor: concurrent.futures executor, by default a single worker thread
+    :param report: function(key, params, exception), called on the main thread when the compute or the commit of a
+        request fails, by default the traceback is printed. The other requests go on
+    """
+
+    def __init__(self, compute, commit, register_timer, delay=0.05, interval=0.02, clock=time.monotonic,
+                 executor=None, report=None):
+        self.compute = compute
+        self.commit = commit
+        self.report = report if report is not None else printFailure
+        self.register_timer = register_timer
+        self.delay = delay
+        self.interval = interval
+        self.clock = clock
+        self.executor = executor if executor is not None else ThreadPoolExecutor(max_workers=1)
+
+        self.generation = {}  # key -> id of the latest request
+        self.pending = {}  # key -> (generation, params, request time) not started yet
+        self.running = {}  # key -> (generation, params, future)
+        self.timer_active = False
+
+    def request(self, key, params):
+        """
+        ask for a rebuild of <key> with <params>, superseding any older request of the same key
+
+        :param key: identifier of the object to rebuild (e.g. the mesh name)
+        :param params: parameters passed to compute()
+        :return int: generation of the request
+        """
+        generation = self.generation.get(key, 0) + 1
+        self.generation[key] = generation
+        if key in self.pending:
+            profiling.countEvent("rebuild.coalesced")
+        self.pending[key] = (generation, params, self.clock())
+
+        # a stale computation that didn't start yet can be dropped right away
+        running = self.running.get(key)
+        if running is not None and running[2].cancel():
+            del self.running[key]
+            profiling.countEvent("rebuild.cancelled")
+
+        if not self.timer_active:
+            self.timer_active = True
+            self.register_timer(self.tick, self.delay)
+        return generation
+
+    def isStale(self, key, generation):
+        return self.generation.get(key) != generation
+
+    def isPending(self, key):
+        """
+        :return bool: True if a rebuild of <key> is waiting or running: the mesh still has the old vertex structure
+        """
+        return key in self.pending or key in self.running
+
+    def hasWork(self):
+        return bool(self.pending or self.running)
+
+    def tick(self):
+        """
+        timer callback (main thread): commit finished results and start the pending requests
+
+        :return float: delay before the next call, None if there is nothing left to do
+        """
+        delay = None
+        try:
+            for key, (generation, params, future) in list(self.running.items()):
+                if not future.done():
+                    continue
+                del self.running[key]
+                if future.cancelled() or self.isStale(key, generation):
+                    profiling.countEvent("rebuild.stale")
+                    continue
+                with profiling.stage("rebuild.commit"):
+                    self.commitResult(key, params, future)
+
+            now = self.clock()
+            for key, (generation, params, requested) in list(self.pending.items()):
+                if key in self.running or now - requested < self.delay:
+                    continue
+                del self.pending[key]
+                self.running[key] = (generation, params, self.executor.submit(self.compute, params))
+
+            if self.hasWork():
+                delay = self.interval
+        finally:
+            # if the callback raises, Blender unregisters the timer: the next request must register it again
+            if delay is None:
+                self.timer_active = False
+        return delay
+
+    def commitResult(self, key, params, future):
+        """
+        commit the result of a finished request, reporting the exceptions of the worker (raised here, on the main
+        thread) and of the commit instead of propagating them: they would stop the timer
+        """
+        try:
+            self.commit(key, params, future.result())
+        except Exception as e:
+            profiling.countEvent("rebuild.failed")
+            self.report(key, params, e)
+
+    def flush(self):
+        """
+        synchronously complete all the pending and running requests (main thread)
+        """
+        for key, (generation, params, requested) in list(self.pending.items()):
+            del self.pending[key]
+            self.running[key] = (generation, params, self.executor.submit(self.compute, params))
+        for key, (generation, params, future) in list(self.running.items()):
+            del self.running[key]
+            if not future.cancelled() and not self.isStale(key, generation):
+                self.commitResult(key, params, future)
+
+    def shutdown(self):
+        for key, (generation, params, future) in self.running.items():
+            future.cancel()
+        self.pending.clear()
+        self.running.clear()
+        self.executor.shutdown(wait=True)
+
+
+def printFailure(key, params, exception):
+    print("rebuild of %s failed:" % key)
+    traceback.print_exception(type(exception), exception, exception.__traceback__)
@@ -0,0 +1,136 @@
+import bpy
+import math
+import numpy as np
+from bpy.props import IntProperty, FloatProperty, EnumProperty, BoolProperty
+from funcs import sphereRegistry, topologyRegistry
+from funcs.general_functions import commitSphere
+from funcs.parallelEvaluation import getExecutor
+
+'''Create many spheres at once: the parameters of each sphere are drawn from the given ranges, the geometry of all the
+distinct parameter sets is computed in the worker pool, then all the meshes and objects are created in a single pass.
+Spheres with the same parameters share the same mesh'''
+
+
+def sampleParams(topology, count, resolution, resolution2, radius, radius_variants, transform, transform2, seed,
+                 vary_seed):
+    """
+    draw the parameters of <count> spheres
+
+    :param str topology: sphere_type
+    :param (int, int) resolution: inclusive range of the resolution
+    :param (float, float) radius: range of the radius
+    :param int radius_variants: number of evenly spaced radii in the range
+    :param int seed: seed of the parameter distribution
+    :param bool vary_seed: give a different seed to each sphere (spheres with random vertices never share a mesh)
+    :return list: one params dict (see getSphereParams) for each sphere
+    """
+    rng = np.random.default_rng(seed)
+    resolutions = rng.integers(min(resolution), max(resolution) + 1, count)
+    radii = np.linspace(radius[0], radius[1], max(radius_variants, 1))[rng.integers(0, max(radius_variants, 1), count)]
+    params = [{
+        "type": topology,
+        "radius": float(r),
+        "resolution": int(res),
+        "resolution2": resolution2,
+        "transform": transform,
+        "transform2": transform2,
+    } for res, r in zip(resolutions, radii)]
+    if vary_seed:
+        for p, s in zip(params, rng.integers(0, 2 ** 31, count)):
+            p["seed"] = int(s)
+    return params
+
+
+def getParamsKey(params):
+    return tuple(sorted(params.items()))
+
+
+def gridLocations(count, spacing, center):
+    """
+    :return np.ndarray: (count, 3) locations on a square grid on the XY plane, centered on <center>
+    """
+    side = math.ceil(math.sqrt(count))
+    k = np.arange(count)
+    grid = np.stack([k % side, k // side, np.zeros(count)], axis=1) - [(side - 1) / 2, (side - 1) / 2, 0]
+    return grid * spacing + np.asarray(center)
+
+
+class MESH_OT_createSphereBatch(bpy.types.Operator):
+    """Create many spheres at once with random parameters"""
+    bl_idname = "mesh.create_sphere_batch"
+    bl_label = "Sphere batch"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    # noinspection PyTypeChecker
+    topology: EnumProperty(
+        name="Type",
+        # evaluated when the operator is drawn, so topologies registered after this module are listed
+        items=lambda self, context: [(label, label, "") for label in topologyRegistry.getLabels()]
+    )
+    count: IntProperty(name="Count", default=100, min=1)
+    resolution_min: IntProperty(name="Min resolution", default=3, min=1)
+    resolution_max: IntProperty(name="Max resolution", default=3, min=1)
+    resolution2: IntProperty(name="Resolution2", default=16, min=1)
+    radius_min: FloatProperty(name="Min radius", default=1)
+    radius_max: FloatProperty(name="Max radius", default=1)
+    radius_variants: IntProperty(name="Radius variants", description="number of different radii in the range",
+                                 default=1, min=1)
+    transform: FloatProperty(name="Transformation", default=1, min=0, max=1)
+    transform2: FloatProperty(name="Transformation2", default=1, min=0, max=1)
+    seed: IntProperty(name="Seed", default=0)
+    vary_seed: BoolProperty(name="Different random vertices",
+                            description="give a different seed to each Random Sphere (they won't share meshes)",
+                            default=False)
+    spacing: FloatProperty(name="Spacing", default=5, min=0)
+
+    def execute(self, context):
+        params = sampleParams(self.topology, self.count, (self.resolution_min, self.resolution_max), self.resolution2,
+                              (self.radius_min, self.radius_max), self.radius_variants, self.transform,
+                              self.transform2, self.seed, self.vary_seed)
+
+        # compute the geometry of each distinct parameter set in the worker pool
+        unique = {}
+        for p in params:
+            unique.setdefault(getParamsKey(p), p)
+        mod = topologyRegistry.getModule(self.topology)
+        results = list(getExecutor().map(mod.computeSphere, unique.values()))
+
+        # create all the meshes, then all the objects
+        active = context.view_layer.objects.active
+        meshes = {}
+        for key, p, result in zip(unique, unique.values(), results):
+            mesh = bpy.data.meshes.new(self.topology)
+            props = mesh.SphereTopology
+            # sphere_do_update stays off while the properties are set, so their update callbacks don't rebuild the mesh
+            props.sphere_do_update = False
+            props.sphere_type = self.topology
+            props.sphere_radius = p["radius"]
+            props.sphere_resolution = p["resolution"]
+            props.sphere_resolution2 = p["resolution2"]
+            props.sphere_transform = p["transform"]
+            props.sphere_transform2 = p["transform2"]
+            commitSphere(mesh, *result)
+            props.sphere_do_update = True
+            sphereRegistry.add(mesh)
+            meshes[key] = mesh
+
+        collection = bpy.data.collections.new(self.topology + " batch")
+        context.scene.collection.children.link(collection)
+        locations = gridLocations(len(params), self.spacing, context.scene.cursor.location)
+        for p, location in zip(params, locations):
+            obj = bpy.data.objects.new(self.topology, meshes[getParamsKey(p)])
+            obj.location = location
+            collection.objects.link(obj)
+        obj.select_set(True)
+        context.view_layer.objects.active = active
+
+        self.report({'INFO'}, "created %d spheres (%d meshes)" % (len(params), len(meshes)))
+        return {'FINISHED'}
+
+
+def register():
+    bpy.utils.register_class(MESH_OT_createSphereBatch)
+
+
+def unregister():
+    bpy.utils.unregister_class(MESH_OT_createSphereBatch)
@@ -0,0 +1,45 @@
+import bpy
+from bpy.props import StringProperty, BoolProperty
+from core.arrays import unflattenFaces
+from core.conversions import IncorrectTopology
+from core.conway import conway
+from funcs.general_functions import getCurrentBMesh, readMeshArrays, writeMeshArrays
+
+'''Apply Conway operators (dual, truncate, kis, ambo, chamfer) to the active mesh, see core.conway'''
+
+
+class MESH_OT_conwayOperators(bpy.types.Operator):
+    """Transform current mesh topology with Conway polyhedron operators"""
+    bl_idname = "mesh.sphere_conway"
+    bl_label = "Conway operators"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    notation: StringProperty(name="Notation", description="operators applied from right to left: d (dual), "
+                                                          "t (truncate), k (kis), a (ambo), c (chamfer)", default="tk")
+    reproject: BoolProperty(name="Project on sphere", description="move the new vertices on the sphere radius",
+                            default=True)
+
+    def execute(self, context):
+        mesh = getCurrentBMesh()
+
+        verts, loops, totals = readMeshArrays(mesh)
+        radius = mesh.SphereTopology.sphere_radius if self.reproject else None
+        try:
+            verts, faces = conway(self.notation, verts, unflattenFaces(loops, totals), radius)
+        except (IncorrectTopology, ValueError) as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+
+        writeMeshArrays(mesh, verts, faces)
+
+        self.report({'INFO'}, "applied %s" % self.notation)
+
+        return {'FINISHED'}
+
+
+def register():
+    bpy.utils.register_class(MESH_OT_conwayOperators)
+
+
+def unregister():
+    bpy.utils.unregister_class(MESH_OT_conwayOperators)
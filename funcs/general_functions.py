@@ -3,9 +3,21 @@ general functions for all scripts in the Sphere Topologies package
 """
 
 import bpy
-import bmesh
-import main
-from math import atan2, pi
+import numpy as np
+from core import profiling
+from core.arrays import normalizeArray, sphereNormals
+from core.displacement import sampleHeights, sphereDirections, displace
+from core.meshTransfer import readVertices, writeVertices, readMeshArrays, writeMeshArrays, writeAttribute, \
+    readAttribute, writeNormals, clearNormals, writeUVs
+from funcs import sphereRegistry
+
+# point attribute with the original vertices of the spheres built with stereographic projection
+ORIGIN_ATTRIBUTE = "sphere_origin"
+# point attributes with the heights and the directions of the displacement, kept to morph without sampling again
+HEIGHT_ATTRIBUTE = "sphere_height"
+DIRECTION_ATTRIBUTE = "sphere_direction"
+# maximum relative difference between the distances of the vertices from the center for the analytic normals to be used
+SPHERE_TOLERANCE = 1e-4
 
 
 def createNewEmptyObject(objName="new Empty Object"):
@@ -20,6 +32,7 @@ def createNewEmptyObject(objName="new Empty Object"):
     obj = bpy.data.objects.new(objName, mesh)
     obj.location = bpy.context.scene.cursor.location
     bpy.context.collection.objects.link(obj)
+    sphereRegistry.add(mesh)
 
     # set object as active
     bpy.context.view_layer.objects.active = obj
@@ -36,108 +49,291 @@ def getCurrentBMesh():
     # if there aren't active objects, return error
     if bpy.context.object is None:
         print("No object is selected!")
-        return None, None
+        return None
 
     return bpy.context.object.data
 
 
-def defineVertex(bm, index, coordinates) -> None:
+def getUpdatedMesh(props=None):
     """
-    define a vertex of a bmesh: if a vertex with index <index> exists, modify its coordinates, else append a new vertex after the last existing vertex
+    return the mesh owning the SphereTopology properties <props> (the one whose property changed, not necessarily the
+    mesh of the active object), or the mesh of the active object without <props>
 
+    :param props: SphereTopology property group
+    :return mesh:
+    """
+    if props is not None and isinstance(props.id_data, bpy.types.Mesh):
+        return props.id_data
+    return getCurrentBMesh()
+
+
+def commitSphere(mesh, verts, faces, origin=None, uvs=None, heights=None):
+    """
+    write the arrays computed by a topology module into <mesh> and mark the sphere as updated
+
+    :param Mesh mesh:
+    :param np.ndarray verts:
+    :param faces:
+    :param np.ndarray origin: original vertices used by the stereographic projection, if any
+    :param np.ndarray uvs: (L, 2) UVs of each loop, if any (see core.uvs)
+    :param np.ndarray heights: displacement heights of the vertices (see computeHeights), sampled here if the
+        displacement is enabled and they are not given
+    """
+    displacement = getDisplacementParams(mesh.SphereTopology)
+    if displacement is not None:
+        directions = sphereDirections(verts, origin)
+        if heights is None:
+            heights = sampleSphereHeights(displacement, directions)
+        writeAttribute(mesh, HEIGHT_ATTRIBUTE, heights, "POINT", "FLOAT")
+        writeAttribute(mesh, DIRECTION_ATTRIBUTE, directions, "POINT", "FLOAT_VECTOR")
+        verts = displace(verts, directions, heights, displacement["amplitude"])
+    writeMeshArrays(mesh, verts, faces)
+    if displacement is None:
+        clearDisplacement(mesh)
+    if uvs is not None:
+        writeUVs(mesh, uvs)
+    writeSphereNormals(mesh, verts)
+    if origin is not None:
+        # a float32 point attribute instead of a list property: a third of the memory, and bulk transfers
+        writeAttribute(mesh, ORIGIN_ATTRIBUTE, origin, "POINT", "FLOAT_VECTOR")
+        if "verts" in mesh:
+            del mesh["verts"]
+    setSphereUpdated(mesh.SphereTopology)
+
+
+def commitMorph(mesh, co):
+    """
+    write the vertices computed by the morph of a topology module into <mesh> and mark the sphere as updated
+
+    :param Mesh mesh:
+    :param np.ndarray co: (N, 3) vertices, N must not change
+    """
+    co = applyDisplacement(mesh, co)
+    writeVertices(mesh, co)
+    writeSphereNormals(mesh, co)
+    setSphereUpdated(mesh.SphereTopology)
+
+
+def writeSphereNormals(mesh, co):
+    """
+    if sphere_smooth_normals is enabled, shade <mesh> smooth with the analytic normals of the sphere. They are only used
+    while all the vertices lie on a sphere centered at the origin, otherwise (e.g. while it's transformed into a plane or
+    a cube, or displaced) the normals computed by Blender are restored and sphere_analytic_normals tells the panel
 
-    :param bmesh bm:
-    :param int index:
-    :param list coordinates: list of 3 float numbers, coordinates on XYZ axis
+    :param Mesh mesh:
+    :param np.ndarray co: (N, 3) vertices of <mesh>
     """
-    verts = bm.verts
-    current_len = len(verts)
-    verts.ensure_lookup_table()
+    props = mesh.SphereTopology
+    if not props.sphere_smooth_normals:
+        props.sphere_analytic_normals = False
+        return
+    normals, norms = sphereNormals(co)
+    props.sphere_analytic_normals = bool(len(norms) and norms.max() - norms.min() <= SPHERE_TOLERANCE * norms.max())
+    if props.sphere_analytic_normals:
+        writeNormals(mesh, normals)
+    else:
+        clearNormals(mesh)
+
 
-    if index < current_len:
-        verts[index].co = coordinates
+def getDisplacementParams(props):
+    """
+    :param props: mesh.SphereTopology
+    :return dict: snapshot of the displacement properties (see core.displacement.sampleHeights, "image" is the name of
+        the heightmap), None if the displacement is disabled
+    """
+    if not props.sphere_displace:
+        return None
+    params = {"source": props.sphere_displace_source.lower(), "amplitude": props.sphere_displace_amplitude}
+    if params["source"] == "fbm":
+        params.update(frequency=props.sphere_displace_frequency, octaves=props.sphere_displace_octaves,
+                      seed=props.sphere_displace_seed)
     else:
-        verts.new(coordinates)
+        params["image"] = props.sphere_displace_image.name if props.sphere_displace_image is not None else None
+    return params
+
+
+def computeHeights(params, verts, origin=None):
+    """
+    sample the displacement heights of a sphere computed by computeSphere, safe to run outside the main thread
+
+    :param dict params: see getSphereParams
+    :param np.ndarray verts:
+    :param np.ndarray origin: original vertices, if any
+    :return np.ndarray: (N,) heights, None if the displacement is disabled or needs a heightmap (Blender images can only
+        be read on the main thread, commitSphere samples them)
+    """
+    displacement = params.get("displacement")
+    if displacement is None or displacement["source"] != "fbm":
+        return None
+    return sampleHeights(sphereDirections(verts, origin), displacement)
+
+
+def readHeightmap(image):
+    """
+    :param Image image:
+    :return np.ndarray: (H, W) mean of the RGB channels of <image>, row 0 at the bottom
+    """
+    width, height = image.size
+    pixels = np.empty(width * height * image.channels, dtype=np.float32)
+    image.pixels.foreach_get(pixels)
+    pixels = pixels.reshape(height, width, image.channels)
+    return pixels[..., :3].mean(axis=2) if image.channels >= 3 else pixels[..., 0]
+
+
+def sampleSphereHeights(displacement, directions):
+    """
+    sample the displacement heights, reading the heightmap image if any (main thread only)
+
+    :param dict displacement: see getDisplacementParams
+    :param np.ndarray directions: (N, 3) unit directions of the vertices
+    :return np.ndarray: (N,) heights
+    """
+    if displacement["source"] != "fbm":
+        image = bpy.data.images.get(displacement["image"] or "")
+        if image is None or image.size[0] == 0:
+            return np.zeros(len(directions), dtype=np.float32)
+        displacement = dict(displacement, image=readHeightmap(image))
+    return sampleHeights(directions, displacement)
 
 
-def removeExcessBMElem(l, correct_length):
+def applyDisplacement(mesh, co):
     """
-    removes vertices, edges or faces with index > correct_length
+    displace the vertices computed by a morph along the directions and with the heights saved by commitSphere, with the
+    current amplitude: the heights are not sampled again
 
-    :param BMElemSeq l: list of BMesh elements, like bm.vert, bm.edges or bm.faces
-    :param int correct_length:
+    :param Mesh mesh:
+    :param np.ndarray co: (N, 3) undisplaced vertices
+    :return np.ndarray: (N, 3) vertices
     """
-    l.ensure_lookup_table()
-    length = len(l)
-    i = length - correct_length
-    while i > 0:
-        l.remove(l[correct_length + i - 1])
-        l.ensure_lookup_table()
-        i -= 1
+    displacement = getDisplacementParams(mesh.SphereTopology)
+    if displacement is None or HEIGHT_ATTRIBUTE not in mesh.attributes or DIRECTION_ATTRIBUTE not in mesh.attributes:
+        return co
+    heights = readAttribute(mesh, HEIGHT_ATTRIBUTE)
+    if len(heights) != len(co):
+        return co
+    return displace(co, readAttribute(mesh, DIRECTION_ATTRIBUTE), heights, displacement["amplitude"])
 
 
-def normalizeVert(v, radius):
+def readMorphVertices(mesh):
     """
-    Normalize vertex <v> by placing it at distance <radius> from the origin along the same normal direction
+    return the vertices a morph starts from: the cached directions of a displaced sphere (its vertices are off the
+    sphere), else the current vertices
 
-    :param vertex v: vertex
-    :param float radius:
+    :param Mesh mesh:
+    :return np.ndarray: (N, 3) vertices or unit directions
     """
-    # calculate current distance
-    dist = (v.co.x ** 2 + v.co.y ** 2 + v.co.z ** 2) ** 0.5
+    if DIRECTION_ATTRIBUTE in mesh.attributes and len(mesh.attributes[DIRECTION_ATTRIBUTE].data) == len(mesh.vertices):
+        return readAttribute(mesh, DIRECTION_ATTRIBUTE)
+    return readVertices(mesh)
+
 
-    # normalize
-    for axis in range(3):
-        v.co[axis] = v.co[axis] / dist * radius
+def clearDisplacement(mesh):
+    for name in (HEIGHT_ATTRIBUTE, DIRECTION_ATTRIBUTE):
+        attribute = mesh.attributes.get(name)
+        if attribute is not None:
+            mesh.attributes.remove(attribute)
 
 
-def normalize(coords, radius):
+def resampleDisplacement(mesh):
     """
-    Normalize a list of 3 coordinates relative to the origin
+    sample the heights again after a change of the displacement source, from the directions of the current vertices
 
-    :param coords:
-    :param radius:
-    :return co:
+    :param Mesh mesh:
+    :return bool: False if the directions are unknown (the sphere must be rebuilt)
     """
-    co = coords.copy()
-    # calculate current distance
-    dist = (coords[0] ** 2 + coords[1] ** 2 + coords[2] ** 2) ** 0.5
-    # normalize
-    for axis in range(3):
-        co[axis] = coords[axis] / dist * radius
-    return co
+    displacement = getDisplacementParams(mesh.SphereTopology)
+    if displacement is None:
+        clearDisplacement(mesh)
+        return True
+    if DIRECTION_ATTRIBUTE in mesh.attributes:
+        directions = readAttribute(mesh, DIRECTION_ATTRIBUTE)
+    else:
+        # the vertices are not displaced yet
+        directions = sphereDirections(readVertices(mesh), getOriginalVertices(mesh) if hasOriginalVertices(mesh) else None)
+    if len(directions) != len(mesh.vertices):
+        return False
+    writeAttribute(mesh, HEIGHT_ATTRIBUTE, sampleSphereHeights(displacement, directions), "POINT", "FLOAT")
+    writeAttribute(mesh, DIRECTION_ATTRIBUTE, directions, "POINT", "FLOAT_VECTOR")
+    return True
+
+
+def hasOriginalVertices(mesh):
+    return ORIGIN_ATTRIBUTE in mesh.attributes or "verts" in mesh
+
 
+def getOriginalVertices(mesh):
+    """
+    return the original vertices (used by the stereographic projection) as a (N, 3) array. They are read from the
+    sphere_origin attribute, or from the mesh["verts"] list property of files saved by older versions
 
-def getFlatAngle(vert):
-    return atan2(vert[1], vert[0])+2*pi
+    :param Mesh mesh:
+    :return np.ndarray:
+    """
+    if ORIGIN_ATTRIBUTE in mesh.attributes:
+        return readAttribute(mesh, ORIGIN_ATTRIBUTE)
+    return np.array([tuple(co) for co in mesh["verts"]], dtype=np.float32).reshape(-1, 3)
 
 
-def insertFace(bm, v):
+def getSphereParams(props):
     """
-    insert face using an array of vertices indices
+    snapshot the SphereTopology properties into a plain dict, so that they can be safely read outside the main thread
 
-    :param bm:
-    :param v: list of vertices indices
+    :param props: mesh.SphereTopology
+    :return dict:
     """
-    a = []
-    for k in range(len(v)):
-        a.append(bm.verts[v[k]])
-    f = bm.faces.new(a)
-    bm.faces.ensure_lookup_table()
-    return f
+    return {
+        "type": props.sphere_type,
+        "radius": props.sphere_radius,
+        "resolution": props.sphere_resolution,
+        "resolution2": props.sphere_resolution2,
+        "transform": props.sphere_transform,
+        "transform2": props.sphere_transform2,
+        "reorder": props.sphere_reorder,
+        "displacement": getDisplacementParams(props),
+    }
 
 
 def setSphereUpdated(props):
     props.sphere_old_resolution = props.sphere_resolution * props.sphere_resolution2 + props.sphere_transform2
     props.sphere_old_transradius = props.sphere_transform + props.sphere_radius
+    props.sphere_old_amplitude = props.sphere_displace_amplitude
 
 
-def sphereUpdateIfNeeded(mesh):
-    props = mesh.SphereTopology
+def getRequiredUpdate(props):
+    """
+    return which kind of update the sphere needs after a change of its properties
+
+    :param props: mesh.SphereTopology
+    :return str: "resolution" if the vertex structure changed, "morph" if only radius/transform/amplitude changed, else
+        None
+    """
     if props.sphere_old_resolution != props.sphere_resolution * props.sphere_resolution2 + props.sphere_transform2:
-        main.modules[props.sphere_type].updateSphereResolution(mesh)
-    elif props.sphere_old_transradius != props.sphere_transform + props.sphere_radius:
-        main.modules[props.sphere_type].morphSphere(mesh)
+        return "resolution"
+    if props.sphere_old_transradius != props.sphere_transform + props.sphere_radius or \
+            props.sphere_old_amplitude != props.sphere_displace_amplitude:
+        return "morph"
+    return None
+
+
+def sphereUpdateIfNeeded(mesh, modules):
+    """
+    rebuild or morph <mesh> if its properties changed since the last update
+
+    :param mesh:
+    :param dict modules: sphere_type -> topology module
+    :return bool: True if the mesh was updated
+    """
+    props = mesh.SphereTopology
+    update = getRequiredUpdate(props)
+    if update is None:
+        profiling.countEvent("sphere.upToDate")
+        return False
+    with profiling.stage("sphereUpdateIfNeeded", update=update):
+        if update == "resolution":
+            modules[props.sphere_type].updateSphereResolution(mesh)
+        else:
+            modules[props.sphere_type].morphSphere(mesh)
+    return True
 
 
 def printAllProps(props):
@@ -0,0 +1,82 @@
+import bpy
+import numpy as np
+from bpy.props import IntProperty, FloatProperty, EnumProperty, StringProperty
+from core.arrays import unflattenFaces
+from core.geodesics import SurfaceGraph
+from funcs.general_functions import readMeshArrays, writeAttribute
+
+'''Distance of every vertex of the active mesh from the selected vertices, written into a point attribute (e.g. to drive
+shaders or geometry nodes): geodesic distance along the edges or number of rings'''
+
+# mesh name -> (hash of the faces, SurfaceGraph), so that new queries on the same mesh only update the edge lengths
+graph_cache = {}
+
+
+def getSurfaceGraph(mesh, verts, loops, totals):
+    """
+    edge graph of <mesh>, built again only if its faces changed
+
+    :return SurfaceGraph:
+    """
+    key = hash((loops.tobytes(), totals.tobytes()))
+    cached = graph_cache.get(mesh.name)
+    if cached is not None and cached[0] == key:
+        cached[1].setVertices(verts)
+        return cached[1]
+    graph = SurfaceGraph(verts, unflattenFaces(loops, totals))
+    graph_cache[mesh.name] = (key, graph)
+    return graph
+
+
+class MESH_OT_geodesicDistance(bpy.types.Operator):
+    """Write the distance of each vertex from the selected vertices into a point attribute"""
+    bl_idname = "mesh.sphere_geodesic_distance"
+    bl_label = "Distance from selection"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    # noinspection PyTypeChecker
+    mode: EnumProperty(
+        name="Distance",
+        items=[
+            ("GEODESIC", "Geodesic", "length of the shortest path along the edges (arcs on the sphere)"),
+            ("RINGS", "Rings", "number of edges of the shortest path (k-ring), -1 past the maximum"),
+        ],
+        default="GEODESIC"
+    )
+    limit: FloatProperty(name="Max distance", description="0 for no limit (unreached vertices get -1)", default=0,
+                         min=0)
+    rings: IntProperty(name="Max rings", description="0 for no limit", default=0, min=0)
+    attribute: StringProperty(name="Attribute", default="distance")
+
+    @classmethod
+    def poll(self, context):
+        # the selection and the attribute are only in sync with the mesh in object mode
+        return context.object is not None and context.object.type == 'MESH' and context.object.mode == 'OBJECT'
+
+    def execute(self, context):
+        mesh = context.object.data
+        selected = np.zeros(len(mesh.vertices), dtype=bool)
+        mesh.vertices.foreach_get("select", selected)
+        sources = np.flatnonzero(selected)
+        if len(sources) == 0:
+            self.report({'ERROR'}, "No vertices selected")
+            return {'CANCELLED'}
+
+        graph = getSurfaceGraph(mesh, *readMeshArrays(mesh))
+        if self.mode == "GEODESIC":
+            distance = graph.geodesicDistance(sources, self.limit if self.limit > 0 else np.inf)
+            writeAttribute(mesh, self.attribute, np.where(np.isfinite(distance), distance, -1), "POINT", "FLOAT")
+        else:
+            ring = graph.ringDistance(sources, self.rings if self.rings > 0 else None)
+            writeAttribute(mesh, self.attribute, ring, "POINT", "INT")
+        mesh.update()
+
+        return {'FINISHED'}
+
+
+def register():
+    bpy.utils.register_class(MESH_OT_geodesicDistance)
+
+
+def unregister():
+    bpy.utils.unregister_class(MESH_OT_geodesicDistance)
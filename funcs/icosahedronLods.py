@@ -0,0 +1,61 @@
+import bpy
+import numpy as np
+from bpy.props import IntProperty, FloatProperty, EnumProperty
+from core.generators import icosphereLods, icosphereVertexCount, stackLods
+from funcs.general_functions import createNewEmptyObject, writeMeshArrays, writeAttribute
+
+'''Create a chain of Icosahedron levels of detail sharing the same vertices: the vertices of each level are the first
+vertices of the next one, so all the levels are generated in a single pass'''
+
+
+class MESH_OT_createIcosahedronLods(bpy.types.Operator):
+    """Create several levels of detail of the Icosahedron at once"""
+    bl_idname = "mesh.create_icosahedron_lods"
+    bl_label = "Icosahedron LODs"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    min_level: IntProperty(name="Coarsest level", default=2, min=0, max=10)
+    max_level: IntProperty(name="Finest level", default=6, min=0, max=10)
+    radius: FloatProperty(name="Radius", default=2)
+    mode: EnumProperty(
+        name="Output",
+        items=[
+            ("SINGLE", "Single mesh", "one mesh with the faces of all the levels, the level of each face is stored in the "
+                                      "\"lod\" face attribute"),
+            ("SEPARATE", "Separate meshes", "one object for each level, each one with its own copy of the first vertices "
+                                            "of the finest level"),
+        ],
+        default="SINGLE"
+    )
+
+    def execute(self, context):
+        levels = list(range(min(self.min_level, self.max_level), max(self.min_level, self.max_level) + 1))
+        verts, lods = icosphereLods(levels, self.radius)
+
+        if self.mode == "SINGLE":
+            (obj, mesh) = createNewEmptyObject("Icosahedron LODs")
+            faces, starts = stackLods(lods)
+            writeMeshArrays(mesh, verts, faces)
+            level_of_face = np.repeat(levels, np.diff(starts))
+            writeAttribute(mesh, "lod", level_of_face, "FACE", "INT")
+            # the faces of levels[i] are the range lod_face_starts[i]:lod_face_starts[i + 1]
+            mesh["lod_levels"] = levels
+            mesh["lod_face_starts"] = starts.tolist()
+        else:
+            # Blender meshes can't share vertices, only the single mesh avoids the copies
+            for level, faces in zip(levels, lods):
+                (obj, mesh) = createNewEmptyObject("Icosahedron LOD %d" % level)
+                writeMeshArrays(mesh, verts[:icosphereVertexCount(level)], faces)
+                mesh["lod_level"] = level
+
+        obj.select_set(True)
+        self.report({'INFO'}, "created %d levels of detail" % len(levels))
+        return {'FINISHED'}
+
+
+def register():
+    bpy.utils.register_class(MESH_OT_createIcosahedronLods)
+
+
+def unregister():
+    bpy.utils.unregister_class(MESH_OT_createIcosahedronLods)
@@ -0,0 +1,81 @@
+import bpy
+from bpy_extras.io_utils import ExportHelper
+from core import profiling
+
+'''Operators to enable, reset and export the per-stage timings of the sphere updates (see core.profiling)'''
+
+
+class MESH_OT_toggleProfiling(bpy.types.Operator):
+    """Record the duration of each stage of the sphere updates"""
+    bl_idname = "mesh.sphere_toggle_profiling"
+    bl_label = "Toggle profiling"
+
+    def execute(self, context):
+        profiling.enable(not profiling.enabled)
+        return {'FINISHED'}
+
+
+class MESH_OT_resetProfiling(bpy.types.Operator):
+    """Clear the recorded stages and counters"""
+    bl_idname = "mesh.sphere_reset_profiling"
+    bl_label = "Reset profiling"
+
+    def execute(self, context):
+        profiling.reset()
+        return {'FINISHED'}
+
+
+class MESH_OT_exportProfiling(bpy.types.Operator, ExportHelper):
+    """Export the recorded stages as a Chrome trace (open it in chrome://tracing or ui.perfetto.dev)"""
+    bl_idname = "mesh.sphere_export_profiling"
+    bl_label = "Export trace"
+
+    filename_ext = ".json"
+
+    def execute(self, context):
+        profiling.exportChromeTrace(self.filepath)
+        self.report({'INFO'}, "exported %d stages to %s" % (len(profiling.records), self.filepath))
+        return {'FINISHED'}
+
+
+def drawBreakdown(layout):
+    """
+    draw the stages of the latest profiled operation of the main thread and of the latest one of the worker threads
+    (background rebuilds, parallel evaluation), indented by depth
+
+    :param layout: UILayout
+    """
+    col = layout.column(align=True)
+    drawStages(col, profiling.getLatestBreakdown())
+    thread, breakdown = profiling.getBackgroundBreakdown()
+    if breakdown:
+        col.separator()
+        col.label(text="background (%s):" % thread)
+        drawStages(col, breakdown)
+    for name, value in sorted(profiling.counters.items()):
+        col.label(text="%s: %d" % (name, value))
+
+
+def drawStages(col, breakdown):
+    for name, duration, depth, counts in breakdown:
+        text = "%s%s: %.2f ms" % ("    " * depth, name, duration * 1000)
+        if counts:
+            text += "  (%s)" % ", ".join("%s=%s" % item for item in counts.items())
+        col.label(text=text)
+
+
+classes = [
+    MESH_OT_toggleProfiling,
+    MESH_OT_resetProfiling,
+    MESH_OT_exportProfiling
+]
+
+
+def register():
+    for cls in classes:
+        bpy.utils.register_class(cls)
+
+
+def unregister():
+    for cls in classes:
+        bpy.utils.unregister_class(cls)
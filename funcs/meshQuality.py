@@ -0,0 +1,52 @@
+import bpy
+import json
+from bpy.props import BoolProperty, StringProperty
+from core.quality import meshQuality
+from funcs.general_functions import readMeshArrays, writeAttribute
+
+'''Quality metrics of the active mesh (see core.quality): the summary is reported and printed to the console, the per
+face metrics can be written into face attributes (e.g. to color the faces by quality in the viewport)'''
+
+
+class MESH_OT_meshQuality(bpy.types.Operator):
+    """Compute the quality metrics of the active mesh"""
+    bl_idname = "mesh.sphere_quality"
+    bl_label = "Mesh quality"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    write_attributes: BoolProperty(name="Write attributes", description="write the metrics of each face into face "
+                                                                        "attributes", default=False)
+    prefix: StringProperty(name="Prefix", default="quality_")
+
+    @classmethod
+    def poll(self, context):
+        # the attributes are only in sync with the mesh in object mode
+        return context.object is not None and context.object.type == 'MESH' and context.object.mode == 'OBJECT'
+
+    def execute(self, context):
+        mesh = context.object.data
+        verts, loops, totals = readMeshArrays(mesh)
+        if len(totals) == 0:
+            self.report({'ERROR'}, "The mesh has no faces")
+            return {'CANCELLED'}
+
+        # flat loops: the metrics are in the order of the polygons
+        summary, metrics = meshQuality(verts, loops, return_faces=True, totals=totals)
+        print(json.dumps(summary, indent=1))
+        if self.write_attributes:
+            for name, values in metrics.items():
+                writeAttribute(mesh, self.prefix + name, values, "FACE", "FLOAT")
+            mesh.update()
+
+        self.report({'INFO'}, "min angle %.1f, edge ratio p99 %.2f, area std %.3f, delaunay %s (details in the console)" % (
+            summary["angle"]["min"], summary["edge_ratio"]["p99"], summary["relative_area"]["std"],
+            "-" if summary["delaunay"] is None else "%.4f" % summary["delaunay"]))
+        return {'FINISHED'}
+
+
+def register():
+    bpy.utils.register_class(MESH_OT_meshQuality)
+
+
+def unregister():
+    bpy.utils.unregister_class(MESH_OT_meshQuality)
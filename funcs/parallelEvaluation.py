@@ -0,0 +1,98 @@
+"""
+evaluation of the animated spheres on frame change
+
+In "parallel" mode the new geometry of all the spheres that need to be rebuilt or morphed is computed concurrently in a
+thread pool (the NumPy/SciPy kernels release the GIL), and only the final bulk write into each Mesh happens on the main
+thread.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from core import profiling
+from funcs.general_functions import getRequiredUpdate, getSphereParams, getOriginalVertices, hasOriginalVertices, \
+    readMorphVertices, commitSphere, commitMorph, sphereUpdateIfNeeded, computeHeights
+
+# "serial": update the spheres one after the other on the main thread
+# "parallel": compute the new geometry in a thread pool, then commit it on the main thread
+evaluation_mode = "parallel"
+max_workers = os.cpu_count() or 1
+
+_executor = None
+
+
+def getExecutor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="SphereTopologies")
+    return _executor
+
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+
+def computeUpdate(mod, update, params, co, origin):
+    """
+    compute the new geometry of a sphere (worker thread, must not access bpy data)
+
+    :return: computeSphere() result plus the displacement heights for "resolution" updates, computeMorph() result for
+        "morph" updates
+    """
+    if update == "resolution":
+        result = mod.computeSphere(params)
+        return result + (computeHeights(params, result[0], result[2]),)
+    return mod.computeMorph(params, co, origin)
+
+
+def evaluateSpheres(meshes, modules):
+    """
+    update all the <meshes> that changed since their last update
+
+    :param list meshes: meshes to update (usually the evaluated copies of the animated spheres)
+    :param dict modules: sphere_type -> topology module
+    :return int: number of updated meshes
+    """
+    if evaluation_mode == "serial":
+        return sum(1 for mesh in meshes if sphereUpdateIfNeeded(mesh, modules))
+
+    jobs = []
+    for mesh in meshes:
+        props = mesh.SphereTopology
+        update = getRequiredUpdate(props)
+        if update is None:
+            profiling.countEvent("sphere.upToDate")
+            continue
+        # read everything the worker needs here: bpy data must not be accessed outside the main thread
+        co = origin = None
+        if update == "morph":
+            co = readMorphVertices(mesh)
+            origin = getOriginalVertices(mesh) if hasOriginalVertices(mesh) else None
+        jobs.append((mesh, modules[props.sphere_type], update, getSphereParams(props), co, origin))
+    if not jobs:
+        # nothing changed on this frame, don't start the thread pool
+        return 0
+
+    with profiling.stage("evaluateSpheres.compute", spheres=len(jobs)):
+        if len(jobs) == 1:
+            results = [computeUpdate(*jobs[0][1:])]
+        else:
+            executor = getExecutor()
+            futures = [executor.submit(computeUpdate, *job[1:]) for job in jobs]
+            results = [f.result() for f in futures]
+
+    # commit on the main thread
+    with profiling.stage("evaluateSpheres.commit", spheres=len(jobs)):
+        for (mesh, mod, update, params, co, origin), result in zip(jobs, results):
+            if update == "resolution":
+                commitSphere(mesh, *result)
+            elif len(result) != len(mesh.vertices):
+                # the morph computed another vertex structure (the Spherified Cube and the Radial Sphere compute it from
+                # the resolution): their morphSphere rebuilds the mesh in that case
+                mod.morphSphere(mesh)
+            else:
+                commitMorph(mesh, result)
+
+    return len(jobs)
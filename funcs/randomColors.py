@@ -1,46 +1,80 @@
 import bpy
-import bmesh
-import random
+import numpy as np
+from bpy.props import IntProperty, EnumProperty
+from core import profiling
+from core.coloring import faceAdjacency, randomColoring, greedyColoring
+from core.meshTransfer import readFaceArrays, writeMaterialIndices
 
 '''This function/operator was made to generate a different color for each face based on the already present materials of the currently select model in Blender'''
 
+# mesh name -> (hash of the faces, face adjacency), so that recoloring the same mesh doesn't rebuild the adjacency
+adjacency_cache = {}
+
+
+def getFaceAdjacency(mesh, loops, totals):
+    """
+    face adjacency of <mesh>, computed again only if its faces changed
+
+    :return (np.ndarray, np.ndarray): see core.coloring.faceAdjacency
+    """
+    key = hash((loops.tobytes(), totals.tobytes()))
+    cached = adjacency_cache.get(mesh.name)
+    if cached is not None and cached[0] == key:
+        profiling.countEvent("faceAdjacency.cache.hit")
+        return cached[1]
+    profiling.countEvent("faceAdjacency.cache.miss")
+    adjacency = faceAdjacency(loops, totals)
+    adjacency_cache[mesh.name] = (key, adjacency)
+    return adjacency
+
 
 class MESH_OT_randomizeColors(bpy.types.Operator):
     bl_idname = "mesh.randomize_colors"
     bl_label = "Randomize face materials"
     bl_description = "for each face of the current object, randomly select one material from the available ones in the material panel that has prefix \"RND_\""
+    bl_options = {'REGISTER', 'UNDO'}
+
+    seed: IntProperty(name="Seed", default=0)
+    # noinspection PyTypeChecker
+    mode: EnumProperty(
+        name="Mode",
+        items=[
+            ("RANDOM", "Random", "pick a random material for each face"),
+            ("NO_ADJACENT", "No adjacent duplicates",
+             "faces sharing an edge never get the same material (may need more materials than available)"),
+        ],
+        default="RANDOM"
+    )
 
     @classmethod
     def poll(self, context):
-        return context.object is not None
+        # material indices written in object mode would be overwritten when leaving edit mode
+        return context.object is not None and context.object.type == 'MESH' and context.object.mode == 'OBJECT'
 
     # noinspection PyTypeChecker
     def execute(self, context):
-        obj = bpy.context.object
-        all_materials = []
-        for mat in obj.data.materials:
-            if mat is not None and mat.name[:4] == "RND_":
-                all_materials.append(mat)
+        mesh = context.object.data
+        slots = np.array([i for i, mat in enumerate(mesh.materials) if mat is not None and mat.name[:4] == "RND_"],
+                         dtype=np.int32)
 
-        if len(all_materials) == 0:
+        if len(slots) == 0:
             self.report({'ERROR'}, "No materials present with prefix \"RND_\"")
             return {'CANCELLED'}
 
-        bpy.ops.object.mode_set(mode='EDIT')
-
-        bm = bmesh.from_edit_mesh(obj.data)
-
-        bm.select_mode = {'FACE'}
-        prev_face = None
-        for face in bm.faces:
-            face.select_set(True)
-            if prev_face is not None:
-                prev_face.select_set(False)
-            face.material_index = random.randint(0, len(all_materials) - 1)
-            prev_face = face
+        with profiling.stage("randomizeColors", faces=len(mesh.polygons)):
+            if self.mode == "RANDOM":
+                colors = randomColoring(len(mesh.polygons), len(slots), self.seed)
+            else:
+                loops, totals = readFaceArrays(mesh)
+                colors = greedyColoring(*getFaceAdjacency(mesh, loops, totals), seed=self.seed)
+                n_colors = int(colors.max(initial=-1)) + 1
+                if n_colors > len(slots):
+                    self.report({'WARNING'}, "%d \"RND_\" materials are needed to avoid adjacent duplicates, found %d"
+                                % (n_colors, len(slots)))
+                # shuffle which material is used for each color, and wrap the extra colors if there aren't enough materials
+                colors = np.random.default_rng(self.seed).permutation(max(n_colors, len(slots)))[colors] % len(slots)
 
-        obj.data.update()
-        bpy.ops.object.mode_set(mode='OBJECT')
+            writeMaterialIndices(mesh, slots[colors])
 
         return {'FINISHED'}
 
@@ -0,0 +1,197 @@
+"""
+registry of the meshes generated by the Sphere Topologies package
+
+The frame change handler only needs to visit the spheres whose SphereTopology properties are animated (fcurves or
+drivers), so instead of scanning every object of the scene on each frame we keep track of the generated meshes here.
+The names of the meshes used by the objects of each scene are cached as well, and only computed again after an edit
+that can change them (objects added, removed or given another mesh, undo, file load).
+The registry is keyed by mesh name: names are stable across undo and file reload, while python references are not.
+"""
+
+import bpy
+from bpy.app.handlers import persistent
+
+DATA_PATH_PREFIX = "SphereTopology."
+
+# mesh name -> True if some SphereTopology property is animated
+spheres = {}
+# scene name -> names of the meshes of its objects, see getSceneMeshes
+scene_meshes = {}
+# statistics of the last handled frame
+frame_stats = {"frame": None, "registered": 0, "visited": 0, "updated": 0, "skipped": 0}
+
+
+def add(mesh):
+    """
+    add <mesh> to the registry (or refresh its animation flag if already present)
+
+    :param Mesh mesh:
+    """
+    if mesh.name not in spheres:
+        # new, duplicated or renamed mesh: the cached names of the scene meshes may miss it
+        scene_meshes.clear()
+    spheres[mesh.name] = isAnimated(mesh)
+
+
+def remove(mesh_name):
+    """
+    remove mesh with name <mesh_name> from the registry, if present
+
+    :param str mesh_name:
+    """
+    spheres.pop(mesh_name, None)
+
+
+def clear():
+    spheres.clear()
+    scene_meshes.clear()
+
+
+def rebuild():
+    """
+    rebuild the registry from scratch looking at all the meshes of the current file
+    """
+    spheres.clear()
+    scene_meshes.clear()
+    for mesh in bpy.data.meshes:
+        if mesh.SphereTopology.sphere_type != "null":
+            add(mesh)
+
+
+def isAnimated(mesh):
+    """
+    return True if at least one SphereTopology property of <mesh> is driven by fcurves, NLA strips or drivers
+
+    :param Mesh mesh:
+    :return bool:
+    """
+    anim = mesh.animation_data
+    if anim is None:
+        return False
+
+    actions = [anim.action] + [strip.action for track in anim.nla_tracks for strip in track.strips]
+    for action in actions:
+        if action is not None and any(fc.data_path.startswith(DATA_PATH_PREFIX) for fc in action.fcurves):
+            return True
+
+    return any(d.data_path.startswith(DATA_PATH_PREFIX) for d in anim.drivers)
+
+
+def getAnimatedMeshes(scene):
+    """
+    return the (original) meshes of the objects of <scene> with animated SphereTopology properties, pruning the
+    registered meshes that have been deleted
+
+    :param Scene scene:
+    :return list meshes:
+    """
+    in_scene = getSceneMeshes(scene)
+    meshes = []
+    for name, animated in list(spheres.items()):
+        if not animated:
+            continue
+        mesh = bpy.data.meshes.get(name)
+        if mesh is None or mesh.users == 0 or mesh.SphereTopology.sphere_type == "null":
+            remove(name)
+            continue
+        if name in in_scene:
+            meshes.append(mesh)
+    return meshes
+
+
+def getSceneMeshes(scene):
+    """
+    :param Scene scene:
+    :return frozenset: names of the meshes used by the objects of <scene>, cached until the next structural edit
+    """
+    names = scene_meshes.get(scene.name)
+    if names is None:
+        names = frozenset(obj.data.name for obj in scene.objects if obj.type == 'MESH')
+        scene_meshes[scene.name] = names
+    return names
+
+
+def refreshAnimated():
+    """
+    recompute the animation flag of every registered mesh (an edited action doesn't tell which meshes use it)
+    """
+    for name in list(spheres):
+        mesh = bpy.data.meshes.get(name)
+        if mesh is None:
+            remove(name)
+        else:
+            add(mesh)
+
+
+def recordFrame(frame, visited, updated):
+    """
+    store the counters of the last handled frame
+
+    :param int frame:
+    :param int visited: number of animated spheres of the scene visited by the handler
+    :param int updated: number of them that actually needed an update, the others are skipped
+    """
+    frame_stats["frame"] = frame
+    frame_stats["registered"] = len(spheres)
+    frame_stats["visited"] = visited
+    frame_stats["updated"] = updated
+    frame_stats["skipped"] = visited - updated
+
+
+def getFrameStats():
+    """
+    return a copy of the counters of the last handled frame (registered, visited, updated and skipped spheres)
+
+    :return dict:
+    """
+    return dict(frame_stats)
+
+
+'''
+                HANDLERS
+'''
+
+
+@persistent
+def onFileLoad(*args):
+    rebuild()
+
+
+@persistent
+def onDepsgraphUpdate(scene, depsgraph):
+    # catches new drivers, duplicated spheres (Shift+D copies the SphereTopology properties) and renames
+    action_changed = False
+    for update in depsgraph.updates:
+        if isinstance(update.id, (bpy.types.Scene, bpy.types.Collection)) or \
+                isinstance(update.id, bpy.types.Object) and not update.is_updated_transform:
+            # objects linked, unlinked or given another mesh (moving an object only updates its transform)
+            scene_meshes.clear()
+        if isinstance(update.id, bpy.types.Action):
+            # keyframes and fcurves added to or removed from an action
+            action_changed = True
+        elif isinstance(update.id, bpy.types.Mesh):
+            mesh = update.id.original
+            if mesh.SphereTopology.sphere_type != "null":
+                add(mesh)
+    if action_changed:
+        refreshAnimated()
+
+
+def register():
+    bpy.app.handlers.load_post.append(onFileLoad)
+    bpy.app.handlers.undo_post.append(onFileLoad)
+    bpy.app.handlers.redo_post.append(onFileLoad)
+    bpy.app.handlers.depsgraph_update_post.append(onDepsgraphUpdate)
+    try:
+        rebuild()
+    except AttributeError:
+        # bpy.data is not accessible while an addon is being registered, load_post will fill the registry
+        pass
+
+
+def unregister():
+    bpy.app.handlers.load_post.remove(onFileLoad)
+    bpy.app.handlers.undo_post.remove(onFileLoad)
+    bpy.app.handlers.redo_post.remove(onFileLoad)
+    bpy.app.handlers.depsgraph_update_post.remove(onDepsgraphUpdate)
+    clear()
@@ -0,0 +1,146 @@
+"""
+lazy registry of the sphere topologies
+
+A topology is declared with its label, the id of its creation operator and the entry point (module path) implementing
+it. Registering the add-on only registers a lightweight creation operator for each topology: the module itself (and
+its dependencies, e.g. SciPy for the Delaunay based spheres) is imported the first time a sphere of that topology is
+created or updated.
+
+The entry point module must define LABEL and the functions createSphere(operator, context),
+updateSphereResolution(mesh), morphSphere(mesh), computeSphere(params) and computeMorph(params, co, origin).
+Other add-ons can add their own topologies by calling registerTopology().
+"""
+
+import importlib
+from collections.abc import Mapping
+import bpy
+from core import profiling
+
+
+class TopologyEntry:
+    """
+    declaration of a topology
+
+    :param str label: sphere_type of the generated meshes, also used as menu label
+    :param str operator: bl_idname of the creation operator
+    :param str entry_point: module implementing the topology (e.g. "Topologies.Icosahedron")
+    :param str description: tooltip of the creation operator
+    :param tuple properties: SphereTopology properties shown in the panel besides radius, resolution and transform
+    """
+
+    def __init__(self, label, operator, entry_point, description="", properties=()):
+        self.label = label
+        self.operator = operator
+        self.entry_point = entry_point
+        self.description = description
+        self.properties = tuple(properties)
+        self.module = None
+        self.operator_class = None
+
+
+# label -> TopologyEntry, in declaration order
+topologies = {}
+registered = False
+
+
+def registerTopology(label, operator, entry_point, description="", properties=()):
+    """
+    declare a new topology. If the add-on is already registered, its creation operator is registered right away
+
+    :return TopologyEntry:
+    """
+    entry = TopologyEntry(label, operator, entry_point, description, properties)
+    if label in topologies:
+        unregisterOperator(topologies[label])
+    topologies[label] = entry
+    if registered:
+        registerOperator(entry)
+    return entry
+
+
+def getEntry(label):
+    return topologies[label]
+
+
+def getLabels():
+    return list(topologies)
+
+
+def isLoaded(label):
+    return topologies[label].module is not None
+
+
+def getModule(label):
+    """
+    return the module implementing the topology <label>, importing it on first use
+
+    :param str label:
+    :return module:
+    """
+    entry = topologies[label]
+    if entry.module is None:
+        with profiling.stage("importTopology", label=label):
+            entry.module = importlib.import_module(entry.entry_point)
+        profiling.countEvent("topology.import")
+    return entry.module
+
+
+class LazyModules(Mapping):
+    """
+    read only label -> module mapping over the registry, modules are imported when accessed
+    """
+
+    def __getitem__(self, label):
+        return getModule(label)
+
+    def __iter__(self):
+        return iter(topologies)
+
+    def __len__(self):
+        return len(topologies)
+
+
+modules = LazyModules()
+
+
+def makeOperator(entry):
+    """
+    creation operator of <entry>: it only imports the topology module when executed
+    """
+
+    def execute(self, context):
+        getModule(entry.label).createSphere(self, context)
+        return {'FINISHED'}
+
+    name = "MESH_OT_" + entry.operator.split(".")[-1]
+    return type(name, (bpy.types.Operator,), {
+        "__doc__": entry.description or "Create new " + entry.label,
+        "bl_idname": entry.operator,
+        "bl_label": entry.label,
+        "execute": execute,
+    })
+
+
+def registerOperator(entry):
+    entry.operator_class = makeOperator(entry)
+    bpy.utils.register_class(entry.operator_class)
+
+
+def unregisterOperator(entry):
+    if entry.operator_class is not None:
+        bpy.utils.unregister_class(entry.operator_class)
+        entry.operator_class = None
+
+
+def register():
+    global registered
+    for entry in topologies.values():
+        registerOperator(entry)
+    registered = True
+
+
+def unregister():
+    global registered
+    for entry in topologies.values():
+        unregisterOperator(entry)
+    registered = False
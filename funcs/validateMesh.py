@@ -0,0 +1,47 @@
+import bpy
+from bpy.props import BoolProperty, FloatProperty
+from core.arrays import unflattenFaces
+from core.validation import validateMesh, DUPLICATE_TOLERANCE
+from funcs.general_functions import readMeshArrays
+
+'''Topology validation of the active mesh (see core.validation)'''
+
+# topologies generated with seams, their duplicate vertices are expected
+SEAMED_TOPOLOGIES = ("Spherified Cube", "Radial Sphere")
+
+
+class MESH_OT_validateMesh(bpy.types.Operator):
+    """Check the topology of the active mesh (closed, manifold, oriented, no duplicates or degenerate faces)"""
+    bl_idname = "mesh.sphere_validate"
+    bl_label = "Validate topology"
+    bl_options = {'REGISTER'}
+
+    weld: BoolProperty(name="Ignore seams", description="merge the duplicate vertices before checking the topology "
+                                                       "(always done for the Spherified Cube and the Radial Sphere)",
+                       default=False)
+    tolerance: FloatProperty(name="Tolerance", description="vertices closer than this are duplicates",
+                             default=DUPLICATE_TOLERANCE, min=0, precision=7)
+
+    @classmethod
+    def poll(self, context):
+        return context.object is not None and context.object.type == 'MESH' and context.object.mode == 'OBJECT'
+
+    def execute(self, context):
+        mesh = context.object.data
+        verts, loops, totals = readMeshArrays(mesh)
+        weld = self.weld or mesh.SphereTopology.sphere_type in SEAMED_TOPOLOGIES
+        report = validateMesh(verts, unflattenFaces(loops, totals), self.tolerance, weld=weld)
+
+        if report["problems"]:
+            self.report({'WARNING'}, "; ".join(report["problems"]))
+        else:
+            self.report({'INFO'}, "valid (%d vertices, %d faces)" % (report["verts"], report["faces"]))
+        return {'FINISHED'}
+
+
+def register():
+    bpy.utils.register_class(MESH_OT_validateMesh)
+
+
+def unregister():
+    bpy.utils.unregister_class(MESH_OT_validateMesh)
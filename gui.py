@@ -1,7 +1,9 @@
 import bpy
 import main
-from Topologies import RandomSphere, FibonacciSphere, RadialSphere
-from funcs import randomColors, VoronoiRegions
+from core import profiling
+from funcs import randomColors, VoronoiRegions, instrumentation, topologyRegistry, icosahedronLods, \
+    batchCreation, geodesicDistance, adaptiveIcosphere, conwayOperators, meshQuality, \
+    validateMesh, attributeTransfer
 
 from bpy.props import (
     IntProperty,
@@ -15,16 +17,29 @@ from bpy.props import (
             PROPERTIES
 '''
 
-enum_items = [("null", " --- ", "not part of the Sphere Topology module")] + [(t[0], t[0], "") for t in
-                                                                              main.modules.items()]
+# items of sphere_type, rebuilt when a topology is registered. Blender doesn't copy the strings of dynamic items: the
+# list must stay referenced here
+enum_items = []
+
+
+def getTypeItems(self, context):
+    """
+    items of sphere_type, read from the topology registry so that the topologies registered after this module (e.g. by
+    other add-ons) can be set. The numbers are stored in the files: "null" is 0 and the topologies follow in their
+    registration order
+    """
+    labels = topologyRegistry.getLabels()
+    if len(enum_items) != len(labels) + 1 or any(item[0] != label for item, label in zip(enum_items[1:], labels)):
+        enum_items[:] = [("null", " --- ", "not part of the Sphere Topology module", 0)] + [
+            (label, label, "", i + 1) for i, label in enumerate(labels)]
+    return enum_items
 
 
 class MyProperties(bpy.types.PropertyGroup):
     # noinspection PyTypeChecker
     sphere_type: EnumProperty(
-        items=enum_items,
-        name="Type",
-        default="null"
+        items=getTypeItems,
+        name="Type"
     )
 
     sphere_radius: FloatProperty(
@@ -82,6 +97,89 @@ class MyProperties(bpy.types.PropertyGroup):
         min=0.0,
     )
 
+    sphere_old_amplitude: FloatProperty(
+        name="Old Amplitude",
+        description="displacement amplitude of the last update (if different then the current one the sphere needs "
+                    "a morph)",
+        default=0.0,
+        min=0.0,
+    )
+
+    sphere_smooth_normals: BoolProperty(
+        name="Smooth normals",
+        description="shade smooth with the exact normals of the sphere, computed from the vertex positions",
+        default=False,
+        update=main.updateNormals
+    )
+
+    sphere_analytic_normals: BoolProperty(
+        name="Analytic normals",
+        description="True if the last update wrote the exact normals of the sphere (the vertices lie on the sphere)",
+        default=False
+    )
+
+    sphere_reorder: BoolProperty(
+        name="Locality order",
+        description="sort vertices and faces along a space-filling curve (faster drawing and modifiers on big meshes, "
+                    "ignored by the Spherified Cube and the Radial Sphere, already in grid order)",
+        default=False,
+        update=main.updateResolution
+    )
+
+    sphere_displace: BoolProperty(
+        name="Displacement",
+        description="move the vertices along the normals of the sphere by a noise or a heightmap (planet terrain)",
+        default=False,
+        update=main.updateDisplacement
+    )
+
+    sphere_displace_source: EnumProperty(
+        items=[("FBM", "Noise", "fractal Perlin noise"),
+               ("EQUIRECTANGULAR", "Equirectangular map", "longitude/latitude heightmap, as the spherical UVs"),
+               ("CUBEMAP", "Cube map", "3 x 2 atlas of the faces of the cube, as the UVs of the Spherified Cube")],
+        name="Source",
+        default="FBM",
+        update=main.updateDisplacement
+    )
+
+    sphere_displace_amplitude: FloatProperty(
+        name="Amplitude",
+        description="displacement of a height of 1 (changing it doesn't sample the heights again)",
+        default=0.2,
+        min=0.0,
+        update=main.updateTransform
+    )
+
+    sphere_displace_frequency: FloatProperty(
+        name="Frequency",
+        description="size of the largest features of the noise: noise cells per unit of the sphere radius",
+        default=2.0,
+        min=0.0,
+        update=main.updateDisplacement
+    )
+
+    sphere_displace_octaves: IntProperty(
+        name="Octaves",
+        description="layers of detail of the noise",
+        default=6,
+        min=1,
+        max=16,
+        update=main.updateDisplacement
+    )
+
+    sphere_displace_seed: IntProperty(
+        name="Seed",
+        default=0,
+        min=0,
+        update=main.updateDisplacement
+    )
+
+    sphere_displace_image: PointerProperty(
+        name="Heightmap",
+        type=bpy.types.Image,
+        update=main.updateDisplacement
+    )
+
     sphere_do_update: BoolProperty(
         name="Update",
         default=False
@@ -112,11 +210,39 @@ class MESH_PT_sphere_topologies(bpy.types.Panel):
 
         layout.prop(mytool, "sphere_radius")
         layout.prop(mytool, "sphere_resolution")
-        if mytool.sphere_type == RadialSphere.LABEL:
+        entry = topologyRegistry.topologies.get(mytool.sphere_type)
+        if entry is not None and "sphere_resolution2" in entry.properties:
             layout.prop(mytool, "sphere_resolution2")
         layout.prop(mytool, "sphere_transform")
-        if mytool.sphere_type == RandomSphere.LABEL or mytool.sphere_type == FibonacciSphere.LABEL:
+        if entry is not None and "sphere_transform2" in entry.properties:
             layout.prop(mytool, "sphere_transform2")
+        layout.prop(mytool, "sphere_smooth_normals")
+        if mytool.sphere_smooth_normals and not mytool.sphere_analytic_normals:
+            # writeSphereNormals keeps the normals computed by Blender when the vertices are off the sphere
+            reason = "displaced" if mytool.sphere_displace and mytool.sphere_displace_amplitude > 0 else "not on a sphere"
+            layout.label(text="Using Blender normals: the vertices are %s" % reason, icon='INFO')
+        layout.prop(mytool, "sphere_reorder")
+
+        layout.prop(mytool, "sphere_displace")
+        if mytool.sphere_displace:
+            box = layout.box()
+            box.prop(mytool, "sphere_displace_source")
+            box.prop(mytool, "sphere_displace_amplitude")
+            if mytool.sphere_displace_source == "FBM":
+                box.prop(mytool, "sphere_displace_frequency")
+                box.prop(mytool, "sphere_displace_octaves")
+                box.prop(mytool, "sphere_displace_seed")
+            else:
+                box.template_ID(mytool, "sphere_displace_image", open="image.open")
+
+        # timings of the latest update
+        box = layout.box()
+        row = box.row(align=True)
+        row.operator("mesh.sphere_toggle_profiling", text="Profiling", depress=profiling.enabled)
+        row.operator("mesh.sphere_reset_profiling", text="", icon='TRASH')
+        row.operator("mesh.sphere_export_profiling", text="", icon='EXPORT')
+        if profiling.enabled:
+            instrumentation.drawBreakdown(box)
 
 
 '''
@@ -132,13 +258,22 @@ class MESH_MT_sphere_topology_menu(bpy.types.Menu):
 
     def draw(self, context):
         layout = self.layout
-        for mod in main.modules.values():
-            layout.operator(mod.OPERATOR)
+        for entry in topologyRegistry.topologies.values():
+            layout.operator(entry.operator)
+
+        layout.operator("mesh.create_icosahedron_lods")
+        layout.operator("mesh.create_sphere_batch")
+        layout.operator("mesh.create_adaptive_icosahedron")
 
         layout.separator()
 
         layout.operator("mesh.randomize_colors")
         layout.operator("mesh.transform_to_voronoi")
+        layout.operator("mesh.sphere_conway")
+        layout.operator("mesh.sphere_geodesic_distance")
+        layout.operator("mesh.sphere_quality")
+        layout.operator("mesh.sphere_validate")
+        layout.operator("mesh.sphere_transfer_attributes")
 
 
 def menu_func(self, context):
@@ -162,6 +297,15 @@ def register():
 
     randomColors.register()
     VoronoiRegions.register()
+    instrumentation.register()
+    icosahedronLods.register()
+    batchCreation.register()
+    geodesicDistance.register()
+    adaptiveIcosphere.register()
+    conwayOperators.register()
+    meshQuality.register()
+    validateMesh.register()
+    attributeTransfer.register()
     bpy.types.VIEW3D_MT_mesh_add.append(menu_func)
     bpy.types.Mesh.SphereTopology = PointerProperty(type=MyProperties)
 
@@ -172,5 +316,14 @@ def unregister():
 
     randomColors.unregister()
     VoronoiRegions.unregister()
+    instrumentation.unregister()
+    icosahedronLods.unregister()
+    batchCreation.unregister()
+    geodesicDistance.unregister()
+    adaptiveIcosphere.unregister()
+    conwayOperators.unregister()
+    meshQuality.unregister()
+    validateMesh.unregister()
+    attributeTransfer.unregister()
     bpy.types.VIEW3D_MT_add.remove(menu_func)
     del bpy.types.Mesh.SphereTopology
@@ -15,7 +15,8 @@
 
 bl_info = {
     "name": "Sphere Topologies",
-    "blender": (2, 80, 0),
+    # generic attributes with the "FACE" domain (sphere_origin, sphere_height, lod, ...) need 2.93
+    "blender": (2, 93, 0),
     "category": "Mesh",
 }
 
@@ -29,29 +30,35 @@ filePath = os.path.dirname(bpy.data.filepath)
 if filePath not in sys.path:
     sys.path.append(filePath)
 
+import time
+import Topologies  # declares the built-in topologies
 import gui
-from funcs import general_functions
-from Topologies import RandomSphere, FibonacciSphere, Icosahedron, SpherifiedCube, RadialSphere, TruncatedIcosahedron
-
-modules = {
-    RadialSphere.LABEL: RadialSphere,
-    SpherifiedCube.LABEL: SpherifiedCube,
-    Icosahedron.LABEL: Icosahedron,
-    TruncatedIcosahedron.LABEL: TruncatedIcosahedron,
-    RandomSphere.LABEL: RandomSphere,
-    FibonacciSphere.LABEL: FibonacciSphere
-}
+from core import profiling, arrays
+from funcs import general_functions, sphereRegistry, parallelEvaluation, backgroundRebuild, topologyRegistry
+
+# sphere_type -> topology module, each module is imported the first time it's accessed (see funcs.topologyRegistry)
+modules = topologyRegistry.modules
 previous_frame = -1
+rebuild_scheduler = None
+# duration (seconds) of the last call to register()
+registration_time = 0.
+# precision of the coordinates computed by the add-on (see core.arrays.setPrecision). "single" is opt-in: it halves the
+# memory of the generation, but it's process-global and changes the precision of every other user of core in Blender
+precision = "double"
 
 
 def trigger_update_on_frame_change(scene, depsgraph):
     global previous_frame
     if scene.frame_current != previous_frame:
         previous_frame = scene.frame_current
-        for obj in scene.objects:
-            if obj.type == 'MESH' and obj.data.SphereTopology.sphere_type != "null":
-                mesh_eval = obj.data.evaluated_get(depsgraph)
-                general_functions.sphereUpdateIfNeeded(mesh_eval)
+        # only the spheres of the scene with animated properties can change on frame change, the registry keeps track of
+        # them
+        with profiling.stage("frameChange", frame=scene.frame_current) as s:
+            animated = sphereRegistry.getAnimatedMeshes(scene)
+            meshes_eval = [mesh.evaluated_get(depsgraph) for mesh in animated]
+            updated = parallelEvaluation.evaluateSpheres(meshes_eval, modules)
+            s.count(visited=len(animated), updated=updated)
+        sphereRegistry.recordFrame(scene.frame_current, len(animated), updated)
 
 
 # function triggered by manual update of Resolution properties
@@ -64,7 +71,7 @@ def updateResolution(self=None, context=bpy.context):
     :param context:
     :return None:
     """
-    mesh = general_functions.getCurrentBMesh()
+    mesh = general_functions.getUpdatedMesh(self)
 
     if mesh is None or not mesh.SphereTopology.sphere_do_update:
         return
@@ -72,9 +79,57 @@ def updateResolution(self=None, context=bpy.context):
     _type = mesh.SphereTopology.sphere_type
     if _type == "null":
         print("Mesh was not created by the Sphere Topology module")
+    elif rebuild_scheduler is not None:
+        # import the topology module here rather than in the worker thread
+        topologyRegistry.getModule(_type)
+        # rebuild in background, the current mesh stays visible until the result of the latest request is ready
+        rebuild_scheduler.request(mesh.name, (_type, general_functions.getSphereParams(mesh.SphereTopology)))
     else:
         mod = modules[_type]
-        mod.updateSphereResolution(mesh)
+        with profiling.stage("updateResolution"):
+            mod.updateSphereResolution(mesh)
+
+
+def computeRebuild(job):
+    """
+    compute the geometry of a sphere (called by the background worker, must not access bpy data)
+
+    :param (str, dict) job: sphere_type and parameters of the sphere
+    :return: (verts, faces, original verts, uvs, displacement heights) arrays
+    """
+    _type, params = job
+    with profiling.stage("rebuild.compute", resolution=params["resolution"]):
+        result = modules[_type].computeSphere(params)
+        return result + (general_functions.computeHeights(params, result[0], result[2]),)
+
+
+def commitRebuild(mesh_name, job, result):
+    """
+    write the result of a background rebuild into its mesh (called on the main thread by the scheduler timer)
+
+    :param str mesh_name:
+    :param (str, dict) job:
+    :param result: return value of computeRebuild
+    """
+    mesh = bpy.data.meshes.get(mesh_name)
+    _type, params = job
+    if mesh is None or mesh.SphereTopology.sphere_type != _type:
+        return
+
+    props = mesh.SphereTopology
+    if params["displacement"] != general_functions.getDisplacementParams(props):
+        # the displacement changed while the rebuild was running, sample the heights again
+        result = result[:4]
+    general_functions.commitSphere(mesh, *result)
+
+    # radius/transform may have been changed while the rebuild was running
+    if params["radius"] != props.sphere_radius or params["transform"] != props.sphere_transform:
+        modules[_type].morphSphere(mesh)
+
+
+def registerTimer(callback, first_interval):
+    # persistent: loading a file doesn't remove the timer while a rebuild is running
+    bpy.app.timers.register(callback, first_interval=first_interval, persistent=True)
 
 
 # function triggered by manual update of transform/radius properties
@@ -87,44 +142,106 @@ def updateTransform(self=None, context=bpy.context):
     :param context:
     :return None:
     """
-    mesh = general_functions.getCurrentBMesh()
+    mesh = general_functions.getUpdatedMesh(self)
     if mesh is None or not mesh.SphereTopology.sphere_do_update:
         return
 
     _type = mesh.SphereTopology.sphere_type
     if _type == "null":
         print("Mesh was not created by the Sphere Topology module")
+    elif rebuild_scheduler is not None and rebuild_scheduler.isPending(mesh.name):
+        # the mesh still has the old vertex count, commitRebuild morphs the new one to the current radius/transform
+        return
     else:
         mod = modules[_type]
-        mod.morphSphere(mesh)
+        with profiling.stage("updateTransform"):
+            mod.morphSphere(mesh)
+
+
+# function triggered by the displacement properties (except the amplitude, which only morphs the sphere)
+def updateDisplacement(self=None, context=bpy.context):
+    """
+    Called when the displacement is toggled or its source changes.
+    Samples the heights again and morphs the sphere, without rebuilding it
+
+    :param self:
+    :param context:
+    :return None:
+    """
+    mesh = general_functions.getUpdatedMesh(self)
+    if mesh is None or not mesh.SphereTopology.sphere_do_update:
+        return
+
+    _type = mesh.SphereTopology.sphere_type
+    if _type == "null":
+        print("Mesh was not created by the Sphere Topology module")
+        return
+    with profiling.stage("updateDisplacement"):
+        if general_functions.resampleDisplacement(mesh):
+            modules[_type].morphSphere(mesh)
+        else:
+            modules[_type].updateSphereResolution(mesh)
+
+
+# function triggered by the Smooth normals property
+def updateNormals(self=None, context=bpy.context):
+    """
+    Called when the Smooth normals property changes.
+    Writes (or removes) the analytic normals of the sphere
+
+    :param self:
+    :param context:
+    :return None:
+    """
+    mesh = general_functions.getUpdatedMesh(self)
+    if mesh is None or not mesh.SphereTopology.sphere_do_update:
+        return
+
+    if mesh.SphereTopology.sphere_smooth_normals:
+        general_functions.writeSphereNormals(mesh, general_functions.readVertices(mesh))
+    else:
+        general_functions.clearNormals(mesh)
 
 
 def register():
+    global rebuild_scheduler, registration_time
+    begin = time.perf_counter()
     # TODO: for a regular addon, this duplicates should be removed (but useful when debugging stuff)
     try:
-        for mod in modules.values():
-            mod.unregister()
+        topologyRegistry.unregister()
     except RuntimeError:
         pass
     try:
         gui.unregister()
     except RuntimeError:
         pass
+    try:
+        sphereRegistry.unregister()
+    except ValueError:
+        pass
 
-    for mod in modules.values():
-        mod.register()
-
+    if precision != "double":
+        arrays.setPrecision(precision)
+    topologyRegistry.register()
     gui.register()
+    sphereRegistry.register()
+    rebuild_scheduler = backgroundRebuild.RebuildScheduler(computeRebuild, commitRebuild, registerTimer)
 
     bpy.app.handlers.frame_change_post.append(trigger_update_on_frame_change)
+    registration_time = time.perf_counter() - begin
 
 
 def unregister():
-    for mod in modules.values():
-        mod.unregister()
+    global rebuild_scheduler
+    topologyRegistry.unregister()
+    sphereRegistry.unregister()
+    parallelEvaluation.shutdown()
+    if rebuild_scheduler is not None:
+        rebuild_scheduler.shutdown()
+        rebuild_scheduler = None
     gui.unregister()
 
-    bpy.app.handlers.frame_change_pre.remove(trigger_update_on_frame_change)
+    bpy.app.handlers.frame_change_post.remove(trigger_update_on_frame_change)
 
 
 if __name__ == "__main__":
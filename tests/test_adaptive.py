@@ -0,0 +1,45 @@
+import math
+import numpy as np
+import pytest
+from core.adaptive import AdaptiveIcosphere, adaptiveIcosphere, angularCriterion, screenSpaceCriterion
+from core.generators import icosphere
+from core.validation import checkMesh
+
+
+@pytest.mark.parametrize("angle, max_level", [(0.05, 1), (0.05, 6), (0.3, 4), (1.2, 5)])
+def test_angular_refinement_is_a_closed_sphere(angle, max_level):
+    verts, faces = adaptiveIcosphere(angularCriterion((1, 2, 3), angle), max_level, radius=2.)
+    report = checkMesh(verts, faces)
+    assert report["euler"] == 2
+    np.testing.assert_allclose(np.linalg.norm(verts, axis=1), 2.)
+
+
+def test_screen_space_refinement_is_a_closed_sphere():
+    verts, faces = adaptiveIcosphere(screenSpaceCriterion((0, 0, 3), 8, 1000), 7)
+    checkMesh(verts, faces)
+    # the faces facing the camera are the smallest
+    centers = verts[faces].mean(axis=1)
+    area = np.linalg.norm(np.cross(verts[faces[:, 1]] - verts[faces[:, 0]], verts[faces[:, 2]] - verts[faces[:, 0]]),
+                          axis=1)
+    assert area[centers[:, 2] > 0.9].max() < area[centers[:, 2] < -0.9].min()
+
+
+def test_refining_everywhere_gives_the_icosphere():
+    verts, faces = adaptiveIcosphere(lambda corners, level: np.ones(len(corners), dtype=bool), 3)
+    expected_verts, expected_faces = icosphere(3)
+    assert len(verts) == len(expected_verts)
+    assert len(faces) == len(expected_faces)
+
+
+def test_moving_region_reuses_the_vertices():
+    sphere = AdaptiveIcosphere(max_level=5)
+    sphere.refine(angularCriterion((0, 0, 1), 0.2))
+    pool = len(sphere.verts)
+    # the same region again doesn't create vertices
+    sphere.refine(angularCriterion((0, 0, 1), 0.2))
+    assert len(sphere.verts) == pool
+
+    verts, faces = sphere.refine(angularCriterion((math.sin(0.1), 0, math.cos(0.1)), 0.2))
+    checkMesh(verts, faces)
+    # most of the vertices of the moved region were created by the first refinement
+    assert len(sphere.verts) - pool < len(verts) / 4
@@ -0,0 +1,116 @@
+from concurrent.futures import Future
+from funcs.backgroundRebuild import RebuildScheduler
+
+
+class ImmediateExecutor:
+    """runs the computations when they are submitted"""
+
+    def submit(self, function, *args):
+        future = Future()
+        try:
+            future.set_result(function(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def shutdown(self, wait=True):
+        pass
+
+
+class FakeTimer:
+    """collects the callbacks registered like bpy.app.timers.register, and calls them like Blender does"""
+
+    def __init__(self):
+        self.callbacks = []
+
+    def register(self, callback, first_interval):
+        self.callbacks.append(callback)
+
+    def run(self):
+        """call the registered callbacks until they stop, a callback that raises is unregistered as in Blender"""
+        while self.callbacks:
+            callback = self.callbacks.pop()
+            try:
+                if callback() is not None:
+                    self.callbacks.append(callback)
+            except Exception:
+                pass
+
+
+def makeScheduler(compute):
+    timer = FakeTimer()
+    committed = []
+    failures = []
+    scheduler = RebuildScheduler(compute, lambda key, params, result: committed.append((key, result)),
+                                 timer.register, delay=0, clock=lambda: 0., executor=ImmediateExecutor(),
+                                 report=lambda key, params, e: failures.append((key, e)))
+    return scheduler, timer, committed, failures
+
+
+def test_commits_latest_request():
+    scheduler, timer, committed, failures = makeScheduler(lambda params: params * 2)
+    scheduler.request("a", 1)
+    scheduler.request("a", 2)
+    scheduler.request("b", 3)
+    timer.run()
+    assert sorted(committed) == [("a", 4), ("b", 6)]
+    assert failures == []
+    assert not scheduler.timer_active
+
+
+def test_failed_compute_is_reported_and_later_requests_run():
+    def compute(params):
+        if params == "bad":
+            raise ValueError("qhull failed")
+        return params
+
+    scheduler, timer, committed, failures = makeScheduler(compute)
+    scheduler.request("a", "bad")
+    scheduler.request("b", "good")
+    timer.run()
+    assert committed == [("b", "good")]
+    assert [(key, str(e)) for key, e in failures] == [("a", "qhull failed")]
+    assert not scheduler.timer_active
+
+    # the timer is registered again for the next request
+    scheduler.request("a", "fixed")
+    assert scheduler.timer_active and len(timer.callbacks) == 1
+    timer.run()
+    assert committed[-1] == ("a", "fixed")
+
+
+def test_failed_commit_is_reported():
+    timer = FakeTimer()
+    failures = []
+
+    def commit(key, params, result):
+        raise RuntimeError("mesh removed")
+
+    scheduler = RebuildScheduler(lambda params: params, commit, timer.register, delay=0, clock=lambda: 0.,
+                                 executor=ImmediateExecutor(), report=lambda key, params, e: failures.append(key))
+    scheduler.request("a", 1)
+    timer.run()
+    assert failures == ["a"]
+    assert not scheduler.timer_active
+
+
+def test_timer_active_is_reset_when_the_callback_raises():
+    scheduler, timer, committed, failures = makeScheduler(lambda params: params)
+
+    def submit(function, *args):
+        raise RuntimeError("executor shut down")
+
+    scheduler.executor.submit = submit
+    scheduler.request("a", 1)
+    timer.run()
+    assert not scheduler.timer_active
+
+
+def test_is_pending_until_the_result_is_committed():
+    scheduler, timer, committed, failures = makeScheduler(lambda params: params)
+    assert not scheduler.isPending("a")
+    scheduler.request("a", 1)
+    assert scheduler.isPending("a") and not scheduler.isPending("b")
+    timer.run()
+    assert committed == [("a", 1)]
+    assert not scheduler.isPending("a")
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+from core.batch import main, run
+
+
+def readDirections(path):
+    verts = np.load(path)["verts"]
+    return verts / np.linalg.norm(verts, axis=1)[:, None]
+
+
+def test_random_variants_get_their_own_seed_in_the_workers(tmp_path):
+    grid = [{"n": 200, "radius": 1.}, {"n": 200, "radius": 2.}]
+    stats = run("random", grid, str(tmp_path), "npz", workers=2, seed=7)
+    assert stats["seed"] == 7
+
+    first = readDirections(tmp_path / "random_n-200_radius-1.0.npz")
+    second = readDirections(tmp_path / "random_n-200_radius-2.0.npz")
+    assert not np.allclose(first, second)
+
+    # the same base seed gives the same variants
+    run("random", grid[:1], str(tmp_path / "again"), "npz", workers=1, seed=7)
+    np.testing.assert_array_equal(readDirections(tmp_path / "again" / "random_n-200_radius-1.0.npz"), first)
+
+
+def test_unknown_parameters_are_rejected(tmp_path, capsys):
+    with pytest.raises(SystemExit):
+        main(["icosahedron", "--param", "levels=1:2", "--out", str(tmp_path)])
+    assert "unknown parameter 'levels'" in capsys.readouterr().err
+    assert not list(tmp_path.iterdir())
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from core.arrays import faceBlocks, faceCount, flattenFaces
+from core.arrayMesh import ArrayMesh
+from core.conway import conway
+from core.generators import icosphere, spherifiedCube
+from core.validation import checkMesh
+
+
+def counts(verts, faces):
+    return len(verts), ArrayMesh(verts, *flattenFaces(faces)).n_edges, faceCount(faces)
+
+
+def sides(faces):
+    return {block.shape[1]: len(block) for block in faceBlocks(faces)}
+
+
+def expectedCounts(op, v, e, f):
+    return {
+        "d": (f, e, v),
+        "t": (2 * e, 3 * e, v + f),
+        "k": (v + f, 3 * e, 2 * e),
+        "a": (e, 2 * e, v + f),
+        "c": (v + 2 * e, 4 * e, f + e),
+    }[op]
+
+
+# (generator, vertices, edges and faces once the seams are welded)
+BASES = [
+    (lambda: icosphere(0), (12, 30, 20)),
+    (lambda: icosphere(1), (42, 120, 80)),
+    (lambda: spherifiedCube(1), (8, 12, 6)),
+]
+
+
+@pytest.mark.parametrize("generate, expected", BASES)
+@pytest.mark.parametrize("notation", ["d", "t", "k", "a", "c", "dk", "tk", "cd", "ak"])
+def test_operators_give_the_expected_counts(generate, expected, notation):
+    verts, faces = generate()
+    for op in reversed(notation):
+        expected = expectedCounts(op, *expected)
+
+    verts, faces = conway(notation, verts, faces, radius=1.)
+    report = checkMesh(verts, faces)
+    assert report["euler"] == 2
+    assert counts(verts, faces) == expected
+
+
+def test_icosahedron_derivatives():
+    verts, faces = icosphere(0)
+    assert sides(conway("d", verts, faces)[1]) == {5: 12}
+    assert sides(conway("t", verts, faces)[1]) == {5: 12, 6: 20}
+    assert sides(conway("k", verts, faces)[1]) == {3: 60}
+    assert sides(conway("a", verts, faces)[1]) == {3: 20, 5: 12}
+    assert sides(conway("c", verts, faces)[1]) == {3: 20, 6: 30}
@@ -0,0 +1,26 @@
+import numpy as np
+from core.arrays import setPrecision, getPrecision
+from core.delaunay import delaunay
+from core.generators import randomPoints
+
+
+def sortedFaces(faces):
+    faces = np.sort(faces, axis=1)
+    return faces[np.lexsort(faces.T[::-1])]
+
+
+def test_single_precision_triangulation_matches_double():
+    # at this density a projection computed in float32 flips edges of nearly cocircular points
+    points = randomPoints(50000, 1., 0)
+    # the points on the projection pole are moved by a random offset
+    np.random.seed(0)
+    _, double = delaunay(points)
+    previous = getPrecision()
+    setPrecision("single")
+    try:
+        np.random.seed(0)
+        verts, single = delaunay(points)
+    finally:
+        setPrecision(previous)
+    assert verts.dtype == np.float32
+    np.testing.assert_array_equal(sortedFaces(single), sortedFaces(double))
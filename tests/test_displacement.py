@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+from core import displacement
+from core.displacement import displaceSphere, fbm, sampleCubeMap, sampleEquirectangular
+from core.generators import fibonacciPoints, icosphere
+from core.spatialIndex import cubeMapCoordinates
+
+GRADIENT_IMAGE = np.linspace(-1, 1, 64 * 128).reshape(64, 128)
+
+
+@pytest.mark.parametrize("params", [{"octaves": 1, "frequency": 4.}, {"octaves": 6, "seed": 3},
+                                    {"source": "equirectangular", "image": GRADIENT_IMAGE}])
+def test_displacement_stays_within_the_amplitude(params):
+    verts, _ = icosphere(5, radius=2.)
+    displaced, heights = displaceSphere(verts, params, radius=2., amplitude=0.3)
+    assert np.all(np.abs(heights) <= 1)
+    radii = np.linalg.norm(displaced, axis=1)
+    assert np.all(radii >= 2. - 0.3 - 1e-5) and np.all(radii <= 2. + 0.3 + 1e-5)
+    np.testing.assert_allclose(radii, 2. + 0.3 * heights, atol=1e-5)
+
+
+def test_fbm_does_not_depend_on_the_chunks(monkeypatch):
+    directions = fibonacciPoints(5000)
+    heights = fbm(directions, seed=1)
+    monkeypatch.setattr(displacement, "DISPLACEMENT_CHUNK", 777)
+    np.testing.assert_array_equal(fbm(directions, seed=1), heights)
+    assert not np.allclose(fbm(directions, seed=2), heights)
+
+
+def test_equirectangular_rows_follow_the_latitude():
+    # row 0 at the south pole
+    image = np.repeat(np.linspace(-1, 1, 180)[:, None], 360, axis=1)
+    directions = fibonacciPoints(2000)
+    latitude = np.arcsin(directions[:, 2]) / (np.pi / 2)
+    np.testing.assert_allclose(sampleEquirectangular(image, directions), latitude, atol=0.02)
+
+
+def test_cube_map_tiles_follow_the_cube_faces():
+    # tile of face f at column f % 3 and row f // 3 of the atlas (row 0 at the bottom of the image)
+    image = np.empty((20, 30))
+    for face in range(6):
+        image[(face // 3) * 10:(face // 3 + 1) * 10, (face % 3) * 10:(face % 3 + 1) * 10] = face
+    directions = fibonacciPoints(2000)
+    np.testing.assert_array_equal(sampleCubeMap(image, directions), cubeMapCoordinates(directions)[0])
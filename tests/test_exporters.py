@@ -0,0 +1,28 @@
+import numpy as np
+from core.exporters import writeObj, writePly
+
+
+def test_obj_lists_vertices_and_one_based_faces(tmp_path):
+    verts = np.array([[0, 0, 1], [1, 0, 0], [0, 1, 0], [-1, 0, 0]], dtype=np.float32)
+    faces = [np.array([[0, 1, 2]]), np.array([[0, 1, 2, 3]])]
+    path = tmp_path / "sphere.obj"
+    writeObj(str(path), verts, faces)
+    assert path.read_text().splitlines() == [
+        "v 0.000000 0.000000 1.000000",
+        "v 1.000000 0.000000 0.000000",
+        "v 0.000000 1.000000 0.000000",
+        "v -1.000000 0.000000 0.000000",
+        "f 1 2 3",
+        "f 1 2 3 4",
+    ]
+
+
+def test_ply_writes_binary_faces_after_header(tmp_path):
+    verts = np.eye(3)
+    path = tmp_path / "sphere.ply"
+    writePly(str(path), verts, np.array([[0, 1, 2]]))
+    data = path.read_bytes()
+    body = data[data.index(b"end_header\n") + len(b"end_header\n"):]
+    np.testing.assert_array_equal(np.frombuffer(body[:36], dtype="<f4").reshape(3, 3), verts)
+    assert body[36] == 3
+    np.testing.assert_array_equal(np.frombuffer(body[37:], dtype="<i4"), [0, 1, 2])
@@ -0,0 +1,61 @@
+from collections import deque
+import numpy as np
+from core.arrays import faceBlocks
+from core.conversions import truncate
+from core.generators import icosphere
+from core.geodesics import SurfaceGraph
+
+
+def breadthFirstRings(faces, n_verts, source, k=None):
+    """
+    :return dict: vertex -> number of edges from <source>, for the vertices within <k> edges
+    """
+    neighbors = [set() for _ in range(n_verts)]
+    for block in faceBlocks(faces):
+        for face in block:
+            for a, b in zip(face, np.roll(face, -1)):
+                neighbors[a].add(b)
+                neighbors[b].add(a)
+    ring = {source: 0}
+    queue = deque([source])
+    while queue:
+        vertex = queue.popleft()
+        if k is not None and ring[vertex] == k:
+            continue
+        for other in neighbors[vertex]:
+            if other not in ring:
+                ring[other] = ring[vertex] + 1
+                queue.append(other)
+    return ring
+
+
+def test_k_rings_match_breadth_first_search():
+    verts, faces = truncate(*icosphere(2))
+    graph = SurfaceGraph(verts, faces)
+    seeds = np.array([0, 17, 17, len(verts) - 1])
+    starts, vertices, rings = graph.kRings(seeds, 3)
+
+    for i, seed in enumerate(seeds):
+        expected = breadthFirstRings(faces, len(verts), seed, k=3)
+        group = slice(starts[i], starts[i + 1])
+        assert dict(zip(vertices[group].tolist(), rings[group].tolist())) == expected
+        assert np.all(np.diff(rings[group]) >= 0)
+
+
+def test_ring_distance_is_the_closest_breadth_first_distance():
+    verts, faces = icosphere(3)
+    sources = [0, 100]
+    first, second = [breadthFirstRings(faces, len(verts), s) for s in sources]
+    expected = [min(first[v], second[v]) for v in range(len(verts))]
+    np.testing.assert_array_equal(SurfaceGraph(verts, faces).ringDistance(sources), expected)
+
+
+def test_geodesic_distance_is_not_shorter_than_the_great_circle():
+    verts, faces = icosphere(3, radius=2.)
+    distance = SurfaceGraph(verts, faces).geodesicDistance([0])
+    unit = verts / np.linalg.norm(verts, axis=1)[:, None]
+    arc = 2. * np.arccos(np.clip(unit @ unit[0], -1, 1))
+    assert distance[0] == 0
+    assert np.all(distance >= arc - 1e-9)
+    # the paths along the edges stay close to the great circles
+    assert np.all(distance <= 1.25 * arc + 1e-9)
@@ -0,0 +1,42 @@
+import math
+import numpy as np
+import pytest
+from core.conversions import truncate
+from core.generators import icosphere, spherifiedCube
+from core.laplacian import LaplacianBuilder, getLaplacianBuilder
+
+
+@pytest.mark.parametrize("generate", [lambda: icosphere(3, radius=2.), lambda: truncate(*icosphere(2, radius=2.))])
+def test_laplacian_rows_sum_to_zero(generate):
+    verts, faces = generate()
+    builder = LaplacianBuilder(len(verts), faces)
+    for laplacian in (builder.uniformLaplacian(), builder.cotangentLaplacian(verts)):
+        np.testing.assert_allclose(np.asarray(laplacian.sum(axis=1)).ravel(), 0, atol=1e-9)
+        assert abs(laplacian - laplacian.T).max() < 1e-12
+        # every vertex has at least one edge of positive weight
+        assert np.all(laplacian.diagonal() > 0)
+
+
+@pytest.mark.parametrize("kind", ["voronoi", "barycentric"])
+def test_mass_matrix_sums_to_the_sphere_area(kind):
+    radius = 2.
+    verts, faces = icosphere(5, radius)
+    builder = LaplacianBuilder(len(verts), faces)
+    _, _, area = builder.triangleGeometry(verts)
+    mass = builder.massMatrix(verts, kind)
+
+    # the areas of the corners partition the triangles
+    assert mass.sum() == pytest.approx(area.sum(), rel=1e-12)
+    assert mass.sum() == pytest.approx(4 * math.pi * radius ** 2, rel=1e-2)
+    assert np.all(mass.diagonal() > 0)
+
+
+def test_builder_is_reused_after_a_morph():
+    verts, faces = spherifiedCube(4)
+    builder = getLaplacianBuilder(("Spherified Cube", 4), len(verts), faces)
+    assert getLaplacianBuilder(("Spherified Cube", 4), len(verts), faces) is builder
+
+    # scaling the vertices by s scales the areas by s ** 2 and keeps the cotangent weights
+    scaled = builder.cotangentLaplacian(3 * verts)
+    assert abs(scaled - builder.cotangentLaplacian(verts)).max() < 1e-9
+    assert builder.massMatrix(3 * verts).sum() == pytest.approx(9 * builder.massMatrix(verts).sum())
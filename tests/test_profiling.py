@@ -0,0 +1,52 @@
+import threading
+from core import profiling
+
+
+def test_latest_operation_is_kept_per_thread():
+    profiling.reset()
+    profiling.enable()
+    try:
+        with profiling.stage("main"):
+            with profiling.stage("main.child"):
+                pass
+
+        def work():
+            with profiling.stage("worker"):
+                pass
+            ident.append(threading.get_ident())
+
+        ident = []
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+    finally:
+        profiling.enable(False)
+
+    assert [name for name, _, _, _ in profiling.getLatestBreakdown()] == ["main", "main.child"]
+    assert [name for name, _, _, _ in profiling.getLatestBreakdown(ident[0])] == ["worker"]
+    profiling.reset()
+
+
+def profiledWork(name):
+    with profiling.stage(name):
+        pass
+
+
+def test_background_breakdown_is_the_latest_worker_operation():
+    profiling.reset()
+    profiling.enable()
+    try:
+        with profiling.stage("main"):
+            pass
+        for name in ("first", "second"):
+            thread = threading.Thread(target=profiledWork, args=(name,), name="worker-" + name)
+            thread.start()
+            thread.join()
+    finally:
+        profiling.enable(False)
+
+    thread, breakdown = profiling.getBackgroundBreakdown()
+    assert thread == "worker-second"
+    assert [name for name, _, _, _ in breakdown] == ["second"]
+    profiling.reset()
+    assert profiling.getBackgroundBreakdown() == (None, [])
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from core.arrays import flattenFaces, faceBlocks
+from core.conversions import truncate
+from core.generators import icosphere, fibonacci, spherifiedCube, radial
+from core.quality import meshQuality
+
+
+def interleavedFaces(faces, seed=0):
+    """
+    :return (np.ndarray, np.ndarray, list): flat loops and totals of <faces> in a random order, and the faces in that
+        order
+    """
+    polygons = [list(f) for block in faceBlocks(faces) for f in block]
+    order = np.random.default_rng(seed).permutation(len(polygons))
+    polygons = [polygons[i] for i in order]
+    return np.concatenate(polygons), np.array([len(f) for f in polygons]), polygons
+
+
+def test_face_metrics_follow_the_order_of_the_polygons():
+    verts, faces = truncate(*icosphere(2))
+    loops, totals, polygons = interleavedFaces(faces)
+    assert len(np.unique(totals[:20])) == 2
+    _, metrics = meshQuality(verts, loops, return_faces=True, totals=totals)
+
+    # each polygon alone gives its own metrics, except relative_area that depends on the mean
+    for i in (0, 1, 7, len(polygons) - 1):
+        face = np.array([polygons[i]])
+        _, single = meshQuality(verts, face, return_faces=True)
+        for name in ("min_angle", "max_angle", "edge_ratio"):
+            np.testing.assert_allclose(metrics[name][i], single[name][0])
+
+
+def test_flat_and_grouped_faces_give_the_same_summary():
+    verts, faces = truncate(*icosphere(2))
+    loops, totals = flattenFaces(faces)
+    assert meshQuality(verts, faces) == meshQuality(verts, loops, totals=totals)
+
+
+def test_regular_icosahedron_metrics():
+    verts, faces = icosphere(0, radius=3.)
+    summary = meshQuality(verts, faces)
+    assert (summary["verts"], summary["edges"], summary["faces"]) == (12, 30, 20)
+    assert summary["angle"]["min"] == pytest.approx(60) and summary["angle"]["max"] == pytest.approx(60)
+    assert summary["edge_ratio"]["max"] == pytest.approx(1)
+    assert summary["relative_area"]["std"] == pytest.approx(0, abs=1e-12)
+    assert summary["valence"] == {5: 12}
+    assert summary["delaunay"] == 1.
+    assert summary["coverage"] == pytest.approx(1)
+
+
+def test_truncated_icosahedron_angles():
+    verts, faces = truncate(*icosphere(0))
+    summary, metrics = meshQuality(verts, faces, return_faces=True)
+    assert summary["sides"] == {5: 12, 6: 20}
+    # all the edges have the same length: regular pentagons and hexagons
+    angles = np.sort(metrics["max_angle"])
+    np.testing.assert_allclose(angles[:12], 108)
+    np.testing.assert_allclose(angles[12:], 120)
+    np.testing.assert_allclose(metrics["min_angle"], metrics["max_angle"])
+
+
+@pytest.mark.parametrize("generate", [lambda: fibonacci(500), lambda: spherifiedCube(6), lambda: radial(8, 12)])
+def test_closed_spheres_cover_the_whole_sphere(generate):
+    assert meshQuality(*generate())["coverage"] == pytest.approx(1)
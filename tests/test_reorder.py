@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+from core.arrays import faceBlocks, flattenFaces
+from core.conversions import truncate
+from core.generators import icosphere, randomSphere
+from core.reorder import reorderMesh
+from core.validation import checkMesh
+
+
+def polygons(verts, faces):
+    return [verts[face] for block in faceBlocks(faces) for face in block]
+
+
+@pytest.mark.parametrize("curve", ["hilbert", "morton"])
+def test_reorder_is_a_permutation_that_keeps_the_mesh(curve):
+    verts, faces = truncate(*icosphere(2))
+    new_verts, new_faces, vertex_order, face_order = reorderMesh(verts, faces, curve)
+
+    np.testing.assert_array_equal(np.sort(vertex_order), np.arange(len(verts)))
+    np.testing.assert_array_equal(np.sort(face_order), np.arange(len(flattenFaces(faces)[1])))
+    np.testing.assert_array_equal(new_verts, verts[vertex_order])
+    # same polygons, corners in the same order, listed in the face order
+    old = polygons(verts, faces)
+    for i, polygon in enumerate(polygons(new_verts, new_faces)):
+        np.testing.assert_array_equal(polygon, old[face_order[i]])
+    assert checkMesh(new_verts, new_faces)["volume"] == pytest.approx(checkMesh(verts, faces)["volume"])
+
+
+def test_reorder_brings_the_faces_closer_in_memory():
+    verts, faces = randomSphere(20000, seed=0)
+    new_verts, new_faces = reorderMesh(verts, faces)[:2]
+
+    def span(faces):
+        return np.mean(faces.max(axis=1) - faces.min(axis=1))
+
+    assert span(new_faces) < span(faces) / 10
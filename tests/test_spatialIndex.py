@@ -0,0 +1,28 @@
+import numpy as np
+from core.arrays import normalizeArray
+from core.spatialIndex import CubeMapIndex
+
+
+def bruteForceNearest(points, queries, chunk=256):
+    directions = normalizeArray(points, 1.)
+    queries = normalizeArray(queries, 1.)
+    return np.concatenate([np.argmax(queries[i:i + chunk] @ directions.T, axis=1)
+                           for i in range(0, len(queries), chunk)])
+
+
+def test_nearest_matches_brute_force_on_a_large_point_set():
+    rng = np.random.default_rng(0)
+    points = rng.normal(size=(300000, 3))
+    queries = rng.normal(size=(2000, 3))
+
+    index = CubeMapIndex(points)
+    # the resolution follows the number of points, past the 16 bit bucket ids
+    assert 6 * index.res ** 2 > 2 ** 16
+    assert np.all(np.diff(index.starts) <= 40)
+    np.testing.assert_array_equal(index.nearest(queries), bruteForceNearest(points, queries))
+
+
+def test_nearest_of_the_points_themselves():
+    points = np.random.default_rng(1).normal(size=(5000, 3))
+    ids = CubeMapIndex(points).nearest(points)
+    np.testing.assert_array_equal(ids, np.arange(len(points)))
@@ -0,0 +1,57 @@
+import numpy as np
+from core.arrays import faceBlocks
+from core.conversions import truncate
+from core.generators import fibonacci, icosphere
+from core.laplacian import fanTriangulate
+from core.transfer import AttributeTransfer, faceCenters, transferAttributes
+
+
+def interleavedFaces(faces, seed=0):
+    """
+    :return (np.ndarray, np.ndarray): flat loops and totals of <faces> in a random order
+    """
+    polygons = [f for block in faceBlocks(faces) for f in block]
+    order = np.random.default_rng(seed).permutation(len(polygons))
+    return np.concatenate([polygons[i] for i in order]), np.array([len(polygons[i]) for i in order])
+
+
+def test_face_values_survive_a_round_trip_on_mixed_faces():
+    verts, faces = truncate(*icosphere(2))
+    loops, totals = interleavedFaces(faces)
+    values = np.arange(len(totals), dtype=np.float64)
+    centers = faceCenters(verts, loops, totals)
+
+    transfer = AttributeTransfer(verts, loops, centers, "face", source_totals=totals)
+    np.testing.assert_array_equal(transfer.apply(values), values)
+
+
+def test_flat_face_centers_follow_the_polygons():
+    verts, faces = truncate(*icosphere(1))
+    loops, totals = interleavedFaces(faces)
+    starts = np.concatenate([[0], np.cumsum(totals)[:-1]])
+    expected = [verts[loops[s:s + k]].mean(axis=0) for s, k in zip(starts, totals)]
+    np.testing.assert_allclose(faceCenters(verts, loops, totals), expected, atol=1e-12)
+
+
+def test_barycentric_transfer_reproduces_a_linear_field():
+    verts, faces = truncate(*icosphere(2))
+    triangles = fanTriangulate(faces)
+    # points on the source faces (the rays from the center hit them where they are)
+    rng = np.random.default_rng(0)
+    weights = rng.dirichlet(np.ones(3), size=len(triangles))
+    targets = np.einsum("ij,ijk->ik", weights, verts[triangles])
+
+    def field(points):
+        return points @ np.array([0.3, -1.2, 2.]) + 0.5
+
+    transferred = transferAttributes(verts, faces, targets, {"field": field(verts)})["field"]
+    np.testing.assert_allclose(transferred, field(targets), atol=1e-9)
+
+
+def test_transfer_to_the_source_vertices_is_the_identity():
+    verts, faces = fibonacci(2000)
+    values = np.random.default_rng(1).random((len(verts), 3))
+    for method in ("barycentric", "nearest"):
+        transfer = AttributeTransfer(verts, faces, verts, method)
+        np.testing.assert_allclose(np.asarray(transfer.weights.sum(axis=1)).ravel(), 1)
+        np.testing.assert_allclose(transfer.apply(values), values, atol=1e-9)
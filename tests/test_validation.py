@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from core.conversions import truncate
+from core.generators import icosphere, fibonacci, randomSphere, spherifiedCube, radial
+from core.validation import checkMesh
+
+THREE_MERIDIANS = pytest.mark.xfail(reason="with 3 meridians the last one is the seam, the two distinct meridians "
+                                           "left make faces that share the same welded edges")
+
+# (topology, generator of (verts, faces) from the resolution, weld the seams)
+TOPOLOGIES = {
+    "Icosahedron": (lambda n: icosphere(n), False),
+    "Truncated Icosahedron": (lambda n: truncate(*icosphere(n)), False),
+    "Fibonacci Sphere": (lambda n: fibonacci(n), False),
+    "Random Sphere": (lambda n: randomSphere(n, seed=0), False),
+    "Spherified Cube": (lambda n: spherifiedCube(n), True),
+    "Radial Sphere": (lambda n: radial(*n), True),
+}
+
+CASES = [
+    ("Icosahedron", 0), ("Icosahedron", 2), ("Icosahedron", 5),
+    ("Truncated Icosahedron", 0), ("Truncated Icosahedron", 2), ("Truncated Icosahedron", 4),
+    ("Fibonacci Sphere", 4), ("Fibonacci Sphere", 10), ("Fibonacci Sphere", 100), ("Fibonacci Sphere", 1000),
+    ("Fibonacci Sphere", 10000), ("Fibonacci Sphere", 50000),
+    ("Random Sphere", 4), ("Random Sphere", 10), ("Random Sphere", 100), ("Random Sphere", 1000),
+    ("Random Sphere", 10000), ("Random Sphere", 50000),
+    ("Spherified Cube", 1), ("Spherified Cube", 2), ("Spherified Cube", 10), ("Spherified Cube", 50),
+    pytest.param("Radial Sphere", (2, 3), marks=THREE_MERIDIANS),
+    pytest.param("Radial Sphere", (3, 3), marks=THREE_MERIDIANS),
+    ("Radial Sphere", (3, 4)), ("Radial Sphere", (10, 16)), ("Radial Sphere", (50, 64)),
+]
+
+
+@pytest.mark.parametrize("topology, resolution", CASES)
+def test_generated_sphere_is_valid(topology, resolution):
+    generate, weld = TOPOLOGIES[topology]
+    # the points on the projection pole are moved by a random offset
+    np.random.seed(0)
+    verts, faces = generate(resolution)
+    report = checkMesh(verts, faces, weld=weld)
+    assert report["volume"] > 0